@@ -0,0 +1,300 @@
+try:
+    import League
+    import MatchRunner
+except ModuleNotFoundError:
+    import DotsAndBoxes.League as League
+    import DotsAndBoxes.MatchRunner as MatchRunner
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import argparse
+import math
+import os
+import random
+
+def expected_score(elo):
+    """
+    Expected score of a player who is elo points better than the other.
+    Args:
+        elo(float): Elo difference
+    Returns:
+        float: between 0 and 1
+    """
+    return 1/(1 + 10**(-elo/400))
+
+class SPRT:
+    """
+    Sequential probability ratio test of whether a player is elo0 or elo1
+    Elo points better than another, from their wins, draws and losses.
+    After every game the log likelihood ratio of the two hypotheses is
+    checked against bounds set by the error rates, and the test stops as soon
+    as it crosses one. Wins, draws and losses are handled with the usual
+    normal approximation to the generalised SPRT: the score of each game is
+    1, 0.5 or 0, and its variance is taken from the games so far.
+    """
+    def __init__(self, elo0=0, elo1=20, alpha=0.05, beta=0.05):
+        """
+        Args:
+            elo0(float): Elo difference of the null hypothesis, H0
+            elo1(float): Elo difference of the alternative hypothesis, H1
+            alpha(float): chance of accepting H1 when H0 is true
+            beta(float): chance of accepting H0 when H1 is true
+        """
+        self.elo0 = elo0
+        self.elo1 = elo1
+        self.lower = math.log(beta/(1 - alpha))
+        self.upper = math.log((1 - beta)/alpha)
+        self.wins = 0
+        self.draws = 0
+        self.losses = 0
+
+    def add(self, wins=0, draws=0, losses=0):
+        """
+        Adds game results.
+        Args:
+            wins(int): games won by the player being tested
+            draws(int): games drawn
+            losses(int): games lost
+        """
+        self.wins += wins
+        self.draws += draws
+        self.losses += losses
+
+    def games(self):
+        """
+        Returns:
+            int: number of games added
+        """
+        return self.wins + self.draws + self.losses
+
+    def llr(self):
+        """
+        Log likelihood ratio of H1 against H0.
+        Returns:
+            float: 0 until there are results
+        """
+        wins, draws, losses = self.wins, self.draws, self.losses
+        if wins + draws + losses == 0:
+            return 0.0
+        if (wins > 0) + (draws > 0) + (losses > 0) == 1:
+            # Every game had the same result, so the variance is 0. Count a
+            # virtual win and loss, so a player that wins (or loses) every
+            # game still reaches a bound.
+            wins += 1
+            losses += 1
+        n = wins + draws + losses
+        score = (wins + 0.5*draws)/n
+        variance = (wins*(1 - score)**2 + draws*(0.5 - score)**2 + losses*score**2)/n
+        s0 = expected_score(self.elo0)
+        s1 = expected_score(self.elo1)
+        return n*(s1 - s0)*(2*score - s0 - s1)/(2*variance)
+
+    def status(self):
+        """
+        Result of the test so far.
+        Returns:
+            str: "H1" if H1 is accepted, "H0" if H0 is accepted, None if
+                there aren't enough games to tell yet
+        """
+        llr = self.llr()
+        if llr >= self.upper:
+            return "H1"
+        if llr <= self.lower:
+            return "H0"
+        return None
+
+class Pairing:
+    """
+    An A/B match between a candidate and the baseline. Games alternate
+    between the candidate going first and going second, and each order has
+    its own MatchRunner and results file.
+    """
+    def __init__(self, candidate, baseline, width, height, variant, resultsDir, sprt):
+        """
+        Args:
+            candidate(str): player spec of the player being tested
+            baseline(str): player spec it is tested against
+            width(int): board width
+            height(int): board height
+            variant(str): "american", "swedish" or "random"
+            resultsDir(str): folder to save results files in
+            sprt(SPRT): test for the pairing
+        """
+        self.candidate = candidate
+        # A and B keep the files apart when a player is tested against itself.
+        names = ["A-" + League.entrant_name(candidate), "B-" + League.entrant_name(baseline)]
+        # runners[0] has the candidate first, runners[1] has it second.
+        self.runners = [MatchRunner.MatchRunner(candidate, baseline, width, height, variant, resultsDir, names),
+            MatchRunner.MatchRunner(baseline, candidate, width, height, variant, resultsDir, names[::-1])]
+        self.writers = []
+        for runner in self.runners:
+            open(runner.filename(), "w+").close()
+            self.writers.append(MatchRunner.ResultsWriter(runner.filename()))
+        self.sprt = sprt
+        # Games handed out for each order, and batches handed out.
+        self.started = [0, 0]
+        self.batches = [0, 0]
+        self.result = None
+
+    def nextBatch(self, batchSize):
+        """
+        Hands out the next batch of games, in the order that has had fewer.
+        Args:
+            batchSize(int): games in the batch
+        Returns:
+            Tuple(int, int, range): order, batch number and game numbers
+        """
+        order = 0 if self.started[0] <= self.started[1] else 1
+        games = range(self.started[order], self.started[order] + batchSize)
+        batch = self.batches[order]
+        self.started[order] += batchSize
+        self.batches[order] += 1
+        return order, batch, games
+
+    def addBatch(self, order, batch, games):
+        """
+        Saves a finished batch and adds its games to the test. Once the test
+        is decided, its result doesn't change, though the games that were
+        still being played are saved.
+        Args:
+            order(int): 0 if the candidate was player one, 1 if it was player two
+            batch(int): batch number
+            games(List[Tuple(str, int)]): statistics string and winner of each game
+        Returns:
+            bool: True if this batch decided the test
+        """
+        self.writers[order].add(batch, games)
+        if self.result is not None:
+            return False
+        candidate = 1 + order
+        for text, winner in games:
+            if winner == candidate:
+                self.sprt.add(wins=1)
+            elif winner == 0:
+                self.sprt.add(draws=1)
+            else:
+                self.sprt.add(losses=1)
+        self.result = self.sprt.status()
+        return self.result is not None
+
+def ab_test(candidates, baseline, width=3, height=3, variant="american", elo0=0, elo1=20, alpha=0.05, beta=0.05,
+        maxGames=2000, workers=1, batchSize=2, seed=None, resultsDir="Results", verbose=True):
+    """
+    Tests each candidate against the baseline with an SPRT, stopping each
+    pairing as soon as its test is decided. Workers are always given a batch
+    from the undecided pairing that has played the fewest games, so when a
+    pairing stops, its workers move on to the ones that are left.
+    Games are seeded the same way as MatchRunner.run_matches.
+    Args:
+        candidates(List[str]): player specs to test
+        baseline(str): player spec to test them against
+        width(int): board width
+        height(int): board height
+        variant(str): "american", "swedish" or "random"
+        elo0(float): Elo difference of the null hypothesis
+        elo1(float): Elo difference of the alternative hypothesis
+        alpha(float): chance of accepting H1 when H0 is true
+        beta(float): chance of accepting H0 when H1 is true
+        maxGames(int): games after which an undecided pairing is stopped
+        workers(int): number of processes. With 1, games are played in this process.
+        batchSize(int): games in each batch sent to a worker
+        seed(int): seed for the games. Random by default.
+        resultsDir(str): folder to make the test's results folder in
+        verbose(bool): print each result as it is decided
+    Returns:
+        List[Tuple(str, str, SPRT)]: candidate, result ("H1", "H0" or None
+            if stopped at maxGames) and the test of each pairing
+    """
+    if seed is None:
+        seed = random.getrandbits(32)
+    folder = os.path.join(resultsDir, "ab-{}-{}x{}".format(variant, width, height))
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+    pairings = [Pairing(candidate, baseline, width, height, variant, folder, SPRT(elo0, elo1, alpha, beta))
+        for candidate in candidates]
+    for pairing in pairings:
+        for runner in pairing.runners:
+            MatchRunner.start_results(runner.filename(), seed)
+
+    def nextTask():
+        # The undecided pairing with the fewest games handed out.
+        undecided = [p for p in pairings if p.result is None and sum(p.started) < maxGames]
+        if not undecided:
+            return None
+        pairing = min(undecided, key=lambda p: sum(p.started))
+        order, batch, games = pairing.nextBatch(min(batchSize, maxGames - sum(pairing.started)))
+        runner = pairing.runners[order]
+        name = os.path.basename(runner.filename())
+        seeds = ["{}-{}-{}".format(seed, name, k) for k in games]
+        return (pairing, order, batch), runner, seeds
+
+    def finished(pairing, order, batch, games):
+        if pairing.addBatch(order, batch, games) and verbose:
+            print(describe(pairing))
+
+    if workers <= 1:
+        task = nextTask()
+        while task is not None:
+            key, runner, seeds = task
+            finished(*key, MatchRunner.play_games(runner, seeds))
+            task = nextTask()
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            pending = {}
+            # Two batches for each worker, so no worker waits between batches.
+            for k in range(workers*2):
+                task = nextTask()
+                if task is None:
+                    break
+                key, runner, seeds = task
+                pending[pool.submit(MatchRunner.play_games, runner, seeds)] = key
+            while pending:
+                done, notDone = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = pending.pop(future)
+                    finished(*key, future.result())
+                    task = nextTask()
+                    if task is not None:
+                        newKey, runner, seeds = task
+                        pending[pool.submit(MatchRunner.play_games, runner, seeds)] = newKey
+    if verbose:
+        for pairing in pairings:
+            if pairing.result is None:
+                print(describe(pairing))
+    return [(p.candidate, p.result, p.sprt) for p in pairings]
+
+def describe(pairing):
+    """
+    One line summary of a pairing's test.
+    Args:
+        pairing(Pairing): pairing to describe
+    Returns:
+        str
+    """
+    sprt = pairing.sprt
+    result = {"H1": "H1 accepted", "H0": "H0 accepted", None: "undecided"}[pairing.result]
+    return "{}: {} after {} games (+{} ={} -{}), LLR {:.2f} [{:.2f}, {:.2f}]".format(
+        League.entrant_name(pairing.candidate), result, sprt.games(), sprt.wins, sprt.draws, sprt.losses,
+        sprt.llr(), sprt.lower, sprt.upper)
+
+def main(args=None):
+    """
+    Command line entry point for A/B tests.
+    >python DotsAndBoxes ab "monte:timeLimit=1,c=1.0" "monte:timeLimit=1,c=2.0" --baseline "monte:timeLimit=1,c=1.4142"
+    Args:
+        args(List[str]): command line arguments, sys.argv[2:] by default
+    """
+    parser = argparse.ArgumentParser(prog="DotsAndBoxes ab", description="Test players against a baseline, stopping each test once it is decided.")
+    parser.add_argument("candidates", nargs="+", help="player specs to test")
+    parser.add_argument("--baseline", required=True, help="player spec to test them against")
+    parser.add_argument("--size", default="3x3", help="board size as WIDTHxHEIGHT")
+    parser.add_argument("--variant", default="american", choices=list(MatchRunner.VARIANTS))
+    parser.add_argument("--elo0", type=float, default=0)
+    parser.add_argument("--elo1", type=float, default=20)
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--beta", type=float, default=0.05)
+    parser.add_argument("--max-games", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="number of processes to play games in")
+    parser.add_argument("--seed", type=int, default=None)
+    options = parser.parse_args(args)
+    width, height = (int(x) for x in options.size.lower().split("x"))
+    ab_test(options.candidates, options.baseline, width, height, options.variant, options.elo0, options.elo1,
+        options.alpha, options.beta, options.max_games, options.workers, seed=options.seed)
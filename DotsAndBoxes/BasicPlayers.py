@@ -52,10 +52,10 @@ class RandomPlayer(PlayerBase):
 
     def randomMove(self, game):
         """
-        Get list of legal moves and return any random one.
+        Return any random legal move.
         """
         #time.sleep(0.25)
-        return random.choice(game.get_all_legal_moves())
+        return game.random_legal_move()
 
     def isHuman(self):
         """
@@ -73,7 +73,7 @@ class RandomPlayer(PlayerBase):
 
 class MovesInOrder(PlayerBase):
     """
-    Plays all of the legal moves in the order they are returned.
+    Plays all of the legal moves in board order.
     """
     def chooseMove(self, game):
         moves = game.get_all_legal_moves()
@@ -0,0 +1,382 @@
+try:
+    import BitboardGame
+    import ReadStatistics
+except ModuleNotFoundError:
+    import DotsAndBoxes.BitboardGame as BitboardGame
+    import DotsAndBoxes.ReadStatistics as ReadStatistics
+from array import array
+import os
+import re
+import struct
+
+# Binary results files hold the same games as the text results files, with
+# each move packed into one byte (or two on boards with more than 255 lines),
+# numbered as in BitboardGame.get_tables.
+#
+# File header:
+#   MAGIC, then "<BBBB": version, width, height, variant (index in VARIANTS),
+#   then three strings, each a "<H" length and UTF-8 bytes: player one's
+#   name, player two's name and the seed of the run.
+# Then one record for each game:
+#   "<IHHH": game number, player one's score, player two's score, number of
+#   moves, then the moves.
+#
+# Games are only ever added to the end. A ".idx" file next to the results
+# file holds the offset of each record as an unsigned 64 bit int, so game N
+# can be read without reading the games before it. With MatchRunner, game
+# number k of a run with seed s was seeded with "{s}-{text filename}-{k}".
+MAGIC = b"DBRS"
+VERSION = 1
+VARIANTS = ["american", "swedish", "random"]
+HEADER = struct.Struct("<BBBB")
+RECORD = struct.Struct("<IHHH")
+STRING = struct.Struct("<H")
+
+def index_filename(filename):
+    """
+    Args:
+        filename(str): binary results file
+    Returns:
+        str: the index file that goes with it
+    """
+    return filename + ".idx"
+
+def move_type(width, height):
+    """
+    Array type code for the moves on a board size.
+    Args:
+        width(int): board width
+        height(int): board height
+    Returns:
+        str: "B" for one byte a move, "H" for two
+    """
+    edges = (width-1)*height + (height-1)*width
+    return "B" if edges <= 255 else "H"
+
+class BinaryResultsWriter:
+    """
+    Adds games to a binary results file and its index. If the file already
+    exists, its header has to match, and games are added after the ones
+    already in it.
+    """
+    def __init__(self, filename, width, height, variant="american", players=("", ""), seed=""):
+        """
+        Args:
+            filename(str): binary results file
+            width(int): board width
+            height(int): board height
+            variant(str): "american", "swedish" or "random"
+            players(Tuple(str, str)): names of player one and player two
+            seed(str): seed of the run the games are from
+        """
+        self.filename = filename
+        self.width = width
+        self.height = height
+        self.edgeIndex = BitboardGame.get_tables(width, height)[1]
+        self.moveType = move_type(width, height)
+        if os.path.exists(filename) and os.path.getsize(filename) > 0:
+            reader = BinaryResultsReader(filename)
+            reader.close()
+            if (reader.width, reader.height, reader.variant) != (width, height, variant):
+                raise ValueError("{} holds {}x{} {} games".format(filename, reader.width, reader.height, reader.variant))
+            # New games go after the last whole one, with the index to match.
+            repair(filename)
+        else:
+            with open(filename, "wb") as outfile:
+                outfile.write(MAGIC + HEADER.pack(VERSION, width, height, VARIANTS.index(variant)))
+                for text in [players[0], players[1], str(seed)]:
+                    data = text.encode("utf-8")
+                    outfile.write(STRING.pack(len(data)) + data)
+            open(index_filename(filename), "wb").close()
+        self.outfile = open(filename, "ab")
+        self.indexFile = open(index_filename(filename), "ab")
+
+    def add(self, moves, scores, number=0):
+        """
+        Adds a game to the end of the file.
+        Args:
+            moves(List[3-tuple(int)]): moves made in the game, in order
+            scores(Tuple(int, int)): final scores of player one and player two
+            number(int): number of the game in its run
+        """
+        offset = self.outfile.tell()
+        packed = array(self.moveType, [self.edgeIndex[tuple(m)] for m in moves]).tobytes()
+        self.outfile.write(RECORD.pack(number, scores[0], scores[1], len(moves)) + packed)
+        # The index is only written once the record is, so the index never
+        # points past the end of the file.
+        self.outfile.flush()
+        self.indexFile.write(struct.pack("<Q", offset))
+        self.indexFile.flush()
+
+    def addText(self, text, number=0):
+        """
+        Adds a game given as a statistics string, as made by
+        Game.get_statistics_string, to the end of the file.
+        Args:
+            text(str): the game's lines from a text results file
+            number(int): number of the game in its run
+        """
+        lines = text.strip().split("\n")
+        moves = [tuple(int(x) for x in line.strip()[1:-1].split(",")) for line in lines[1:-1]]
+        scores = [int(x) for x in lines[-1].split(",")]
+        self.add(moves, scores, number)
+
+    def addGame(self, game, number=0):
+        """
+        Adds a finished Game to the end of the file.
+        Args:
+            game(Game): finished game
+            number(int): number of the game in its run
+        """
+        scores = game.get_scores()
+        self.add(game.movesMade, (scores[1], scores[2]), number)
+
+    def close(self):
+        """
+        Closes the file and its index.
+        """
+        self.outfile.close()
+        self.indexFile.close()
+
+class BinaryResultsReader:
+    """
+    Reads games from a binary results file. Game N is found with the index.
+    If the index is missing, torn or behind the file, the offsets of the
+    games it doesn't cover are found by reading through the file. A game
+    that was only partly written at the end is left out. Reading never
+    changes the file or its index, so a file can be read while a run is
+    still adding to it. See repair to fix them up on disk.
+    """
+    def __init__(self, filename):
+        """
+        Args:
+            filename(str): binary results file
+        Raises:
+            ValueError: if the file isn't a binary results file
+        """
+        self.filename = filename
+        self.infile = open(filename, "rb")
+        if self.infile.read(len(MAGIC)) != MAGIC:
+            raise ValueError("{} is not a binary results file".format(filename))
+        version, self.width, self.height, variant = HEADER.unpack(self.infile.read(HEADER.size))
+        self.variant = VARIANTS[variant]
+        strings = []
+        for i in range(3):
+            length, = STRING.unpack(self.infile.read(STRING.size))
+            strings.append(self.infile.read(length).decode("utf-8"))
+        self.players = (strings[0], strings[1])
+        self.seed = strings[2]
+        self.dataStart = self.infile.tell()
+        self.moves = BitboardGame.get_tables(self.width, self.height)[0]
+        self.moveType = move_type(self.width, self.height)
+        self.moveSize = array(self.moveType).itemsize
+        self.offsets = self.loadIndex()
+
+    def loadIndex(self):
+        """
+        Reads the index, and finds any whole games after the last game it
+        covers. An index that doesn't match the file is ignored.
+        Returns:
+            array: offset of each game
+        """
+        offsets = array("Q")
+        indexName = index_filename(self.filename)
+        if os.path.exists(indexName):
+            with open(indexName, "rb") as indexFile:
+                data = indexFile.read()
+            # An offset that was only partly written is left off.
+            offsets.frombytes(data[:len(data) - len(data) % offsets.itemsize])
+        end = os.path.getsize(self.filename)
+        start = self.dataStart
+        if offsets:
+            lastEnd = self.recordEnd(offsets[-1]) if offsets[-1] >= self.dataStart else -1
+            if lastEnd == -1 or lastEnd > end:
+                offsets = array("Q")
+            else:
+                start = lastEnd
+        offsets.extend(self.scan(start, end))
+        return offsets
+
+    def recordEnd(self, offset):
+        """
+        Offset just after the record at an offset, or -1 if there isn't a
+        whole record there.
+        Args:
+            offset(int): offset of a record
+        Returns:
+            int
+        """
+        self.infile.seek(offset)
+        data = self.infile.read(RECORD.size)
+        if len(data) < RECORD.size:
+            return -1
+        number, score1, score2, count = RECORD.unpack(data)
+        return offset + RECORD.size + count*self.moveSize
+
+    def scan(self, start, end):
+        """
+        Finds the offset of every whole game between two offsets by reading
+        through the file. self.validEnd is set to the end of the last one.
+        Args:
+            start(int): offset of the first game to look for
+            end(int): size of the file
+        Returns:
+            array: offset of each game
+        """
+        offsets = array("Q")
+        offset = start
+        while offset < end:
+            recordEnd = self.recordEnd(offset)
+            if recordEnd == -1 or recordEnd > end:
+                break
+            offsets.append(offset)
+            offset = recordEnd
+        self.validEnd = offset
+        return offsets
+
+    def __len__(self):
+        """
+        Number of games in the file.
+        """
+        return len(self.offsets)
+
+    def game(self, n):
+        """
+        Reads game n, going straight to it with the index.
+        Args:
+            n(int): game to read, from 0
+        Returns:
+            Tuple(List[3-tuple(int)], Tuple(int, int), int): moves, scores of
+                player one and player two, and the game's number in its run
+        """
+        self.infile.seek(self.offsets[n])
+        number, score1, score2, count = RECORD.unpack(self.infile.read(RECORD.size))
+        packed = array(self.moveType)
+        packed.frombytes(self.infile.read(count*self.moveSize))
+        moves = self.moves
+        return [moves[e] for e in packed], (score1, score2), number
+
+    def __iter__(self):
+        for n in range(len(self)):
+            yield self.game(n)
+
+    def scores(self):
+        """
+        Scores of every game, without unpacking the moves.
+        Returns:
+            List[Tuple(int, int)]: scores of player one and player two
+        """
+        scores = []
+        for offset in self.offsets:
+            self.infile.seek(offset)
+            number, score1, score2, count = RECORD.unpack(self.infile.read(RECORD.size))
+            scores.append((score1, score2))
+        return scores
+
+    def close(self):
+        """
+        Closes the file.
+        """
+        self.infile.close()
+
+def repair(filename):
+    """
+    Cuts a game that was only partly written off the end of a binary results
+    file, and writes its index again to match. BinaryResultsWriter does this
+    before adding games to a file. Don't repair a file that a run is still
+    adding to.
+    Args:
+        filename(str): binary results file
+    Returns:
+        int: number of games in the file
+    """
+    reader = BinaryResultsReader(filename)
+    reader.close()
+    if reader.validEnd < os.path.getsize(filename):
+        with open(filename, "r+b") as outfile:
+            outfile.truncate(reader.validEnd)
+    with open(index_filename(filename), "wb") as indexFile:
+        indexFile.write(reader.offsets.tobytes())
+    return len(reader.offsets)
+
+def convert_text(textFilename, binaryFilename=None, variant="american", seed="", overwrite=False):
+    """
+    Converts a text results file to a binary one. The text file is read a
+    line at a time, so files bigger than memory can be converted. A game
+    that was only partly written is left out.
+    Args:
+        textFilename(str): text results file, named as ReadStatistics expects
+        binaryFilename(str): binary results file to write. Defaults to the
+            text filename with ".dbr" in place of ".txt"
+        variant(str): variant the games were played on
+        seed(str): seed of the run the games are from. By default, the seed
+            saved at the top of the text file, if there is one
+        overwrite(bool): replace the binary file and its index if they exist
+    Returns:
+        int: number of games converted
+    Raises:
+        FileExistsError: if the binary file exists and overwrite is False
+        ValueError: if a line of the text file isn't a board size, move,
+            score or seed, or a move or score isn't part of a game
+    """
+    if binaryFilename is None:
+        binaryFilename = os.path.splitext(textFilename)[0] + ".dbr"
+    if os.path.exists(binaryFilename):
+        if not overwrite:
+            raise FileExistsError("{} already exists. Pass overwrite to replace it.".format(binaryFilename))
+        for name in [binaryFilename, index_filename(binaryFilename)]:
+            if os.path.exists(name):
+                os.remove(name)
+    # Results files are named like 1_Random_2_Ordered_3x3.txt.
+    fnList = os.path.basename(textFilename).split("_")
+    players = (fnList[1], fnList[3]) if len(fnList) > 3 else ("", "")
+    writer = None
+    count = 0
+    # Moves of the game being read, None between games.
+    moves = None
+    try:
+        with open(textFilename, "r") as infile:
+            for lineNumber, line in enumerate(infile, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                if line.startswith("seed ") and writer is None:
+                    # MatchRunner saves the seed of the run at the top of the file.
+                    if not seed:
+                        seed = line.split()[1]
+                elif re.match(r"\d+x\d+$", line):
+                    width, height = (int(x) for x in line.split("x"))
+                    moves = []
+                    if writer is None:
+                        writer = BinaryResultsWriter(binaryFilename, width, height, variant, players, seed)
+                elif moves is not None and re.match(r"\(\d+, *\d+, *\d+\)$", line):
+                    moves.append(tuple(int(x) for x in line[1:-1].split(",")))
+                elif moves is not None and ReadStatistics.is_score_line(line):
+                    writer.add(moves, [int(x) for x in line.split(",")], count)
+                    count += 1
+                    moves = None
+                else:
+                    raise ValueError("{} line {}: {!r} isn't part of a game.".format(textFilename, lineNumber, line))
+    except ValueError:
+        # Don't leave half a conversion behind.
+        if writer is not None:
+            writer.close()
+            for name in [binaryFilename, index_filename(binaryFilename)]:
+                os.remove(name)
+        raise
+    if writer is not None:
+        writer.close()
+    return count
+
+def get_scores(filename):
+    """
+    Prints the wins of each player in a binary results file, the same way
+    as ReadStatistics.get_scores.
+    Args:
+        filename(str): binary results file
+    """
+    reader = BinaryResultsReader(filename)
+    games = [["{}, {}".format(score1, score2)] for score1, score2 in reader.scores()]
+    games.append(list(reader.players))
+    reader.close()
+    return ReadStatistics.count_winners(games)
@@ -0,0 +1,452 @@
+try:
+    from Game import Game
+    import Zobrist
+except ModuleNotFoundError:
+    from DotsAndBoxes.Game import Game
+    import DotsAndBoxes.Zobrist as Zobrist
+import random
+
+# Precomputed lookup tables are shared by every BitboardGame of the same size.
+_tables = {}
+
+def get_tables(width, height):
+    """
+    Builds (or fetches from the cache) the lookup tables for a board size.
+    Edges are numbered in the same order that Game lists its legal moves, so
+    all horizontal lines come first, then all vertical lines.
+    Args:
+        width: int
+        height: int
+    Returns:
+        Tuple(List[3-tuple(int)], dict{3-tuple(int):int}, List[Tuple[int]], List[int])
+            the move for each edge index, the edge index for each move, the
+            boxes touching each edge, and the edge mask for each box.
+    """
+    key = (width, height)
+    if key not in _tables:
+        moves = []
+        for i in range(height):
+            for j in range(width-1):
+                moves.append((0, i, j))
+        for i in range(width):
+            for j in range(height-1):
+                moves.append((1, i, j))
+        edgeIndex = {m: e for e, m in enumerate(moves)}
+        # Box b = i*(width-1) + j, edges in the order [top, bottom, left, right]
+        boxMasks = []
+        edgeBoxes = [[] for m in moves]
+        for i in range(height-1):
+            for j in range(width-1):
+                b = len(boxMasks)
+                mask = 0
+                for m in [(0, i, j), (0, i+1, j), (1, j, i), (1, j+1, i)]:
+                    mask |= 1 << edgeIndex[m]
+                    edgeBoxes[edgeIndex[m]].append(b)
+                boxMasks.append(mask)
+        _tables[key] = (moves, edgeIndex, [tuple(x) for x in edgeBoxes], boxMasks)
+    return _tables[key]
+
+
+class BitboardGame:
+    """
+    Compact alternative to Game. Instead of a graph of Line and Box objects,
+    drawn lines are stored as bits in one integer and claimed boxes as one
+    integer bitmask per player. Copying a BitboardGame only copies a few ints,
+    so search players spend their time searching instead of allocating.
+    Exposes the same interface as Game for the players and experiments.
+    """
+    def __init__(self, width, height, maxPlayers=2, curPlayer=1, edges=0, boxOwners=None, movesMade=None):
+        """
+        Initialise the game with given width and height.
+        If edges or boxOwners are passed, the game starts from that state.
+        Args:
+            width: int
+            height: int
+            maxPlayers: int (2)
+            curPlayer: int (1)
+            edges: int - bitmask of drawn lines
+            boxOwners: List[int] - bitmask of boxes owned by each player index
+            movesMade: List(3-Tuple(int))
+        """
+        if not isinstance(width, int) or not isinstance(height, int):
+            raise TypeError("Board width and height must be integers.")
+        self.width = width
+        self.height = height
+        self.maxPlayers = maxPlayers
+        self.currentPlayer = curPlayer
+        self.moves, self.edgeIndex, self.edgeBoxes, self.boxMasks = get_tables(width, height)
+        self.fullMask = (1 << len(self.moves)) - 1
+        self.edges = edges
+        if boxOwners is None:
+            boxOwners = [0]*(maxPlayers+1)
+        self.boxOwners = boxOwners
+        if movesMade is None:
+            movesMade = []
+        self.movesMade = movesMade
+        # Moves that can be taken back with undo_move. A copy starts with an empty stack.
+        self.moveStack = []
+        self.count_boxes()
+        self.setup_hash()
+
+    def setup_hash(self):
+        """
+        Works out the Zobrist hash of the whole position, using the same keys
+        as Game so both engines give the same hash for the same position.
+        """
+        zobrist = Zobrist.get_table(self.width, self.height, self.maxPlayers)
+        self.lineKeys = [zobrist.lines[m] for m in self.moves]
+        self.boxKeys = [keys for row in zobrist.boxes for keys in row]
+        self.playerKeys = zobrist.players
+        self.hash = self.playerKeys[self.currentPlayer]
+        for e in range(len(self.moves)):
+            if self.edges >> e & 1:
+                self.hash ^= self.lineKeys[e]
+        for player in range(1, self.maxPlayers+1):
+            for b in range(len(self.boxMasks)):
+                if self.boxOwners[player] >> b & 1:
+                    self.hash ^= self.boxKeys[b][player]
+
+    def count_boxes(self):
+        """
+        Counts the score of each player, the sides drawn for each box and how
+        many boxes have each number of sides drawn. take_turn keeps these up
+        to date afterwards.
+        """
+        self.boxSides = [bin(self.edges & mask).count("1") for mask in self.boxMasks]
+        self.sideCounts = [0, 0, 0, 0, 0]
+        for sides in self.boxSides:
+            self.sideCounts[sides] += 1
+        self.scores = {0: len(self.boxMasks)}
+        for player in range(1, self.maxPlayers+1):
+            self.scores[player] = bin(self.boxOwners[player]).count("1")
+            self.scores[0] -= self.scores[player]
+
+    def get_copy(self):
+        """
+        Game returns a copy of itself.
+        Returns:
+            BitboardGame
+        """
+        return BitboardGame(
+            self.width,
+            self.height,
+            self.maxPlayers,
+            self.currentPlayer,
+            self.edges,
+            self.boxOwners.copy(),
+            self.movesMade.copy())
+
+    def increment_player(self):
+        """
+        Increments the player counter. Wraps around on self.maxPlayers.
+        """
+        self.currentPlayer += 1
+        if self.currentPlayer > self.maxPlayers:
+            self.currentPlayer = 1
+
+    def take_turn(self, move):
+        """
+        Takes a turn for next player. Claims a line, then claims any boxes that
+        line completes. If no box was completed the turn passes on.
+        Args:
+            move: 3-tuple(int)
+        """
+        if self.is_legal_move(move):
+            e = self.edgeIndex[move]
+            self.edges |= 1 << e
+            self.movesMade.append(move)
+            self.moveStack.append((e, self.currentPlayer, self.hash))
+            self.hash ^= self.lineKeys[e]
+            if not self.claim_boxes_for_edge(e):
+                self.hash ^= self.playerKeys[self.currentPlayer]
+                self.increment_player()
+                self.hash ^= self.playerKeys[self.currentPlayer]
+        else:
+            print("Illegal move {}".format(move))
+
+    def undo_move(self):
+        """
+        Takes back the last move made with take_turn.
+        Returns:
+            3-tuple(int): the move that was taken back.
+        """
+        e, player, self.hash = self.moveStack.pop()
+        self.edges &= ~(1 << e)
+        for b in self.edgeBoxes[e]:
+            sides = self.boxSides[b]
+            self.sideCounts[sides] -= 1
+            self.sideCounts[sides-1] += 1
+            self.boxSides[b] = sides-1
+            if sides == 4:
+                self.boxOwners[player] &= ~(1 << b)
+                self.scores[player] -= 1
+                self.scores[0] += 1
+        self.movesMade.pop()
+        self.currentPlayer = player
+        return self.moves[e]
+
+    def block_line(self, move, player=3):
+        """
+        Draws a line for a player that isn't in the game, so it can't be played.
+        Used by the game variants to set up the board. No boxes are claimed.
+        Args:
+            move: 3-tuple(int)
+            player: int (3) - unused, lines don't have owners in a BitboardGame
+        """
+        e = self.edgeIndex[move]
+        self.edges |= 1 << e
+        self.hash ^= self.lineKeys[e]
+        for b in self.edgeBoxes[e]:
+            sides = self.boxSides[b]
+            self.sideCounts[sides] -= 1
+            self.sideCounts[sides+1] += 1
+            self.boxSides[b] = sides+1
+
+    def claim_boxes_for_edge(self, e):
+        """
+        Checks the boxes next to edge e for completion. Assigns boxes to player.
+        Args:
+            e: int
+        Returns:
+            int: bitmask of the boxes claimed. 0 if none were claimed.
+        """
+        claimed = 0
+        count = 0
+        for b in self.edgeBoxes[e]:
+            sides = self.boxSides[b]
+            self.sideCounts[sides] -= 1
+            self.sideCounts[sides+1] += 1
+            self.boxSides[b] = sides+1
+            if sides == 3:
+                claimed |= 1 << b
+                count += 1
+                self.hash ^= self.boxKeys[b][self.currentPlayer]
+        if claimed:
+            self.boxOwners[self.currentPlayer] |= claimed
+            self.scores[self.currentPlayer] += count
+            self.scores[0] -= count
+        return claimed
+
+    def is_legal_move(self, move):
+        """
+        Checks if a certain move is legal.
+        Args:
+            move: 3-tuple(int)
+        Returns:
+            bool
+        """
+        try:
+            e = self.edgeIndex[move]
+        except (KeyError, TypeError):
+            return False
+        return not self.edges >> e & 1
+
+    def get_all_legal_moves(self, generate=False):
+        """
+        Finds all legal moves that can be made, in the same order as Game.
+        Args:
+            generate(Bool): Unused, kept for compatibility with Game.
+        Returns:
+            List[3-tuple(int)]
+        """
+        # The bits of edges as a string, lowest edge first. The extra top bit
+        # keeps leading zeros, and is cut off with the "0b".
+        bits = bin(self.edges | 1 << len(self.moves))[:2:-1]
+        return [m for m, bit in zip(self.moves, bits) if bit == "0"]
+
+    def random_legal_move(self):
+        """
+        Picks a random legal move without building the list of all moves.
+        Returns:
+            3-tuple(int)
+        """
+        free = ~self.edges & self.fullMask
+        n = len(self.moves)
+        # For most of a game, a random edge is likely to be free.
+        for attempt in range(4):
+            e = random.randrange(n)
+            if free >> e & 1:
+                return self.moves[e]
+        # Otherwise pick which free edge to play, and find it by halving the
+        # range of edges it can be in.
+        k = random.randrange(bin(free).count("1"))
+        low = 0
+        while n > 1:
+            half = n >> 1
+            lowCount = bin(free >> low & (1 << half) - 1).count("1")
+            if k < lowCount:
+                n = half
+            else:
+                k -= lowCount
+                low += half
+                n -= half
+        return self.moves[low]
+
+    def is_finished(self):
+        """
+        Checks if the game is finished or if there are still moves to be made.
+        Returns:
+            bool
+        """
+        return self.edges == self.fullMask
+
+    def box_sides_completed(self, i, j):
+        """
+        Returns how many sides of the box at row i, column j are drawn.
+        Args:
+            i: int
+            j: int
+        Returns:
+            int
+        """
+        return self.boxSides[i*(self.width-1)+j]
+
+    def line_box_sides(self, move):
+        """
+        Returns how many sides are drawn on each box next to a line.
+        Args:
+            move: 3-tuple(int)
+        Returns:
+            List[int]
+        """
+        return [self.boxSides[b] for b in self.edgeBoxes[self.edgeIndex[move]]]
+
+    def get_box_owner(self, i, j):
+        """
+        Returns the owner of the box at row i, column j. 0 if unclaimed.
+        Args:
+            i: int
+            j: int
+        Returns:
+            int
+        """
+        bit = 1 << (i*(self.width-1)+j)
+        for player in range(1, self.maxPlayers+1):
+            if self.boxOwners[player] & bit:
+                return player
+        return 0
+
+    def get_scores(self):
+        """
+        returns the scores for all players that have any score.
+        Also returns number of unclaimed boxes.
+        Returns:
+            dict{int:int}
+        """
+        return self.scores.copy()
+
+    def check_score(self, player):
+        """
+        Get and return the score for one player.
+        Args:
+            player: int
+        Returns:
+            int
+        """
+        return self.scores[player]
+
+    def get_side_counts(self):
+        """
+        Returns how many boxes have 0, 1, 2, 3 and 4 sides drawn.
+        Returns:
+            List[int]
+        """
+        return self.sideCounts.copy()
+
+    def winner(self):
+        """
+        If the game is finished, find the winner.
+        """
+        if self.is_finished():
+            scores = self.scores
+            if scores[1] == scores[2]:
+                return 0
+            elif scores[1] > scores[2]:
+                return 1
+            else:
+                return 2
+        return 0
+
+    def save_statistics(self, filename, mode="a+"):
+        """
+        Saves the game to a results file in the same format as Game.
+        Args:
+            filename: str
+            mode: str
+        """
+        if mode not in ["a", "w", "a+", "w+"]:
+            mode = "a+"
+        try:
+            with open(filename, mode) as outfile:
+                outfile.write(self.get_statistics_string())
+        except Exception as e:
+            print("Saving to results file {} failed.".format(filename))
+
+    def get_statistics_string(self):
+        """
+        The statistics that save_statistics writes for the game, the same as
+        Game.get_statistics_string.
+        Returns:
+            str: size of board, all moves made and final score, one per line
+        """
+        scores = self.get_scores()
+        lines = ["{}x{}".format(self.width, self.height)]
+        lines += [str(line) for line in self.movesMade]
+        lines.append("{}, {}".format(scores[1], scores[2]))
+        return "\n".join(lines) + "\n"
+
+    def print_grid(self):
+        """
+        Prints an ascii representation of the board, in the same style as Game.
+        """
+        for i in range(self.height):
+            for j in range(self.width):
+                if j != self.width-1:
+                    print("*", end="")
+                    if not self.is_legal_move((0, i, j)):
+                        print("---", end="")
+                    else:
+                        print("- -", end="")
+                else:
+                    print("*")
+            if i != self.height-1:
+                for j in range(self.width):
+                    if not self.is_legal_move((1, j, i)):
+                        print("|", end="")
+                    else:
+                        print("¦", end="")
+                    if j != self.width-1:
+                        owner = self.get_box_owner(i, j)
+                        print(" {} ".format(owner if owner else " "), end="")
+                    else:
+                        print("")
+
+    def __eq__(self, other):
+        """
+        Games are equal if they have the same dimensions, the same lines drawn,
+        the same box owners and it is the same players turn. A Game can be
+        compared too, through the methods both engines have.
+        """
+        if not isinstance(other, (BitboardGame, Game)):
+            return NotImplemented
+        if (self.hash != other.hash
+                or self.width != other.width
+                or self.height != other.height
+                or self.currentPlayer != other.currentPlayer):
+            return False
+        if isinstance(other, BitboardGame):
+            return self.edges == other.edges and self.boxOwners == other.boxOwners
+        for e, move in enumerate(self.moves):
+            if (self.edges >> e & 1) == other.is_legal_move(move):
+                return False
+        for i in range(self.height-1):
+            for j in range(self.width-1):
+                if self.get_box_owner(i, j) != other.get_box_owner(i, j):
+                    return False
+        return True
+
+    def __hash__(self):
+        """
+        Builtin hash method. Returns the Zobrist hash of the position.
+        """
+        return self.hash
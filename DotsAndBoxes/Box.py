@@ -17,6 +17,8 @@ class Box:
         self.bottom = bottom
         self.left = left
         self.right = right
+        # Number of drawn sides. Kept up to date by Game as lines are drawn.
+        self.sides = sum([bool(x) for x in self.edges])
 
     def sides_completed(self):
         """
@@ -24,7 +26,7 @@ class Box:
         Returns:
             int
         """
-        return sum([bool(x) for x in self.edges])
+        return self.sides
 
     def check_completed(self, player):
         """
@@ -44,6 +46,13 @@ class Box:
                 return True
         return False
 
+    def reset(self):
+        """
+        Returns the box to unclaimed. Used to take back the move that completed it.
+        """
+        self.owner = 0
+        self.completed = False
+
     def __str__(self):
         """
         String representation for Box. If there is no owner, return " ". Otherwise,
@@ -0,0 +1,291 @@
+## sources
+## Berlekamp, The Dots and Boxes Game: Sophisticated Child's Play
+## https://en.wikipedia.org/wiki/Dots_and_Boxes#Strategy
+
+from functools import lru_cache
+
+class Component:
+    """
+    A chain or loop of unclaimed boxes, joined by the lines not yet drawn.
+    Boxes are stored in order along the chain or around the loop.
+    """
+    def __init__(self, boxes, isLoop, openEnds):
+        """
+        Args:
+            boxes(List[Tuple(int)]): (row, column) of each box, in order
+            isLoop(bool): True if the boxes join up in a circle
+            openEnds(int): Number of boxes with three sides drawn, which can be
+                taken straight away. 0 for a component no one has opened yet.
+        """
+        self.boxes = boxes
+        self.isLoop = isLoop
+        self.openEnds = openEnds
+
+    def __len__(self):
+        return len(self.boxes)
+
+def box_lines(i, j):
+    """
+    Returns the four lines of the box at row i, column j.
+    Args:
+        i: int
+        j: int
+    Returns:
+        List[3-tuple(int)]: lines in the order [top, bottom, left, right]
+    """
+    return [(0, i, j), (0, i+1, j), (1, j, i), (1, j+1, i)]
+
+def line_boxes(game, move):
+    """
+    Returns the (row, column) of the boxes a line is a side of.
+    Args:
+        game(Game): Game the line is in
+        move: 3-tuple(int)
+    Returns:
+        List[Tuple(int)]
+    """
+    o, i, j = move
+    boxes = []
+    if o == 0:
+        if i > 0:
+            boxes.append((i-1, j))
+        if i < game.height-1:
+            boxes.append((i, j))
+    else:
+        if i > 0:
+            boxes.append((j, i-1))
+        if i < game.width-1:
+            boxes.append((j, i))
+    return boxes
+
+def get_components(game):
+    """
+    Splits the unclaimed boxes of a game into chains and loops.
+    This only works once every unclaimed box has at least two sides drawn,
+    when there are no safe moves left and every move gives away boxes.
+    Args:
+        game(Game): Game to look at
+    Returns:
+        List[Component], or None if some box has fewer than two sides drawn.
+    """
+    # For every unclaimed box, find the lines that are left and the box on the
+    # other side of each line. None is used for the edge of the board.
+    links = {}
+    for i in range(game.height-1):
+        for j in range(game.width-1):
+            sides = game.box_sides_completed(i, j)
+            if sides < 2:
+                return None
+            if sides == 4:
+                continue
+            links[(i, j)] = []
+            for line in box_lines(i, j):
+                if game.is_legal_move(line):
+                    other = [b for b in line_boxes(game, line) if b != (i, j)]
+                    links[(i, j)].append((line, other[0] if other else None))
+
+    components = []
+    seen = set()
+    # Start from the ends of chains first, so every chain is walked end to end.
+    # Whatever is left after that must be loops.
+    ends = [b for b in links if len(links[b]) == 1 or any(o is None for l, o in links[b])]
+    others = [b for b in links if b not in ends]
+    for start in ends + others:
+        if start in seen:
+            continue
+        boxes = [start]
+        seen.add(start)
+        current = start
+        while True:
+            nextBoxes = [o for l, o in links[current] if o is not None and o not in seen]
+            if not nextBoxes:
+                break
+            current = nextBoxes[0]
+            boxes.append(current)
+            seen.add(current)
+        isLoop = start in others
+        openEnds = len([b for b in boxes if len(links[b]) == 1])
+        components.append(Component(boxes, isLoop, openEnds))
+    return components
+
+@lru_cache(maxsize=None)
+def solve(chains, loops):
+    """
+    Works out the best net score for the player who has to open one of a set
+    of chains and loops, when every move gives boxes away.
+    The player who takes an opened chain of 3 or more can take all of it, or
+    take all but 2 and leave them (a double-dealing move), so the opener has
+    to move next as well. For a loop, all but 4 are taken instead.
+    Args:
+        chains(Tuple(int)): sorted lengths of the closed chains
+        loops(Tuple(int)): sorted lengths of the closed loops
+    Returns:
+        int: boxes won minus boxes lost by the player to move
+    """
+    if not chains and not loops:
+        return 0
+    best = None
+    for k in set(chains):
+        rest = list(chains)
+        rest.remove(k)
+        value = open_value(k, False, solve(tuple(rest), loops))
+        if best is None or value > best:
+            best = value
+    for k in set(loops):
+        rest = list(loops)
+        rest.remove(k)
+        value = open_value(k, True, solve(chains, tuple(rest)))
+        if best is None or value > best:
+            best = value
+    return best
+
+def open_value(length, isLoop, restValue):
+    """
+    Net score for the player who opens one chain or loop. The other player
+    picks whichever of taking everything or double-dealing is better for them.
+    Args:
+        length(int): number of boxes in the chain or loop
+        isLoop(bool): True for a loop
+        restValue(int): solve() of everything else
+    Returns:
+        int
+    """
+    takeAll = -length - restValue
+    if isLoop:
+        return min(takeAll, 8 - length + restValue)
+    # Chains of 2 are opened in the middle, so they can't be double-dealt.
+    if length <= 2:
+        return takeAll
+    return min(takeAll, 4 - length + restValue)
+
+def split(components):
+    """
+    Splits components into opened components and the lengths of the closed
+    chains and loops.
+    Returns:
+        Tuple(List[Component], Tuple(int), Tuple(int))
+    """
+    opened = [c for c in components if c.openEnds > 0]
+    chains = tuple(sorted(len(c) for c in components if c.openEnds == 0 and not c.isLoop))
+    loops = tuple(sorted(len(c) for c in components if c.openEnds == 0 and c.isLoop))
+    return opened, chains, loops
+
+def decline_size(component):
+    """
+    Number of boxes the player taking an opened component can leave for the
+    other player at the end. 0 if they have to take them all.
+    """
+    if component.openEnds == 1 and len(component) >= 2:
+        return 2
+    if component.openEnds == 2 and len(component) >= 4:
+        return 4
+    return 0
+
+def plan_captures(opened, restValue):
+    """
+    Decides how to take the opened components. Every box is taken, except that
+    the last component taken can be left short to make the other player open
+    the next chain or loop.
+    Args:
+        opened(List[Component]): components that can be taken
+        restValue(int): solve() of the closed chains and loops
+    Returns:
+        Tuple(int, Component): net score for the player to move, and the
+            component to leave short, or None to take everything.
+    """
+    total = sum(len(c) for c in opened)
+    bestValue = total + restValue
+    bestDecline = None
+    for c in opened:
+        d = decline_size(c)
+        if d > 0:
+            value = total - 2*d - restValue
+            if value > bestValue:
+                bestValue = value
+                bestDecline = c
+    return bestValue, bestDecline
+
+def endgame_value(game):
+    """
+    Works out the exact net score of the rest of the game for the player to
+    move, assuming perfect play from here.
+    Args:
+        game(Game): Game to solve
+    Returns:
+        int: boxes won minus boxes lost from now on by game.currentPlayer,
+            or None if the position still has safe moves and can't be solved.
+    """
+    components = get_components(game)
+    if components is None:
+        return None
+    opened, chains, loops = split(components)
+    restValue = solve(chains, loops)
+    if not opened:
+        return restValue
+    return plan_captures(opened, restValue)[0]
+
+def capture_move(game, component):
+    """
+    Returns a move that takes a box at an open end of a component.
+    """
+    for box in component.boxes:
+        lines = [l for l in box_lines(*box) if game.is_legal_move(l)]
+        if len(lines) == 1:
+            return lines[0]
+
+def shared_line(a, b):
+    """
+    Returns the line between two neighbouring boxes.
+    """
+    return [l for l in box_lines(*a) if l in box_lines(*b)][0]
+
+def endgame_move(game):
+    """
+    Finds the best move once there are no safe moves left in the game.
+    Args:
+        game(Game): Game to move in
+    Returns:
+        3-tuple(int): best move, or None if the position can't be solved.
+    """
+    components = get_components(game)
+    if not components:
+        return None
+    opened, chains, loops = split(components)
+    if opened:
+        value, decline = plan_captures(opened, solve(chains, loops))
+        others = [c for c in opened if c is not decline]
+        if others:
+            return capture_move(game, others[0])
+        # Only the component to leave short is left. Take it down to the boxes
+        # being left, then draw the line that leaves them.
+        if len(decline) > decline_size(decline):
+            return capture_move(game, decline)
+        boxes = decline.boxes
+        if boxes[0] not in [b for b in boxes if len([l for l in box_lines(*b) if game.is_legal_move(l)]) == 1]:
+            boxes = boxes[::-1]
+        if len(boxes) == 2:
+            # Open end, then a box with a line to the edge. Draw that line.
+            return [l for l in box_lines(*boxes[1]) if game.is_legal_move(l) and l != shared_line(boxes[0], boxes[1])][0]
+        # Four boxes with both ends open. Draw the line in the middle.
+        return shared_line(boxes[1], boxes[2])
+
+    # Nothing can be taken, so open the chain or loop that loses the least.
+    best = None
+    for c in components:
+        if c.isLoop:
+            rest = list(loops)
+            rest.remove(len(c))
+            value = open_value(len(c), True, solve(chains, tuple(rest)))
+        else:
+            rest = list(chains)
+            rest.remove(len(c))
+            value = open_value(len(c), False, solve(tuple(rest), loops))
+        if best is None or value > best[0]:
+            best = (value, c)
+    c = best[1]
+    if c.isLoop or len(c) == 2:
+        # Open loops anywhere, and chains of 2 in the middle.
+        return shared_line(c.boxes[0], c.boxes[1])
+    # Open other chains at the end.
+    return [l for l in box_lines(*c.boxes[0]) if game.is_legal_move(l)
+        and (len(c) == 1 or l != shared_line(c.boxes[0], c.boxes[1]))][0]
@@ -1,9 +1,13 @@
 try:
     from Box import Box
     from Line import Line
+    from LegalMoveSet import LegalMoveSet
+    import Zobrist
 except ModuleNotFoundError:
     from DotsAndBoxes.Box import Box
     from DotsAndBoxes.Line import Line
+    from DotsAndBoxes.LegalMoveSet import LegalMoveSet
+    import DotsAndBoxes.Zobrist as Zobrist
 
 class Game:
     def __init__(self, width, height, maxPlayers=2, curPlayer=1, legalMoves=False, copy_grid=None, copy_boxes=None, movesMade=None):
@@ -15,16 +19,20 @@ class Game:
             height: int
             maxPlayers: int (2)
             curPlayer: int (1)
-            legalMoves: List(3-Tuple(int))
+            legalMoves: LegalMoveSet or List(3-Tuple(int))
             copy_grid: List[][][Line]
             copy_boxes: List[][Box]
         """
+        if isinstance(legalMoves, list):
+            legalMoves = LegalMoveSet(legalMoves)
         self.width = width
         self.height = height
         self.currentPlayer = curPlayer
         self.maxPlayers = maxPlayers
         self.legalMoves = legalMoves
         self.movesMade = movesMade
+        # Moves that can be taken back with undo_move. A copy starts with an empty stack.
+        self.moveStack = []
         if copy_grid is None and copy_boxes is None:
             self.build_game()
         else:
@@ -50,6 +58,9 @@ class Game:
         # Build a list of all legal moves that can be made
         self.get_all_legal_moves()
         self.movesMade = []
+        self.link_boxes()
+        self.count_boxes()
+        self.setup_hash()
 
     def build_from_copy(self, copy_grid, copy_boxes):
         """
@@ -71,6 +82,60 @@ class Game:
             for j in range(self.width-1):
                 # Boxes are constructed with lines in the order [top, bottom, left, right]
                 self.boxes[i][j] = Box(self.grid[0][i][j], self.grid[0][i+1][j], self.grid[1][j][i], self.grid[1][j+1][i], copy_boxes[i][j].owner)
+        self.link_boxes()
+        self.count_boxes()
+        self.setup_hash()
+
+    def link_boxes(self):
+        """
+        Builds a lookup from each line to the boxes it is a side of, so that
+        take_turn doesn't need to work them out every move.
+        """
+        self.lineBoxes = {}
+        for i in range(self.height-1):
+            for j in range(self.width-1):
+                # Boxes have lines in the order [top, bottom, left, right]
+                for move in [(0, i, j), (0, i+1, j), (1, j, i), (1, j+1, i)]:
+                    self.lineBoxes.setdefault(move, []).append(self.boxes[i][j])
+
+    def count_boxes(self):
+        """
+        Counts the score of each player and how many boxes have each number of
+        sides drawn. take_turn keeps these counts up to date afterwards, so
+        scores and evaluations don't need to look at every box.
+        """
+        # scores[0] is the number of unclaimed boxes.
+        self.scores = {x: 0 for x in range(self.maxPlayers+1)}
+        # sideCounts[k] is the number of boxes with k sides drawn.
+        self.sideCounts = [0, 0, 0, 0, 0]
+        for row in self.boxes:
+            for box in row:
+                self.scores[box.owner] += 1
+                self.sideCounts[box.sides] += 1
+
+    def setup_hash(self):
+        """
+        Works out the Zobrist hash of the whole position. take_turn keeps the
+        hash up to date afterwards by XORing in only the keys that change.
+        Each box is given its own keys so claimed boxes can be hashed quickly.
+        """
+        self.zobrist = Zobrist.get_table(self.width, self.height, self.maxPlayers)
+        self.hash = self.zobrist.players[self.currentPlayer]
+        o = 0
+        for i in range(self.height):
+            for j in range(self.width-1):
+                if self.grid[o][i][j]:
+                    self.hash ^= self.zobrist.lines[(o, i, j)]
+        o = 1
+        for i in range(self.width):
+            for j in range(self.height-1):
+                if self.grid[o][i][j]:
+                    self.hash ^= self.zobrist.lines[(o, i, j)]
+        for i in range(self.height-1):
+            for j in range(self.width-1):
+                box = self.boxes[i][j]
+                box.zobristKeys = self.zobrist.boxes[i][j]
+                self.hash ^= box.zobristKeys[box.owner]
 
     def get_copy(self):
         """
@@ -107,22 +172,99 @@ class Game:
             bool
         """
         if self.is_legal_move(move):
-            move_results = []
             # Attempt to claim the line.
             self.grid[move[0]][move[1]][move[2]].draw(self.currentPlayer)
             # Take the move made out of the list of legal moves.
-            self.legalMoves.remove(move)
+            index = self.legalMoves.remove(move)
             self.movesMade.append(move)
-            #self.movesMade.append("{} - {}".format(self.currentPlayer, move))
             #print("Made move {}".format(move))
+            self.count_sides_for_line(move, 1)
             # Check the boxes associated with the line claimed.
-            if not self.check_boxes_for_line(move):
+            claimed = self.claim_boxes_for_line(move)
+            self.scores[self.currentPlayer] += len(claimed)
+            self.scores[0] -= len(claimed)
+            # Remember enough to take the move back again with undo_move.
+            self.moveStack.append((move, self.currentPlayer, index, claimed, self.hash))
+            # Update the hash for the new line and boxes.
+            self.hash ^= self.zobrist.lines[move]
+            for box in claimed:
+                self.hash ^= box.zobristKeys[self.currentPlayer]
+            if not claimed:
                 # If no box has been claimed this round, increment the player counter
                 # Otherwise, it is still this player's turn.
+                self.hash ^= self.zobrist.players[self.currentPlayer]
                 self.increment_player()
+                self.hash ^= self.zobrist.players[self.currentPlayer]
         else:
             print("Illegal move {}".format(move))
 
+    def undo_move(self):
+        """
+        Takes back the last move made with take_turn. Restores the line, any
+        boxes it claimed, the legal moves, the moves made and the current player.
+        Lets the search players explore the game tree in place instead of
+        copying the game at every node.
+        Returns:
+            3-tuple(int): the move that was taken back.
+        """
+        move, player, index, claimed, self.hash = self.moveStack.pop()
+        self.grid[move[0]][move[1]][move[2]].erase()
+        for box in claimed:
+            box.reset()
+        self.scores[player] -= len(claimed)
+        self.scores[0] += len(claimed)
+        self.count_sides_for_line(move, -1)
+        self.legalMoves.restore(move, index)
+        self.movesMade.pop()
+        self.currentPlayer = player
+        return move
+
+    def get_boxes_for_line(self, move):
+        """
+        Takes an index for a Line and returns the boxes associated with that line.
+        Args:
+            move: 3-tuple(int)
+        Returns:
+            List[Box]: 1 box for lines on the edge of the board, otherwise 2.
+        """
+        return self.lineBoxes[move]
+
+    def count_sides_for_line(self, move, step):
+        """
+        Updates the side counts of the boxes next to a line that has just been
+        drawn (step 1) or erased (step -1).
+        Args:
+            move: 3-tuple(int)
+            step: int
+        """
+        for box in self.get_boxes_for_line(move):
+            self.sideCounts[box.sides] -= 1
+            box.sides += step
+            self.sideCounts[box.sides] += 1
+
+    def block_line(self, move, player=3):
+        """
+        Draws a line for a player that isn't in the game, so it can't be played.
+        Used by the game variants to set up the board. No boxes are claimed.
+        Args:
+            move: 3-tuple(int)
+            player: int (3)
+        """
+        self.grid[move[0]][move[1]][move[2]].draw(player)
+        self.legalMoves.remove(move)
+        self.count_sides_for_line(move, 1)
+        self.hash ^= self.zobrist.lines[move]
+
+    def claim_boxes_for_line(self, move):
+        """
+        Takes an index for a Line and checks the boxes associated with that line
+        for completion. Assigns completed boxes to the current player.
+        Args:
+            move: 3-tuple(int)
+        Returns:
+            List[Box]: boxes claimed by this line. Empty if none were claimed.
+        """
+        return [box for box in self.get_boxes_for_line(move) if box.check_completed(self.currentPlayer)]
 
     def check_boxes_for_line(self, move):
         """
@@ -133,29 +275,7 @@ class Game:
         Returns:
             bool: True if box is claimed, False if not.
         """
-        # Make a list for the results as there could be 1 or 2.
-        results = []
-        if move[0] == 0:
-            # If the Line is on an edge ([1 0 0], [0 0 0], etc) then it only has one
-            # associated box. Check that box.
-            if move[1] == 0:
-                results.append(self.boxes[move[1]][move[2]].check_completed(self.currentPlayer))
-            elif move[1] == self.height-1:
-                results.append(self.boxes[move[1]-1][move[2]].check_completed(self.currentPlayer))
-            # If the Line is not on the edge, it connects to two boxes. Check both.
-            else:
-                results.append(self.boxes[move[1]-1][move[2]].check_completed(self.currentPlayer))
-                results.append(self.boxes[move[1]][move[2]].check_completed(self.currentPlayer))
-        else:
-            if move[1] == 0:
-                results.append(self.boxes[move[2]][move[1]].check_completed(self.currentPlayer))
-            elif move[1] == self.width-1:
-                results.append(self.boxes[move[2]][move[1]-1].check_completed(self.currentPlayer))
-            else:
-                results.append(self.boxes[move[2]][move[1]-1].check_completed(self.currentPlayer))
-                results.append(self.boxes[move[2]][move[1]].check_completed(self.currentPlayer))
-        # If any boxes were claimed, any(results) will return true.
-        return any(results)
+        return len(self.claim_boxes_for_line(move)) > 0
 
 
     def is_legal_move(self, move):
@@ -170,7 +290,8 @@ class Game:
 
     def get_all_legal_moves(self, generate=False):
         """
-        Finds all legal moves that can be made. Returns these as a list.
+        Finds all legal moves that can be made. Returns these as a list in
+        board order, the same order as BitboardGame.
         Args:
             generate(Bool): If True, force the game to make a new list of legal
                 moves
@@ -182,18 +303,26 @@ class Game:
         # Once this list has been created, it can be stored and moves that are made
         # can be removed from the list, preventing this costly move generation.
         if self.legalMoves is False or generate:
-            self.legalMoves = []
+            self.legalMoves = LegalMoveSet()
             o = 0
             for i in range(self.height):
                 for j in range(self.width-1):
                     if not self.grid[o][i][j]:
-                        self.legalMoves.append((o, i, j))
+                        self.legalMoves.add((o, i, j))
             o = 1
             for i in range(self.width):
                 for j in range(self.height-1):
                     if not self.grid[o][i][j]:
-                        self.legalMoves.append((o, i, j))
-        return self.legalMoves.copy()
+                        self.legalMoves.add((o, i, j))
+        return self.legalMoves.ordered()
+
+    def random_legal_move(self):
+        """
+        Picks a random legal move without building the list of all moves.
+        Returns:
+            3-tuple(int)
+        """
+        return self.legalMoves.choice()
 
     def is_finished(self):
         """
@@ -203,6 +332,38 @@ class Game:
         """
         return len(self.legalMoves) == 0
 
+    def box_sides_completed(self, i, j):
+        """
+        Returns how many sides of the box at row i, column j are drawn.
+        Args:
+            i: int
+            j: int
+        Returns:
+            int
+        """
+        return self.boxes[i][j].sides_completed()
+
+    def line_box_sides(self, move):
+        """
+        Returns how many sides are drawn on each box next to a line.
+        Args:
+            move: 3-tuple(int)
+        Returns:
+            List[int]
+        """
+        return [box.sides for box in self.get_boxes_for_line(move)]
+
+    def get_box_owner(self, i, j):
+        """
+        Returns the owner of the box at row i, column j. 0 if unclaimed.
+        Args:
+            i: int
+            j: int
+        Returns:
+            int
+        """
+        return self.boxes[i][j].owner
+
     def finish_game(self):
         """
         Function called when the game is finished. Declares a winner.
@@ -218,12 +379,7 @@ class Game:
         Returns:
             dict{int:int}
         """
-        scores = {0:0, 1:0, 2:0}
-        for i in range(self.height-1):
-            for j in range(self.width-1):
-                owner = self.boxes[i][j].owner
-                scores[owner] += 1
-        return scores
+        return self.scores.copy()
 
     def check_score(self, player):
         """
@@ -233,19 +389,22 @@ class Game:
         Returns:
             int
         """
-        score = 0
-        for i in range(self.height-1):
-            for j in range(self.width-1):
-                if self.boxes[i][j].owner == player:
-                    score += 1
-        return score
+        return self.scores[player]
+
+    def get_side_counts(self):
+        """
+        Returns how many boxes have 0, 1, 2, 3 and 4 sides drawn.
+        Returns:
+            List[int]
+        """
+        return self.sideCounts.copy()
 
     def winner(self):
         """
         If the game is finished, find the winner.
         """
         if self.is_finished():
-            scores = self.get_scores()
+            scores = self.scores
             if scores[1] == scores[2]:
                 return 0
             elif scores[1] > scores[2]:
@@ -268,19 +427,26 @@ class Game:
         """
         if mode not in ["a", "w", "a+", "w+"]:
             mode = "a+"
-        scores = self.get_scores()
-        scoresStr = "{}, {}".format(scores[1], scores[2])
-        gameStr = "{}x{}".format(self.width, self.height)
         try:
             with open(filename, mode) as outfile:
-                outfile.write(gameStr+"\n")
-                for line in self.movesMade:
-                    outfile.write(str(line)+"\n")
-                outfile.write(scoresStr+"\n")
+                outfile.write(self.get_statistics_string())
         except Exception as e:
             print("Saving to results file {} failed.".format(filename))
             #print(e)
 
+    def get_statistics_string(self):
+        """
+        The statistics that save_statistics writes for the game, so games can
+        be saved in batches.
+        Returns:
+            str: size of board, all moves made and final score, one per line
+        """
+        scores = self.get_scores()
+        lines = ["{}x{}".format(self.width, self.height)]
+        lines += [str(line) for line in self.movesMade]
+        lines.append("{}, {}".format(scores[1], scores[2]))
+        return "\n".join(lines) + "\n"
+
     def print_grid(self):
         """
         Prints an ascii representation of the board.
@@ -318,6 +484,10 @@ class Game:
         Games are equal if they have the same dimensions, all of the lines
         are owned by the same players and it is the same players turn.
         """
+        if not isinstance(other, Game):
+            # Lets a BitboardGame compare itself with this game.
+            return NotImplemented
+
         if self.width != other.width:
             return False
 
@@ -327,6 +497,11 @@ class Game:
         if self.currentPlayer != other.currentPlayer:
             return False
 
+        # Different hashes always mean different positions. Equal hashes are
+        # almost always the same position, but check the board to be sure.
+        if self.hash != other.hash:
+            return False
+
         o = 0
         for i in range(self.height):
             for j in range(self.width-1):
@@ -349,3 +524,10 @@ class Game:
 
 
         return True
+
+    def __hash__(self):
+        """
+        Builtin hash method so games can be used in sets and as dict keys.
+        Returns the Zobrist hash of the position.
+        """
+        return self.hash
@@ -1,9 +1,11 @@
 try:
     from Game import Game
+    from BitboardGame import BitboardGame
     from Box import Box
     from Line import Line
 except ModuleNotFoundError:
     from DotsAndBoxes.Game import Game
+    from DotsAndBoxes.BitboardGame import BitboardGame
     from DotsAndBoxes.Box import Box
     from DotsAndBoxes.Line import Line
 import random
@@ -46,8 +48,7 @@ class SwedishGame(Game):
             movesToMake.append((1,self.width-1,i))
         # now make those moves, as if we are player 3.
         for move in movesToMake:
-            self.grid[move[0]][move[1]][move[2]].draw(3)
-            self.legalMoves.remove(move)
+            self.block_line(move, 3)
 
 
 class RandomGame(Game):
@@ -75,5 +76,30 @@ class RandomGame(Game):
             movesToMake.append(legalMoves[i])
         # now make those moves, as if we are player 3.
         for move in movesToMake:
-            self.grid[move[0]][move[1]][move[2]].draw(3)
-            self.legalMoves.remove(move)
+            self.block_line(move, 3)
+
+
+class BitboardSwedishGame(BitboardGame):
+    """
+    The 'swedish' variant on a BitboardGame.
+    """
+    def __init__(self, width, height, maxPlayers=2, curPlayer=1, edges=0, boxOwners=None, movesMade=None):
+        super().__init__(width, height, maxPlayers, curPlayer, edges, boxOwners, movesMade)
+        if edges == 0 and boxOwners is None:
+            self.make_board_swedish()
+
+    # Setting up the board only uses block_line, which both engines have.
+    make_board_swedish = SwedishGame.make_board_swedish
+
+
+class BitboardRandomGame(BitboardGame):
+    """
+    The 'random' variant on a BitboardGame. With the same random seed, the
+    same lines are blocked as in a RandomGame.
+    """
+    def __init__(self, width, height, maxPlayers=2, curPlayer=1, edges=0, boxOwners=None, movesMade=None):
+        super().__init__(width, height, maxPlayers, curPlayer, edges, boxOwners, movesMade)
+        if edges == 0 and boxOwners is None:
+            self.make_board_random()
+
+    make_board_random = RandomGame.make_board_random
@@ -0,0 +1,322 @@
+try:
+    import MatchRunner
+    import PlayerFactory
+    import ReadStatistics
+except ModuleNotFoundError:
+    import DotsAndBoxes.MatchRunner as MatchRunner
+    import DotsAndBoxes.PlayerFactory as PlayerFactory
+    import DotsAndBoxes.ReadStatistics as ReadStatistics
+import argparse
+import itertools
+import math
+import os
+import re
+
+# Options tried for each player type in a league by default. Player types
+# that aren't listed only have one entrant.
+DEFAULT_VARIANTS = {
+    "Minimax Player": {"maxDepth": [2, 4]},
+    "Monte Carlo Player": {"c": [0.7, 1.4142]}
+}
+
+def make_entrants(timeLimits=(1,), variants=DEFAULT_VARIANTS):
+    """
+    Makes the player specs for a league, with every non-human player type
+    from PlayerFactory. Types in variants have an entrant for every time
+    limit and every combination of their options.
+    Args:
+        timeLimits(List[int/float]): time limits for the AI players
+        variants(dict): options to try for each player type, as
+            {playerType: {option: [values]}}
+    Returns:
+        List[str]: player specs, see MatchRunner.parse_player_spec
+    """
+    entrants = []
+    for playerType in PlayerFactory.PlayerFactory().playerTypes:
+        if playerType == "Human Player":
+            continue
+        if playerType not in variants:
+            entrants.append(playerType)
+            continue
+        options = variants[playerType]
+        keys = list(options)
+        for timeLimit in timeLimits:
+            for values in itertools.product(*(options[k] for k in keys)):
+                optionStr = ",".join("{}={}".format(k, v) for k, v in zip(["timeLimit"] + keys, (timeLimit,) + values))
+                entrants.append("{}:{}".format(playerType, optionStr))
+    return entrants
+
+def entrant_name(spec):
+    """
+    Short name for an entrant, for tables and results filenames, eg
+    "Monte-c1.4-timeLimit1" for "Monte Carlo Player:timeLimit=1,c=1.4".
+    Args:
+        spec(str): player spec
+    Returns:
+        str
+    """
+    playerType, options = MatchRunner.parse_player_spec(spec)
+    parts = [playerType.split()[0]] + ["{}{}".format(k, v) for k, v in sorted(options.items())]
+    # "_" splits the parts of a results filename.
+    return "-".join(parts).replace("_", "")
+
+class Ratings:
+    """
+    Bradley-Terry ratings for a set of players, on the Elo scale. Player i has
+    a strength p[i], and beats player j with probability p[i]/(p[i]+p[j]).
+    Strengths are fitted to the results by maximum likelihood, using the
+    MM algorithm, and refitted from the last fit every time results are
+    added, which only takes a few steps. A draw counts as half a win each.
+    Every pair of players starts with one draw between them, so players who
+    have won (or lost) every game still get a finite rating.
+    Confidence intervals come from the Fisher information of each player's
+    log strength, holding the other players fixed, then the delta method to
+    move them to the Elo scale.
+    """
+    def __init__(self, names):
+        """
+        Args:
+            names(List[str]): name of each player
+        """
+        self.names = list(names)
+        size = len(self.names)
+        # games[i][j] is the number of games between i and j, wins[i] is the
+        # total score of i.
+        self.games = [[0 if i == j else 1 for j in range(size)] for i in range(size)]
+        self.wins = [(size-1)/2]*size
+        self.strength = [1.0]*size
+
+    def addGame(self, first, second, score):
+        """
+        Adds a game result, without refitting.
+        Args:
+            first(int): index of one player
+            second(int): index of the other player
+            score(float): 1 if first won, 0 if second won, 0.5 for a draw
+        """
+        self.games[first][second] += 1
+        self.games[second][first] += 1
+        self.wins[first] += score
+        self.wins[second] += 1 - score
+
+    def fit(self, iterations=1000, tolerance=1e-9):
+        """
+        Fits the strengths to the results so far.
+        Args:
+            iterations(int): most MM steps to take
+            tolerance(float): stop once no strength changes by more than this
+        """
+        size = len(self.names)
+        p = self.strength
+        for step in range(iterations):
+            new = []
+            for i in range(size):
+                total = sum(self.games[i][j]/(p[i]+p[j]) for j in range(size) if j != i)
+                new.append(self.wins[i]/total if total > 0 else p[i])
+            # Strengths are only known relative to each other, so keep their
+            # geometric mean at 1.
+            scale = math.exp(sum(math.log(x) for x in new)/size)
+            new = [x/scale for x in new]
+            change = max(abs(a-b) for a, b in zip(new, p))
+            p = new
+            if change < tolerance:
+                break
+        self.strength = p
+
+    def rating(self, i):
+        """
+        Elo rating of a player, with the average player at 1500.
+        Args:
+            i(int): index of the player
+        Returns:
+            float
+        """
+        return 1500 + 400*math.log10(self.strength[i])
+
+    def interval(self, i, z=1.96):
+        """
+        Half the width of a player's confidence interval, in Elo points.
+        Args:
+            i(int): index of the player
+            z(float): number of standard errors, 1.96 for 95%
+        Returns:
+            float
+        """
+        p = self.strength
+        information = sum(self.games[i][j]*p[i]*p[j]/(p[i]+p[j])**2 for j in range(len(p)) if j != i)
+        # d(Elo)/d(log strength) is 400/ln(10).
+        return z*400/math.log(10)/math.sqrt(information)
+
+    def played(self, i):
+        """
+        Number of real games a player has played, not counting the starting draws.
+        Args:
+            i(int): index of the player
+        Returns:
+            int
+        """
+        return sum(self.games[i]) - (len(self.names)-1)
+
+    def table(self):
+        """
+        The players from best to worst.
+        Returns:
+            List[Tuple(str, float, float, int)]: name, rating, half width of
+                the 95% interval and games played
+        """
+        rows = [(self.names[i], self.rating(i), self.interval(i), self.played(i)) for i in range(len(self.names))]
+        return sorted(rows, key=lambda row: -row[1])
+
+    def __str__(self):
+        lines = ["{:<4}{:<40}{:>8}{:>8}{:>7}".format("", "Player", "Elo", "+/-", "Games")]
+        for rank, (name, rating, interval, games) in enumerate(self.table()):
+            lines.append("{:<4}{:<40}{:>8.0f}{:>8.0f}{:>7}".format(rank+1, name, rating, interval, games))
+        return "\n".join(lines)
+
+class League:
+    """
+    Round robin league between a set of entrants on one board size. Every
+    pair of entrants plays the same number of games with each of them going
+    first. Games are played in parallel by MatchRunner.run_matches, and the
+    ratings are refitted as each batch of games finishes.
+    Each pairing is saved to its own results file, named after the
+    entrants, so a league can be resumed and its files read by ReadStatistics.
+    """
+    def __init__(self, entrants, width=3, height=3, variant="american", resultsDir="Results"):
+        """
+        Args:
+            entrants(List[str]): player specs, see MatchRunner.parse_player_spec
+            width(int): board width
+            height(int): board height
+            variant(str): "american", "swedish" or "random"
+            resultsDir(str): folder to make the league's results folder in
+        """
+        self.entrants = list(entrants)
+        self.names = [entrant_name(spec) for spec in self.entrants]
+        self.width = width
+        self.height = height
+        self.variant = variant
+        self.resultsDir = os.path.join(resultsDir, "league-{}-{}x{}".format(variant, width, height))
+        self.ratings = Ratings(self.names)
+
+    def pairings(self):
+        """
+        Every ordered pair of entrants, so each plays both first and second.
+        Returns:
+            List[Tuple(int, int)]: index of player one and player two
+        """
+        return [(a, b) for a in range(len(self.entrants)) for b in range(len(self.entrants)) if a != b]
+
+    def runner(self, a, b):
+        """
+        MatchRunner for a pairing.
+        Args:
+            a(int): index of player one
+            b(int): index of player two
+        Returns:
+            MatchRunner.MatchRunner
+        """
+        return MatchRunner.MatchRunner(self.entrants[a], self.entrants[b], self.width, self.height,
+            self.variant, self.resultsDir, [self.names[a], self.names[b]])
+
+    def addResult(self, a, b, winner):
+        """
+        Adds a game to the ratings.
+        Args:
+            a(int): index of player one
+            b(int): index of player two
+            winner(int): 1 or 2 for the winning player, 0 for a draw
+        """
+        self.ratings.addGame(a, b, {1: 1.0, 2: 0.0, 0: 0.5}[winner])
+
+    def loadResults(self, filename, a, b):
+        """
+        Adds the games already in a results file to the ratings.
+        Args:
+            filename(str): results file of the pairing
+            a(int): index of player one
+            b(int): index of player two
+        Returns:
+            int: number of games added
+        """
+        games = ReadStatistics.get_games(filename)[:-1]
+        for game in games:
+            scores = [int(s) for s in re.findall(r"\d+", game[-1])]
+            if scores[0] > scores[1]:
+                self.addResult(a, b, 1)
+            elif scores[1] > scores[0]:
+                self.addResult(a, b, 2)
+            else:
+                self.addResult(a, b, 0)
+        return len(games)
+
+    def run(self, gamesPerPairing=10, workers=1, seed=None, resume=False, verbose=True):
+        """
+        Plays the league. Each ordered pairing plays gamesPerPairing games,
+        so each pair of entrants plays twice that.
+        Args:
+            gamesPerPairing(int): games for each entrant going first against each other
+            workers(int): number of processes to play games in
+            seed(int): seed for the games. By default, the seed saved in the
+                results files, or a random one for new files.
+            resume(bool): carry on from the games already in the results files
+            verbose(bool): print progress, and the table at the end
+        Returns:
+            Ratings: the final ratings
+        """
+        if not os.path.exists(self.resultsDir):
+            os.makedirs(self.resultsDir)
+        jobs = []
+        pairs = self.pairings()
+        for a, b in pairs:
+            runner = self.runner(a, b)
+            filename = runner.filename()
+            if resume:
+                first = MatchRunner.completed_games(filename)
+                self.loadResults(filename, a, b)
+            else:
+                open(filename, "w+").close()
+                first = 0
+            jobs.append((runner, filename, first, max(0, gamesPerPairing - first)))
+        self.ratings.fit()
+
+        def finished(j, games):
+            a, b = pairs[j]
+            for text, winner in games:
+                self.addResult(a, b, winner)
+            self.ratings.fit()
+
+        MatchRunner.run_matches(jobs, workers, seed, verbose=verbose, callback=finished)
+        if verbose:
+            print("League on {} {}x{}:".format(self.variant, self.width, self.height))
+            print(self.ratings)
+        return self.ratings
+
+def main(args=None):
+    """
+    Command line entry point for leagues. A league is played on each board
+    size, and the best entrant for each is printed at the end.
+    >python DotsAndBoxes league --sizes 3x3 4x4 --games 20 --workers 4
+    Args:
+        args(List[str]): command line arguments, sys.argv[2:] by default
+    """
+    parser = argparse.ArgumentParser(prog="DotsAndBoxes league", description="Rate every AI player type against each other.")
+    parser.add_argument("--sizes", nargs="+", default=["3x3"], help="board sizes as WIDTHxHEIGHT")
+    parser.add_argument("--variant", default="american", choices=list(MatchRunner.VARIANTS))
+    parser.add_argument("--games", type=int, default=10, help="games for each entrant going first against each other")
+    parser.add_argument("--times", type=float, nargs="+", default=[1], help="time limits for the AI players")
+    parser.add_argument("--entrants", nargs="+", default=None, help="player specs. Every player type and variant by default")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="number of processes to play games in")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--resume", action="store_true", help="carry on from the games already in the results files")
+    options = parser.parse_args(args)
+    entrants = options.entrants or make_entrants(options.times)
+    best = []
+    for size in options.sizes:
+        width, height = (int(x) for x in size.lower().split("x"))
+        league = League(entrants, width, height, options.variant)
+        ratings = league.run(options.games, options.workers, options.seed, options.resume)
+        best.append((size, ratings.table()[0]))
+    print()
+    for size, (name, rating, interval, games) in best:
+        print("Best on {}: {} ({:.0f} +/- {:.0f})".format(size, name, rating, interval))
@@ -0,0 +1,111 @@
+import random
+
+class LegalMoveSet:
+    """
+    Set of legal moves with constant time membership, removal and random choice.
+    Moves are kept packed together in a list, with a dict mapping each move to
+    its position in that list. Removing a move swaps the last move into its
+    place, so the packed order changes as moves are made. Use ordered() when
+    the moves are needed in board order.
+    """
+    def __init__(self, moves=()):
+        """
+        Initialise the set with a list of moves.
+        Args:
+            moves: List[3-tuple(int)]
+        """
+        self.moves = list(moves)
+        self.positions = {m: i for i, m in enumerate(self.moves)}
+
+    def add(self, move):
+        """
+        Adds a move to the set.
+        Args:
+            move: 3-tuple(int)
+        """
+        if move not in self.positions:
+            self.positions[move] = len(self.moves)
+            self.moves.append(move)
+
+    def remove(self, move):
+        """
+        Removes a move from the set by swapping the last move into its place.
+        Args:
+            move: 3-tuple(int)
+        Returns:
+            int: position the move was removed from. Pass this to restore.
+        """
+        position = self.positions.pop(move)
+        last = self.moves.pop()
+        if last != move:
+            self.moves[position] = last
+            self.positions[last] = position
+        return position
+
+    def restore(self, move, position):
+        """
+        Puts a removed move back exactly where it was. This is the inverse of
+        remove, as long as moves are restored in the reverse order they were
+        removed.
+        Args:
+            move: 3-tuple(int)
+            position: int - value returned by remove
+        """
+        if position == len(self.moves):
+            self.moves.append(move)
+        else:
+            last = self.moves[position]
+            self.positions[last] = len(self.moves)
+            self.moves.append(last)
+            self.moves[position] = move
+        self.positions[move] = position
+
+    def choice(self):
+        """
+        Picks a random legal move.
+        Returns:
+            3-tuple(int)
+        """
+        return random.choice(self.moves)
+
+    def ordered(self):
+        """
+        Returns a new list of the moves in board order. All horizontal lines
+        come before the vertical lines, each in grid order, which is the same
+        as sorting the move tuples.
+        Returns:
+            List[3-tuple(int)]
+        """
+        return sorted(self.moves)
+
+    def copy(self):
+        """
+        Returns a copy of the set with the same packed order.
+        Returns:
+            LegalMoveSet
+        """
+        copySet = LegalMoveSet.__new__(LegalMoveSet)
+        copySet.moves = self.moves.copy()
+        copySet.positions = self.positions.copy()
+        return copySet
+
+    def __contains__(self, move):
+        try:
+            return move in self.positions
+        except TypeError:
+            # Unhashable input, such as a list, can never be a legal move.
+            return False
+
+    def __len__(self):
+        return len(self.moves)
+
+    def __iter__(self):
+        return iter(self.moves)
+
+    def __eq__(self, other):
+        """
+        Move sets are equal if they contain the same moves, in any order.
+        """
+        if not isinstance(other, LegalMoveSet):
+            return NotImplemented
+        return self.positions.keys() == other.positions.keys()
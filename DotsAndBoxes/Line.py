@@ -20,6 +20,12 @@ class Line:
             return True
         return False
 
+    def erase(self):
+        """
+        Removes the owner of the line. Used to take back a move.
+        """
+        self.owner = 0
+
     def __bool__(self):
         """
         Define truth value for line. If the line is owned, Line is True.
@@ -0,0 +1,509 @@
+try:
+    from Game import Game
+    from BitboardGame import BitboardGame
+    from GameVariants import SwedishGame, RandomGame, BitboardSwedishGame, BitboardRandomGame
+    import BinaryResults
+    import PlayerFactory
+    import ReadStatistics
+except ModuleNotFoundError:
+    from DotsAndBoxes.Game import Game
+    from DotsAndBoxes.BitboardGame import BitboardGame
+    from DotsAndBoxes.GameVariants import SwedishGame, RandomGame, BitboardSwedishGame, BitboardRandomGame
+    import DotsAndBoxes.BinaryResults as BinaryResults
+    import DotsAndBoxes.PlayerFactory as PlayerFactory
+    import DotsAndBoxes.ReadStatistics as ReadStatistics
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import ast
+import os
+import random
+import re
+
+# Game classes for each variant, as in the variant options of the start frame.
+VARIANTS = {"american": Game, "swedish": SwedishGame, "random": RandomGame}
+# Game classes for each engine. The bitboard engine plays the same games,
+# but is much cheaper for the players to copy and search.
+ENGINES = {
+    "game": VARIANTS,
+    "bitboard": {"american": BitboardGame, "swedish": BitboardSwedishGame, "random": BitboardRandomGame}
+}
+
+def parse_player_spec(spec):
+    """
+    Turns a player spec string into a player type and options for
+    PlayerFactory.makePlayer. A spec is the player type, then optionally a
+    colon and comma separated options, eg
+        "Monte Carlo Player:timeLimit=1,c=1.4"
+    The player type can also be given by its first word, in any case, eg
+    "monte" or "minimax".
+    Args:
+        spec(str): player spec
+    Returns:
+        Tuple(str, dict): player type and keyword arguments for makePlayer
+    Raises:
+        ValueError: if the spec doesn't match a player type
+    """
+    name, _, optionStr = spec.partition(":")
+    name = name.strip()
+    playerTypes = PlayerFactory.PlayerFactory().playerTypes
+    for playerType in playerTypes:
+        if name.lower() in (playerType.lower(), playerType.split()[0].lower()):
+            break
+    else:
+        raise ValueError("Unknown player type {}. Choose from {}.".format(name, playerTypes))
+    options = {}
+    for option in optionStr.split(","):
+        if not option.strip():
+            continue
+        key, _, value = option.partition("=")
+        try:
+            options[key.strip()] = ast.literal_eval(value.strip())
+        except (ValueError, SyntaxError):
+            options[key.strip()] = value.strip()
+    return playerType, options
+
+def make_game(width, height, variant="american", engine="game"):
+    """
+    Makes a new game of a variant.
+    Args:
+        width(int): board width
+        height(int): board height
+        variant(str): "american", "swedish" or "random"
+        engine(str): "game" for Game, or "bitboard" for BitboardGame
+    Returns:
+        Game or BitboardGame
+    """
+    return ENGINES[engine][variant](width, height)
+
+def play_game(players, game, progress=False):
+    """
+    Plays a game between players until it is finished.
+    Args:
+        players(List[Player]): player one and player two
+        game(Game): game to play. It is changed in place.
+        progress(bool): print a progress bar as moves are made
+    Returns:
+        Game: the finished game
+    """
+    gameLength = len(game.movesMade) + len(game.get_all_legal_moves())
+    while not game.is_finished():
+        player = players[game.currentPlayer-1]
+        move = player.chooseMove(game.get_copy())
+        game.take_turn(move)
+        if progress:
+            progressMade = int((len(game.movesMade)/gameLength)*100)
+            progressLeft = 100 - progressMade
+            print("\r"+("-"*progressMade)+("|"*progressLeft), end="", flush=True)
+    return game
+
+class MatchRunner:
+    """
+    Plays a number of games between two players without the GUI, so it can
+    run anywhere Python can, and saves them to a results file in the same
+    format as the experiment frame, for ReadStatistics to read.
+    New players are made for every game, so no player keeps anything
+    (like a search tree) from one game to the next.
+    """
+    def __init__(self, playerOneSpec, playerTwoSpec, width=3, height=3, variant="american", resultsDir="Results", names=None, engine="bitboard"):
+        """
+        Args:
+            playerOneSpec(str): spec for player one, see parse_player_spec
+            playerTwoSpec(str): spec for player two
+            width(int): board width
+            height(int): board height
+            variant(str): "american", "swedish" or "random"
+            resultsDir(str): folder to save results files in
+            names(List[str]): names of the players for the results filename.
+                Defaults to the first word of each player type. Names can't
+                have "_" in them.
+            engine(str): "bitboard" to play on a BitboardGame, or "game" to
+                play on a Game, as the GUI does
+        """
+        if variant not in VARIANTS:
+            raise ValueError("Unknown variant {}. Choose from {}.".format(variant, list(VARIANTS)))
+        if engine not in ENGINES:
+            raise ValueError("Unknown engine {}. Choose from {}.".format(engine, list(ENGINES)))
+        self.playerFactory = PlayerFactory.PlayerFactory()
+        self.specs = [parse_player_spec(playerOneSpec), parse_player_spec(playerTwoSpec)]
+        self.width = width
+        self.height = height
+        self.variant = variant
+        self.engine = engine
+        self.resultsDir = resultsDir
+        if names is None:
+            names = [playerType.split()[0] for playerType, options in self.specs]
+        self.names = names
+
+    def makePlayers(self):
+        """
+        Makes a new player one and player two from their specs.
+        Returns:
+            List[Player]
+        """
+        return [self.playerFactory.makePlayer(playerType, i+1, **options)
+            for i, (playerType, options) in enumerate(self.specs)]
+
+    def filename(self):
+        """
+        Results filename for the match, in the form ReadStatistics expects,
+        eg Results/1_Random_2_Monte_3x3.txt
+        Returns:
+            str
+        """
+        return os.path.join(self.resultsDir, "1_{}_2_{}_{}x{}.txt".format(self.names[0], self.names[1], self.width, self.height))
+
+    def run(self, games, filename=None, mode="w+", verbose=True, workers=1, seed=None, resume=False, binary=False):
+        """
+        Plays the games, saving them to the results file in batches as they
+        finish. See run_matches.
+        Args:
+            games(int): number of games to play
+            filename(str): results file. Defaults to self.filename()
+            mode(str): "w+" to start a new results file, "a+" to add to it
+            verbose(bool): print progress
+            workers(int): number of processes to play games in
+            seed(int): seed for the games. By default, the seed saved in the
+                results file, or a random one for a new file.
+            resume(bool): only play as many games as the results file is
+                short of, after a run was stopped part way through
+            binary(bool): save the games to a binary results file as well
+        Returns:
+            List[int]: player one wins, player two wins and draws, for the
+                games played in this run
+        """
+        if filename is None:
+            filename = self.filename()
+        folder = os.path.dirname(filename)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        if resume:
+            first = completed_games(filename)
+            games = max(0, games - first)
+        elif "w" in mode:
+            open(filename, mode).close()
+            first = 0
+        else:
+            first = completed_games(filename)
+        return run_matches([(self, filename, first, games)], workers, seed, verbose=verbose, binary=binary)[0]
+
+def play_games(runner, seeds):
+    """
+    Plays one game of a match for each seed. This is run by the worker
+    processes, and sends back the games as text so they are quick to pass
+    between processes.
+    Args:
+        runner(MatchRunner): match to play games of
+        seeds(List[str]): seed for each game's random numbers
+    Returns:
+        List[Tuple(str, int)]: statistics string and winner of each game
+    """
+    results = []
+    for seed in seeds:
+        random.seed(seed)
+        game = play_game(runner.makePlayers(), make_game(runner.width, runner.height, runner.variant, runner.engine))
+        results.append((game.get_statistics_string(), game.winner()))
+    return results
+
+def completed_games(filename):
+    """
+    Counts the finished games in a results file. A game that was only partly
+    written, when a run was stopped, is cut off the end of the file.
+    Args:
+        filename(str): results file
+    Returns:
+        int: number of games with a score line
+    """
+    if not os.path.exists(filename):
+        return 0
+    with open(filename, "r") as infile:
+        lines = infile.readlines()
+    count = 0
+    # The seed line, if there is one, is kept.
+    end = 1 if lines and lines[0].startswith("seed ") else 0
+    for k, line in enumerate(lines):
+        # Each game is a "WxH" line, then moves like "(0, 1, 2)", then the score.
+        if ReadStatistics.is_score_line(line):
+            count += 1
+            end = k + 1
+    if end < len(lines):
+        with open(filename, "w") as outfile:
+            outfile.writelines(lines[:end])
+    return count
+
+def read_seed(filename):
+    """
+    Finds the seed a results file was started with, from its first line.
+    Args:
+        filename(str): results file
+    Returns:
+        int: the seed, or None if the file doesn't exist or has no seed line
+    """
+    if not os.path.exists(filename):
+        return None
+    with open(filename, "r") as infile:
+        line = infile.readline()
+    if line.startswith("seed "):
+        return int(line.split()[1])
+    return None
+
+def start_results(filename, seed):
+    """
+    Writes the seed line at the top of a new or empty results file, so a
+    resumed run can play the same games without being given the seed again.
+    ReadStatistics skips anything before the first game.
+    Args:
+        filename(str): results file
+        seed(int): seed of the run
+    """
+    if not os.path.exists(filename) or os.path.getsize(filename) == 0:
+        with open(filename, "w") as outfile:
+            outfile.write("seed {}\n".format(seed))
+
+def binary_filename(filename):
+    """
+    Args:
+        filename(str): text results file
+    Returns:
+        str: the binary results file saved alongside it
+    """
+    return os.path.splitext(filename)[0] + ".dbr"
+
+def open_binary(runner, filename, first, seed):
+    """
+    Opens the binary results file that goes alongside a text results file,
+    ready for the games from number first on. The text file is the one that
+    is resumed from, so if the binary file doesn't hold the same games (after
+    a run stopped between writing the two, say) it is made again from the
+    text file.
+    Args:
+        runner(MatchRunner): match the games are from
+        filename(str): text results file
+        first(int): number of the first game to be added
+        seed(int): seed of the run
+    Returns:
+        BinaryResults.BinaryResultsWriter
+    """
+    binaryName = binary_filename(filename)
+    if first == 0:
+        for name in [binaryName, BinaryResults.index_filename(binaryName)]:
+            if os.path.exists(name):
+                os.remove(name)
+    else:
+        count = BinaryResults.repair(binaryName) if os.path.exists(binaryName) else -1
+        if count != first:
+            BinaryResults.convert_text(filename, binaryName, runner.variant, overwrite=True)
+    return BinaryResults.BinaryResultsWriter(binaryName, runner.width, runner.height, runner.variant, runner.names, seed)
+
+class ResultsWriter:
+    """
+    Saves batches of games to a results file. Batches can finish in any
+    order, so each one waits until the batches before it are written, which
+    keeps the games in the file in the order they were numbered.
+    """
+    def __init__(self, filename, binary=None, first=0):
+        """
+        Args:
+            filename(str): results file to add games to
+            binary(BinaryResults.BinaryResultsWriter): binary results file to
+                add the games to as well, or None
+            first(int): number of the first game that will be added
+        """
+        self.filename = filename
+        self.binary = binary
+        self.first = first
+        self.nextBatch = 0
+        self.waiting = {}
+        self.written = 0
+        # Player one wins, player two wins and draws.
+        self.results = [0, 0, 0]
+
+    def add(self, batch, games):
+        """
+        Adds a finished batch, and writes every batch that is ready, with
+        the file opened just once.
+        Args:
+            batch(int): number of the batch
+            games(List[Tuple(str, int)]): statistics string and winner of each game
+        """
+        self.waiting[batch] = games
+        texts = []
+        while self.nextBatch in self.waiting:
+            for text, winner in self.waiting.pop(self.nextBatch):
+                texts.append(text)
+                # winner is 1 or 2, or 0 for a draw, which goes last.
+                self.results[winner-1] += 1
+            self.nextBatch += 1
+        if texts:
+            with open(self.filename, "a") as outfile:
+                outfile.write("".join(texts))
+            # The binary file is written second, so it is never ahead of the
+            # text file that runs are resumed from.
+            if self.binary is not None:
+                for k, text in enumerate(texts):
+                    self.binary.addText(text, self.first + self.written + k)
+            self.written += len(texts)
+
+    def close(self):
+        """
+        Closes the binary results file, if there is one.
+        """
+        if self.binary is not None:
+            self.binary.close()
+
+def run_matches(jobs, workers=1, seed=None, batchSize=None, verbose=True, callback=None, binary=False):
+    """
+    Plays the games for a set of matches, shared out over a pool of worker
+    processes in batches. Every game has its own seed, made from the seed,
+    the results filename and the number of the game, so a game can be played
+    again exactly (apart from time limits), and a resumed run plays the same
+    games it would have.
+    Args:
+        jobs(List[Tuple(MatchRunner, str, int, int)]): match, results file,
+            number of the first game to play and number of games to play.
+        workers(int): number of processes. With 1, games are played in
+            this process.
+        seed(int): seed for the games. By default, the seed saved in the
+            results files, or a random one for new files.
+        batchSize(int): games in each batch sent to a worker. By default
+            batches are small enough to keep every worker busy.
+        verbose(bool): print progress
+        callback(function): called with the job number and the games of each
+            batch as it finishes, as in ResultsWriter.add
+        binary(bool): save the games to a binary results file alongside
+            each text results file as well, see binary_filename
+    Returns:
+        List[List[int]]: player one wins, player two wins and draws for each job
+    """
+    if seed is None:
+        saved = {read_seed(filename) for runner, filename, first, games in jobs} - {None}
+        if len(saved) > 1:
+            raise ValueError("The results files were started with different seeds {}. Pass the seed to use.".format(sorted(saved)))
+        seed = saved.pop() if saved else random.getrandbits(32)
+    for runner, filename, first, games in jobs:
+        start_results(filename, seed)
+    total = sum(games for runner, filename, first, games in jobs)
+    if batchSize is None:
+        batchSize = max(1, min(50, total // (workers*4)))
+    writers = []
+    tasks = []
+    for j, (runner, filename, first, games) in enumerate(jobs):
+        writers.append(ResultsWriter(filename, open_binary(runner, filename, first, seed) if binary else None, first))
+        name = os.path.basename(filename)
+        for batch, start in enumerate(range(first, first + games, batchSize)):
+            seeds = ["{}-{}-{}".format(seed, name, k) for k in range(start, min(start + batchSize, first + games))]
+            tasks.append((j, batch, seeds))
+
+    played = [0]
+    def finished(j, batch, games):
+        writers[j].add(batch, games)
+        played[0] += len(games)
+        if callback is not None:
+            callback(j, games)
+        if verbose:
+            print("\rPlayed {} of {} games.".format(played[0], total), end="", flush=True)
+
+    try:
+        if workers <= 1:
+            for j, batch, seeds in tasks:
+                finished(j, batch, play_games(jobs[j][0], seeds))
+        else:
+            with ProcessPoolExecutor(workers) as pool:
+                futures = {pool.submit(play_games, jobs[j][0], seeds): (j, batch) for j, batch, seeds in tasks}
+                for future in as_completed(futures):
+                    j, batch = futures[future]
+                    finished(j, batch, future.result())
+    finally:
+        for writer in writers:
+            writer.close()
+    if verbose:
+        print()
+    return [writer.results for writer in writers]
+
+def tournament(playerTypes=("Random Player", "Ordered Player"), boardSizes=((3, 3), (4, 4), (5, 5), (6, 6)), noTrials=10000, resultsDir=os.path.join("Results", "rand-ord-19-05"), timeLimit=5, workers=1, seed=None, resume=False, engine="bitboard", binary=False):
+    """
+    Plays every pairing of the player types on each board size, with
+    noTrials games for each, all sharing one pool of worker processes.
+    Ordered players always play the same game against each other, so that
+    pairing is skipped.
+    Args:
+        playerTypes(List[str]): player types to play
+        boardSizes(List[Tuple(int, int)]): (width, height) of each board
+        noTrials(int): games played for each pairing and size
+        resultsDir(str): folder to save results files in
+        timeLimit(int/float): time limit for the complex AI players
+        workers(int): number of processes to play games in
+        seed(int): seed for the games. By default, the seed saved in the
+            results files, or a random one for new files.
+        resume(bool): carry on from the games already in the results files
+        engine(str): "bitboard" or "game", see MatchRunner
+        binary(bool): save the games to binary results files as well
+    """
+    if not os.path.exists(resultsDir):
+        os.makedirs(resultsDir)
+    jobs = []
+    for width, height in boardSizes:
+        for p1type in playerTypes:
+            for p2type in playerTypes:
+                if p1type == "Ordered Player" and p2type == "Ordered Player":
+                    continue
+                p1spec = "{}:timeLimit={}".format(p1type, timeLimit)
+                p2spec = "{}:timeLimit={}".format(p2type, timeLimit)
+                runner = MatchRunner(p1spec, p2spec, width, height, resultsDir=resultsDir, engine=engine)
+                filename = runner.filename()
+                if resume:
+                    first = completed_games(filename)
+                else:
+                    open(filename, "w+").close()
+                    first = 0
+                jobs.append((runner, filename, first, max(0, noTrials - first)))
+    print("Starting trials: {} games to play.".format(sum(job[3] for job in jobs)))
+    run_matches(jobs, workers, seed, binary=binary)
+    for runner, filename, first, games in jobs:
+        ReadStatistics.get_scores(filename)
+    print("\n\nAll trials completed.")
+
+def main(args=None):
+    """
+    Command line entry point for playing matches.
+    >python DotsAndBoxes match "Random Player" "Monte Carlo Player:timeLimit=1" --size 3x3 --games 100
+    Args:
+        args(List[str]): command line arguments, sys.argv[2:] by default
+    """
+    parser = argparse.ArgumentParser(prog="DotsAndBoxes match", description="Play games between two players without the GUI.")
+    parser.add_argument("playerOne", help='player one, eg "Minimax Player:timeLimit=1,maxDepth=4"')
+    parser.add_argument("playerTwo", help="player two")
+    parser.add_argument("--size", default="3x3", help="board size as WIDTHxHEIGHT")
+    parser.add_argument("--variant", default="american", choices=list(VARIANTS))
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--output", default=None, help="results file. Named after the players and size by default")
+    parser.add_argument("--append", action="store_true", help="add to the results file instead of starting it again")
+    parser.add_argument("--resume", action="store_true", help="only play the games the results file is short of")
+    parser.add_argument("--workers", type=int, default=1, help="number of processes to play games in")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--engine", default="bitboard", choices=list(ENGINES), help="game engine to play on")
+    parser.add_argument("--binary", action="store_true", help="save the games to a binary results file as well")
+    parser.add_argument("--quiet", action="store_true")
+    options = parser.parse_args(args)
+    width, height = (int(x) for x in options.size.lower().split("x"))
+    runner = MatchRunner(options.playerOne, options.playerTwo, width, height, options.variant, engine=options.engine)
+    filename = options.output or runner.filename()
+    runner.run(options.games, filename, "a+" if options.append else "w+", not options.quiet, options.workers, options.seed, options.resume, options.binary)
+    # --output can be any name, so the player names aren't read from it.
+    ReadStatistics.get_scores(filename, runner.names)
+
+def tournament_main(args=None):
+    """
+    Command line entry point for the tournament.
+    >python DotsAndBoxes 2 --workers 8 --resume
+    Args:
+        args(List[str]): command line arguments, sys.argv[2:] by default
+    """
+    parser = argparse.ArgumentParser(prog="DotsAndBoxes 2", description="Play the tournament without the GUI.")
+    parser.add_argument("--games", type=int, default=10000, help="games for each pairing and size")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="number of processes to play games in")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--resume", action="store_true", help="carry on from the games already in the results files")
+    parser.add_argument("--engine", default="bitboard", choices=list(ENGINES), help="game engine to play on")
+    parser.add_argument("--binary", action="store_true", help="save the games to binary results files as well")
+    options = parser.parse_args(args)
+    tournament(noTrials=options.games, workers=options.workers, seed=options.seed, resume=options.resume, engine=options.engine, binary=options.binary)
@@ -1,16 +1,31 @@
 try:
     import BasicPlayers
+    import TranspositionTable
+    import MoveOrdering
+    import ChainAnalysis
+    import ParallelMinimax
 except ModuleNotFoundError:
     import DotsAndBoxes.BasicPlayers as BasicPlayers
+    import DotsAndBoxes.TranspositionTable as TranspositionTable
+    import DotsAndBoxes.MoveOrdering as MoveOrdering
+    import DotsAndBoxes.ChainAnalysis as ChainAnalysis
+    import DotsAndBoxes.ParallelMinimax as ParallelMinimax
 import time
 
+class SearchTimeout(Exception):
+    """
+    Raised inside the search when the time limit runs out, to abandon the
+    current iterative deepening pass.
+    """
+    pass
+
 class MinimaxPlayer(BasicPlayers.RandomPlayer):
     """
     Player that implements minimax. Inherits random player for random moves.
     Minimax algorithm with alpha-beta pruning for speed and iterative deepening
     for a time limit.
     """
-    def __init__(self, playerIndex, colour="red", timeLimit=0.5, maxDepth=20):
+    def __init__(self, playerIndex, colour="red", timeLimit=0.5, maxDepth=20, ttSize=100000, moveOrdering=False, endgame=True, workers=1):
         """
         Override for Minimax player to include time limit & max depth.
         This is the time limit given to the player to choose a move, in seconds.
@@ -19,53 +34,144 @@ class MinimaxPlayer(BasicPlayers.RandomPlayer):
             colour(str): Colour for the UI to render. Defaults to Red
             timeLimit(int/float): Time limit in seconds for moves
             maxDepth(int): Max depth the computer player can reach.
+            ttSize(int): Max entries in the transposition table. 0 turns it off.
+            moveOrdering(bool): Sort moves before searching them, for better pruning.
+            endgame(bool): Solve positions with no safe moves left exactly,
+                using chain and loop analysis, instead of searching them.
+            workers(int): Number of processes searching root moves at once.
         """
         self.index = playerIndex
         self.colour = colour
         self.timeLimit = timeLimit
         self.maxDepth = maxDepth
+        # Search results are kept between iterative deepening passes and moves,
+        # as scores are always from this player's point of view.
+        if ttSize > 0:
+            self.tt = TranspositionTable.TranspositionTable(ttSize)
+        else:
+            self.tt = None
+        if moveOrdering:
+            self.orderer = MoveOrdering.MoveOrderer()
+        else:
+            self.orderer = None
+        self.endgame = endgame
+        if workers > 1:
+            self.parallel = ParallelMinimax.RootSplitSearch(self, workers, ttSize, moveOrdering)
+        else:
+            self.parallel = None
+        # Number of nodes searched for the last move, to measure pruning.
+        self.nodeCount = 0
+        # The clock is only checked every checkInterval nodes, as it is slow.
+        self.checkInterval = 256
+        self.deadline = float("inf")
+        # Depth reached, nodes searched, time taken and nodes per second for
+        # the last move, and whether it was solved as an endgame. searchLog
+        # keeps these for every move.
+        self.searchStats = {}
+        self.searchLog = []
 
     def chooseMove(self, game):
         """
         Choose move for minimax player. This is the start of the search and looks
         at all moves that can be made by the player right now. Implements
         iterative deepening.
-        When the time limit is reached, the move with the best score so far is
-        chosen.
+        Each pass searches one ply deeper than the last, starting with the best
+        move from the previous pass. If the time limit runs out part way through
+        a pass, that pass is thrown away and the best move from the last
+        completed pass is chosen.
         Args:
             game(Game): Game that the player is making a move in
         Returns:
             3-Tuple[int]: move to be made.
         """
         moves = game.get_all_legal_moves()
-        bestMove = (0, 0, 0)
-        bestScore = -10000
+        self.nodeCount = 0
+        if self.tt is not None:
+            self.tt.newSearch()
+        if self.orderer is not None:
+            self.orderer.newSearch()
+        bestMove = None
+        depthReached = 0
         currentMaxDepth = 1
         startTime = time.time()
+        # Once there are no safe moves left the best move can be worked out
+        # straight away, so there's no need to search.
+        solved = False
+        if self.endgame:
+            bestMove = ChainAnalysis.endgame_move(game)
+            solved = bestMove is not None
+        self.deadline = startTime + self.timeLimit
+        if self.parallel is not None and not solved:
+            self.parallel.newSearch(game, self.deadline)
+            searchRoot = self.parallel.searchRoot
+        else:
+            searchRoot = self.searchRoot
+        # An abandoned pass can leave moves made in the game, which are taken
+        # back to this point.
+        stackSize = len(game.moveStack)
         # Search at max depth = 1 initially, and then increment the depth.
         # Keep incrementing until the time limit has been reached, then return
         # the best move found so far. This is iterative deepening.
-        while time.time() - startTime <= self.timeLimit and currentMaxDepth <= self.maxDepth:
-            for move in moves:
-                # simulate the move and find the score
-                copyGame = self.makeMove(game, move)
-                score = self.getScore(copyGame, currentMaxDepth, -10000, 10000)
-                # The move that returns the greatest score gets chosen.
-                if score >= bestScore:
-                    bestScore = score
-                    bestMove = move
-                # Break if we have reached the end of the time limit.
-                if time.time() - startTime >= self.timeLimit:
-                    break
+        while not solved and currentMaxDepth <= self.maxDepth:
+            try:
+                bestMove = searchRoot(game, moves, currentMaxDepth, bestMove)
+            except SearchTimeout:
+                while len(game.moveStack) > stackSize:
+                    game.undo_move()
+                break
+            depthReached = currentMaxDepth
+            # Searching deeper than the number of moves left can't change anything.
+            if time.time() >= self.deadline or currentMaxDepth >= len(moves):
+                break
             # Increment the current max depth for iterative deepening.
             currentMaxDepth += 1
 
+        timeTaken = time.time() - startTime
+        self.searchStats = {
+            "endgame": solved,
+            "depth": depthReached,
+            "nodes": self.nodeCount,
+            "time": timeTaken,
+            "nodesPerSecond": self.nodeCount/timeTaken if timeTaken > 0 else 0
+        }
+        self.searchLog.append(self.searchStats)
         # Just in case we picked a bad move. Or no move at all.
-        if game.is_legal_move(bestMove):
+        if bestMove is not None and game.is_legal_move(bestMove):
             return bestMove
         else:
             return self.randomMove(game)
 
+    def searchRoot(self, game, moves, depth, previousBest=None):
+        """
+        Searches every move at the root of the tree to a fixed depth. The best
+        move from the previous pass is searched first, so its score can be used
+        to prune the other moves. When moves score the same, the first one
+        searched is kept.
+        Args:
+            game(Game): Game that the player is making a move in
+            moves(List[3-tuple(int)]): Legal moves in the game
+            depth(int): depth to search each move to
+            previousBest(3-tuple(int)): best move from the last pass, or None
+        Returns:
+            3-tuple(int): best move found.
+        """
+        if self.orderer is not None:
+            moves = self.orderer.order(game, moves, depth+1, previousBest)
+        elif previousBest is not None:
+            moves = [previousBest] + [m for m in moves if m != previousBest]
+        bestMove = moves[0]
+        bestScore = -10000
+        for move in moves:
+            # simulate the move and find the score, then take the move back.
+            game.take_turn(move)
+            score = self.getScore(game, depth, bestScore, 10000)
+            game.undo_move()
+            # The move that returns the greatest score gets chosen.
+            if score > bestScore:
+                bestScore = score
+                bestMove = move
+        return bestMove
+
     def getScore(self, game, depth, alpha, beta):
         """
         The recursive part of the minimax algorithm. Implements alpha-beta pruning.
@@ -78,11 +184,41 @@ class MinimaxPlayer(BasicPlayers.RandomPlayer):
         Returns:
             int
         """
+        self.nodeCount += 1
+        if self.nodeCount % self.checkInterval == 0 and time.time() >= self.deadline:
+            raise SearchTimeout()
+        # With no safe moves left the rest of the game can be solved exactly.
+        if self.endgame:
+            sideCounts = game.get_side_counts()
+            if sideCounts[0] == 0 and sideCounts[1] == 0:
+                return self.evaluateEndgame(game)
         # When we're at the bottom of the tree, return static evaluation
         if depth <= 0 or game.is_finished():
             return self.evaluate(game)
 
+        # Positions are often reached by more than one order of moves. If this
+        # one has been searched deep enough before, reuse the result.
+        alphaOriginal, betaOriginal = alpha, beta
+        key = hash(game)
+        ttMove = None
+        if self.tt is not None:
+            entry = self.tt.lookup(key)
+            if entry is not None:
+                ttMove = entry[4]
+            if entry is not None and entry[1] >= depth:
+                score, bound = entry[2], entry[3]
+                if bound == TranspositionTable.EXACT:
+                    return score
+                elif bound == TranspositionTable.LOWERBOUND:
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+                if beta <= alpha:
+                    return score
+
         moves = game.get_all_legal_moves()
+        if self.orderer is not None:
+            moves = self.orderer.order(game, moves, depth, ttMove)
         # Store the current player
         currentPlayer = game.currentPlayer
         # set bestScore to either high or low value depending on whose turn it is
@@ -93,21 +229,39 @@ class MinimaxPlayer(BasicPlayers.RandomPlayer):
         else:
             bestScore = 10000
             maximise = False
+        bestMove = None
         for move in moves:
-            # Make the move and get the next state of the game.
-            copyGame = self.makeMove(game, move)
+            # Make the move in place, search it, and then take it back.
+            game.take_turn(move)
             # recursive call
-            score = self.getScore(copyGame, depth-1, alpha, beta)
+            score = self.getScore(game, depth-1, alpha, beta)
+            game.undo_move()
             # Different actions depending on wether this is a min node or max node
             if maximise:
-                bestScore = max(score, bestScore)
+                if score > bestScore:
+                    bestScore = score
+                    bestMove = move
                 alpha = max(alpha, bestScore)
             else:
-                bestScore = min(score, bestScore)
+                if score < bestScore:
+                    bestScore = score
+                    bestMove = move
                 beta = min(beta, bestScore)
             # Alpha - beta pruning.
             if beta <= alpha:
+                if self.orderer is not None:
+                    self.orderer.recordCutoff(move, depth)
                 break
+
+        if self.tt is not None:
+            # A score outside the original window is only a bound on the real score.
+            if bestScore <= alphaOriginal:
+                bound = TranspositionTable.UPPERBOUND
+            elif bestScore >= betaOriginal:
+                bound = TranspositionTable.LOWERBOUND
+            else:
+                bound = TranspositionTable.EXACT
+            self.tt.store(key, depth, bestScore, bound, bestMove)
         return bestScore
 
     def evaluate(self, game):
@@ -130,49 +284,38 @@ class MinimaxPlayer(BasicPlayers.RandomPlayer):
         # Remove 10 for every box opponent has
         score -= 10*scores[otherIndex]
         # Evaluation needs to be different depending on whose turn it is.
+        # sideCounts[k] is the number of boxes with k sides drawn, which the
+        # game keeps up to date as moves are made.
+        sideCounts = game.get_side_counts()
         # If it's our turn next then we want boxes to complete
         if game.currentPlayer == self.index:
-            for i in range(game.height-1):
-                for j in range(game.width-1):
-                    no_sides = game.boxes[i][j].sides_completed()
-                    # 0 or 1. Don't care
-                    if no_sides == 0 or no_sides == 1:
-                        pass
-                    # Only two, we don't want to make the third.
-                    elif no_sides == 2:
-                        score -= 1
-                    # Three sides means we can complete the fourth and get points
-                    elif no_sides == 3:
-                        score += 5
-
+            # Only two, we don't want to make the third.
+            score -= sideCounts[2]
+            # Three sides means we can complete the fourth and get points
+            score += 5*sideCounts[3]
         # If it's their turn next we don't want them to complete boxes
         elif game.currentPlayer == otherIndex:
-            for i in range(game.height-1):
-                for j in range(game.width-1):
-                    no_sides = game.boxes[i][j].sides_completed()
-                    # 0 or 1. Don't care
-                    if no_sides == 0 or no_sides == 1:
-                        pass
-                    # Only two, we want them to make the third.
-                    elif no_sides == 2:
-                        score += 1
-                    # Three sides means they can complete the fourth and get points
-                    elif no_sides == 3:
-                        score -= 5
+            # Only two, we want them to make the third.
+            score += sideCounts[2]
+            # Three sides means they can complete the fourth and get points
+            score -= 5*sideCounts[3]
         return score
 
-    def makeMove(self, game, move):
+    def evaluateEndgame(self, game):
         """
-        Takes a game and a move, copies the game and makes the move in it.
+        Exact score for a game with no safe moves left, on the same scale as
+        evaluate. Every box won by the end of the game is worth 10 points.
         Args:
-            game(Game): Game to be played in.
-            move(Tuple[int]): Move to make
+            game(Game): Game state to evaluate
         Returns:
-            Game: Deep copy of Game with move made
+            int
         """
-        copyGame = game.get_copy()
-        copyGame.take_turn(move)
-        return copyGame
+        scores = game.get_scores()
+        value = ChainAnalysis.endgame_value(game)
+        if game.currentPlayer != self.index:
+            value = -value
+        otherIndex = 2 if self.index == 1 else 1
+        return 10*(scores[self.index] - scores[otherIndex] + value)
 
     def __str__(self):
         """
@@ -0,0 +1,374 @@
+try:
+    import Rollout
+except ModuleNotFoundError:
+    import DotsAndBoxes.Rollout as Rollout
+from array import array
+import time
+import math
+
+def min_nodes(width, height):
+    """
+    Smallest maxNodes a tree can search a board with: the root, a child for
+    every line, and room to expand one of those children. With fewer, the
+    tree would be pruned on every iteration without ever having room.
+    Args:
+        width(int): board width
+        height(int): board height
+    Returns:
+        int
+    """
+    lines = (width-1)*height + (height-1)*width
+    return 1 + 2*lines
+
+class MonteCarloArrayTree:
+    """
+    Monte Carlo Tree that stores its nodes in parallel typed arrays instead of
+    MonteCarloNode objects, so each node only takes a few dozen bytes.
+    Node k is described by visits[k], wins[k], parent[k], move[k] (an index
+    into self.moves), and firstChild[k] and childCount[k]. The children of a
+    node are always stored next to each other, starting at firstChild, which
+    is -1 until the node has been expanded. Node 0 is the root.
+    Nodes don't store a game. The tree keeps a single copy of the game at the
+    root, and the game for any node is made by playing the moves from the root
+    down to it, then taking them back afterwards.
+    The search works the same way as MonteCarloTree, so the two can be swapped.
+    With maxNodes, the least visited nodes are collapsed whenever the tree
+    is close to that many nodes, and the rest are compacted into new arrays.
+    """
+    def __init__(self, index, timeLimit=2, c=1.4142, batchSize=1, maxNodes=None):
+        """
+        Args:
+            index(int): Index that the Monte Carlo player has
+            timeLimit(int/float): Time limit in seconds for moves
+            c(float): Exploration parameter for MCTS
+            batchSize(int): Number of random games played from each new node
+            maxNodes(int): Most nodes the tree can hold. None for no limit.
+        """
+        self.index = index
+        self.c = c
+        self.timeLimit = timeLimit
+        self.batchSize = batchSize
+        self.maxNodes = maxNodes
+        self.game = None
+        self.moves = []
+        self.moveIndex = {}
+        # Iterations, time taken and iterations per second for the last move,
+        # and the size of the tree.
+        self.searchStats = {}
+        self.clear()
+
+    def clear(self):
+        """
+        Removes every node from the tree.
+        """
+        self.visits = array("d")
+        self.wins = array("d")
+        self.parent = array("l")
+        self.move = array("l")
+        self.firstChild = array("l")
+        self.childCount = array("l")
+
+    def addNode(self, parent, move, visits=0.0, wins=0.0):
+        """
+        Adds a node to the end of the arrays.
+        Args:
+            parent(int): index of the parent node, -1 for the root
+            move(int): index in self.moves of the move made to reach this node
+            visits(float): visit count to start with
+            wins(float): win count to start with
+        Returns:
+            int: index of the new node
+        """
+        self.visits.append(visits)
+        self.wins.append(wins)
+        self.parent.append(parent)
+        self.move.append(move)
+        self.firstChild.append(-1)
+        self.childCount.append(0)
+        return len(self.visits) - 1
+
+    def update(self, game):
+        """
+        Updates the tree with a new game.
+        This method is a switch for startTree and newRoot.
+        Args:
+            game(Game): game state to start search from.
+        """
+        if self.game is None:
+            self.startTree(game)
+        else:
+            self.newRoot(game)
+
+    def startTree(self, game):
+        """
+        Throws away any old nodes and starts the tree with a root node.
+        Args:
+            game(Game): game state to start search from.
+        """
+        if self.maxNodes is not None and self.maxNodes < min_nodes(game.width, game.height):
+            raise ValueError("maxNodes must be at least {} on a {}x{} board.".format(min_nodes(game.width, game.height), game.width, game.height))
+        self.game = game.get_copy()
+        self.setupMoves(game)
+        self.clear()
+        self.addNode(-1, -1)
+        self.expand(0)
+
+    def setupMoves(self, game):
+        """
+        Numbers every line on the board, so moves can be stored as small ints.
+        Args:
+            game(Game): game to number the lines of
+        """
+        self.moves = [(0, i, j) for i in range(game.height) for j in range(game.width-1)]
+        self.moves += [(1, i, j) for i in range(game.width) for j in range(game.height-1)]
+        self.moveIndex = {m: k for k, m in enumerate(self.moves)}
+
+    def expand(self, node):
+        """
+        Create child nodes for a node, one for each legal move. self.game must
+        be at the node's position.
+        Args:
+            node(int): node to expand
+        """
+        moves = self.game.get_all_legal_moves()
+        self.firstChild[node] = len(self)
+        self.childCount[node] = len(moves)
+        for m in moves:
+            self.addNode(node, self.moveIndex[m])
+
+    def chooseChild(self, node):
+        """
+        Choose the best child of a node based on UCB values, expanding the node
+        first if needed. self.game must be at the node's position.
+        Args:
+            node(int): node to choose from
+        Returns:
+            int: child node
+        """
+        if self.firstChild[node] == -1:
+            self.expand(node)
+        first = self.firstChild[node]
+        visits = self.visits
+        wins = self.wins
+        c = self.c
+        # A child is only visited after its parent, so log is never of 0 here.
+        logN = math.log(visits[node]) if visits[node] > 0 else 0.0
+        bestValue = 0
+        # This picks the first node by default
+        bestNode = first
+        for child in range(first, first + self.childCount[node]):
+            n = visits[child]
+            if n == 0:
+                ucb = 1000000
+            else:
+                ucb = wins[child]/n + c*math.sqrt(logN/n)
+            if ucb > bestValue:
+                bestValue = ucb
+                bestNode = child
+        return bestNode
+
+    def bestChild(self, node):
+        """
+        Choose the child of a node to play once the search is over, which is
+        the one with the most visits. Ties go to the most wins.
+        self.game must be at the node's position.
+        Args:
+            node(int): node to choose from
+        Returns:
+            int: child node
+        """
+        if self.firstChild[node] == -1:
+            self.expand(node)
+        first = self.firstChild[node]
+        children = range(first, first + self.childCount[node])
+        return max(children, key=lambda child: (self.visits[child], self.wins[child]))
+
+    def nextMove(self):
+        """
+        Search until the time limit runs out, then choose the next best move
+        from the root node and make its child the new root.
+        Returns:
+            3-tuple(int): Move to make
+        """
+        self.search()
+        # pick the best child and make this the new root node.
+        bestChild = self.bestChild(0)
+        move = self.moves[self.move[bestChild]]
+        self.game.take_turn(move)
+        self.reroot(bestChild)
+        return move
+
+    def search(self):
+        """
+        Grow the tree from the root until the time limit runs out.
+        """
+        game = self.game
+        iterations = 0
+        prunes = 0
+        startTime = time.time()
+        timeTaken = 0
+        while timeTaken <= self.timeLimit:
+            # Make sure there's room to expand a node in this iteration.
+            if self.maxNodes is not None and len(self) + len(self.moves) > self.maxNodes:
+                self.prune()
+                prunes += 1
+            # Walk down the tree, making each move in the game on the way.
+            node = 0
+            depth = 0
+            while True:
+                node = self.chooseChild(node)
+                game.take_turn(self.moves[self.move[node]])
+                depth += 1
+                if game.is_finished() or self.visits[node] == 0:
+                    break
+            self.rollout(node)
+            # Then take the moves back to get to the root again.
+            for i in range(depth):
+                game.undo_move()
+            iterations += 1
+            timeTaken = time.time() - startTime
+        self.searchStats = {
+            "iterations": iterations,
+            "time": timeTaken,
+            "iterationsPerSecond": iterations/timeTaken if timeTaken > 0 else 0,
+            "nodes": len(self),
+            "bytes": self.nodeBytes(),
+            "prunes": prunes
+        }
+
+    def rootStats(self):
+        """
+        Visits and wins for each child of the root.
+        Returns:
+            List[Tuple(3-tuple(int), float, float)]: (move, visits, wins)
+        """
+        first = self.firstChild[0]
+        if first == -1:
+            return []
+        return [(self.moves[self.move[k]], self.visits[k], self.wins[k])
+            for k in range(first, first + self.childCount[0])]
+
+    def rollout(self, node):
+        """
+        Play random games from the node's position until they are finished,
+        then backpropagate the results. self.game must be at the node's position.
+        Args:
+            node(int): node to start the rollout from
+        """
+        game = self.game
+        if self.batchSize > 1:
+            engine = Rollout.get_batch_engine(game.width, game.height, game.maxPlayers)
+            eval = engine.wins(game, self.index, self.batchSize)
+        else:
+            engine = Rollout.get_engine(game.width, game.height, game.maxPlayers)
+            eval = (engine.winner(game) == self.index)
+        self.backpropagate(node, eval, self.batchSize)
+
+    def backpropagate(self, node, eval, visits=1):
+        """
+        Send a result from a node all the way back to the root of the tree.
+        Args:
+            node(int): node the rollout was played from
+            eval(Bool/int): True for win, False for not win. Or the number of
+                wins, for a batch of games.
+            visits(int): number of games played
+        """
+        nodeVisits = self.visits
+        wins = self.wins
+        parent = self.parent
+        while node != -1:
+            nodeVisits[node] += visits
+            wins[node] += eval
+            node = parent[node]
+
+    def newRoot(self, game):
+        """
+        Find the new root of the tree given a new gamestate, or make a new root.
+        Args:
+            game(Game): Gamestate to search for
+        """
+        node = 0
+        # this finds which moves have been made between the root and the new state.
+        movesMade = game.movesMade[len(self.game.movesMade):len(game.movesMade)]
+        for move in movesMade:
+            first = self.firstChild[node]
+            if first == -1:
+                # if the node doesn't have children then start a fresh tree
+                self.startTree(game)
+                return
+            moveIndex = self.moveIndex[move]
+            for child in range(first, first + self.childCount[node]):
+                if self.move[child] == moveIndex:
+                    node = child
+                    break
+            else:
+                # the move isn't in the tree, so start a fresh tree
+                self.startTree(game)
+                return
+        self.game = game.get_copy()
+        self.reroot(node)
+
+    def reroot(self, node):
+        """
+        Makes a node the root of the tree, throwing away every node that isn't
+        below it. The nodes that are kept are copied to new arrays in breadth
+        first order, which keeps each node's children next to each other.
+        Args:
+            node(int): node to make the new root
+        """
+        if node == 0:
+            return
+        self.compact(node)
+
+    def prune(self):
+        """
+        Frees about half of the tree. Of the nodes that have children, the ones
+        with no more visits than the median lose them, and the nodes left are
+        compacted. A node only has as many visits as its parent at most, so
+        what's left is still joined to the root. The root always keeps its
+        children.
+        """
+        visits = sorted(self.visits[k] for k in range(len(self)) if self.firstChild[k] != -1)
+        self.compact(0, visits[len(visits)//2])
+
+    def compact(self, node, minVisits=-1):
+        """
+        Copies the nodes below a node to new arrays in breadth first order,
+        with that node as the root. Nodes with minVisits visits or fewer are
+        kept, but without their children, as if they hadn't been expanded.
+        Args:
+            node(int): node to make the new root
+            minVisits(float): most visits a node can have and lose its children
+        """
+        # Copies of the old nodes, as the new ones may be written over them.
+        size = len(self)
+        visits, wins, move = self.visits[:size], self.wins[:size], self.move[:size]
+        firstChild, childCount = self.firstChild[:size], self.childCount[:size]
+        self.clear()
+        self.addNode(-1, move[node], visits[node], wins[node])
+        # queue[k] is the old index of new node k.
+        queue = [node]
+        k = 0
+        while k < len(queue):
+            old = queue[k]
+            first = firstChild[old]
+            if first != -1 and (k == 0 or visits[old] > minVisits):
+                self.firstChild[k] = len(self)
+                self.childCount[k] = childCount[old]
+                for child in range(first, first + childCount[old]):
+                    self.addNode(k, move[child], visits[child], wins[child])
+                    queue.append(child)
+            k += 1
+
+    def nodeBytes(self):
+        """
+        Returns the memory used by the node arrays, in bytes.
+        """
+        arrays = [self.visits, self.wins, self.parent, self.move, self.firstChild, self.childCount]
+        return sum(a.itemsize*len(a) for a in arrays)
+
+    def __len__(self):
+        """
+        Number of nodes in the tree.
+        """
+        return len(self.visits)
@@ -5,10 +5,17 @@
 
 try:
     import BasicPlayers
+    import ChainAnalysis
+    import MonteCarloArrayTree
+    import Rollout
+    import ParallelMonteCarlo
 except ModuleNotFoundError:
     import DotsAndBoxes.BasicPlayers as BasicPlayers
+    import DotsAndBoxes.ChainAnalysis as ChainAnalysis
+    import DotsAndBoxes.MonteCarloArrayTree as MonteCarloArrayTree
+    import DotsAndBoxes.Rollout as Rollout
+    import DotsAndBoxes.ParallelMonteCarlo as ParallelMonteCarlo
 import time
-import random
 import math
 
 class MonteCarloPlayer(BasicPlayers.RandomPlayer):
@@ -16,7 +23,7 @@ class MonteCarloPlayer(BasicPlayers.RandomPlayer):
     This player implements Monte Carlo Tree Search. The search uses two supporting
     classes, Monte Carlo Tree and Monte Carlo Node.
     """
-    def __init__(self, playerIndex, colour="red", timeLimit=2, c=1.4142):
+    def __init__(self, playerIndex, colour="red", timeLimit=2, c=1.4142, endgame=True, arrayTree=False, batchSize=1, workers=1, parallel="root", transpositions=False, maxNodes=None):
         """
         Override for Monte Carlo Player.
         Args:
@@ -24,10 +31,37 @@ class MonteCarloPlayer(BasicPlayers.RandomPlayer):
             colour(str): Colour for the UI to render. Defaults to Red
             timeLimit(int/float): Time limit in seconds for moves
             c(float): Exploration parameter for MCTS
+            endgame(bool): Play positions with no safe moves left exactly,
+                using chain and loop analysis, instead of searching them.
+            arrayTree(bool): Store the tree in arrays rather than node objects,
+                which uses far less memory for long searches.
+            batchSize(int): Number of random games played from each new node.
+                Batches are played all at once if NumPy is installed.
+            workers(int): Number of processes searching at once.
+            parallel(str): "root" for each worker to grow its own tree, or
+                "tree" for the workers to share one tree.
+            transpositions(bool): Share one node between all of the move
+                orders that reach the same position.
+            maxNodes(int): Most nodes the tree can grow to before the least
+                visited ones are pruned. None for no limit.
         """
         self.index = playerIndex
         self.colour = colour
-        self.tree = MonteCarloTree(playerIndex, timeLimit, c)
+        self.endgame = endgame
+        if transpositions and (workers > 1 or arrayTree):
+            raise ValueError("transpositions only work with the object tree, with one worker and arrayTree off.")
+        if workers > 1 and parallel == "tree":
+            # The shared tree is allocated up front, and stops growing when full.
+            if maxNodes is None:
+                self.tree = ParallelMonteCarlo.TreeParallelTree(playerIndex, timeLimit, c, batchSize, workers)
+            else:
+                self.tree = ParallelMonteCarlo.TreeParallelTree(playerIndex, timeLimit, c, batchSize, workers, maxNodes)
+        elif workers > 1:
+            self.tree = ParallelMonteCarlo.RootParallelTree(playerIndex, timeLimit, c, batchSize, arrayTree, workers, maxNodes)
+        elif arrayTree:
+            self.tree = MonteCarloArrayTree.MonteCarloArrayTree(playerIndex, timeLimit, c, batchSize, maxNodes)
+        else:
+            self.tree = MonteCarloTree(playerIndex, timeLimit, c, batchSize, transpositions, maxNodes=maxNodes)
 
     def chooseMove(self, game):
         """
@@ -38,6 +72,12 @@ class MonteCarloPlayer(BasicPlayers.RandomPlayer):
         Returns:
             3-tuple(int): Move to make
         """
+        # Once there are no safe moves left the best move can be worked out
+        # exactly. The tree catches up with these moves on the next search.
+        if self.endgame:
+            move = ChainAnalysis.endgame_move(game)
+            if move is not None:
+                return move
         # first we need to update the tree with the new game state
         self.tree.update(game)
         # Then get the next move to be made.
@@ -51,14 +91,31 @@ class MonteCarloPlayer(BasicPlayers.RandomPlayer):
         return "{}_monty".format(self.index)
 
 class MonteCarloTree:
-    def __init__(self, index, timeLimit=2, c=1.4142):
+    def __init__(self, index, timeLimit=2, c=1.4142, batchSize=1, transpositions=False, tableSize=100000, maxNodes=None):
         """
         Monte Carlo Tree class
+        With transpositions, nodes are kept in a table by the hash of their
+        position, and a move that reaches a position already in the table
+        links to its node instead of making a new one. The tree becomes a
+        graph where a node can have more than one parent.
+        With maxNodes, the least visited half of the tree is pruned whenever
+        it reaches that many nodes, so long searches don't run out of memory.
         """
         self.index = index
         self.c = c
         self.timeLimit = timeLimit
+        # Number of random games played from each new node.
+        self.batchSize = batchSize
         self.root = None
+        if transpositions:
+            self.table = NodeTable(tableSize)
+        else:
+            self.table = None
+        self.maxNodes = maxNodes
+        self.nodeCount = 0
+        # Iterations, time taken and iterations per second for the last move,
+        # and the size of the tree.
+        self.searchStats = {}
 
     def update(self, game):
         """
@@ -78,8 +135,26 @@ class MonteCarloTree:
         Args:
             game(Game): game state to start search from.
         """
-        self.root = MonteCarloNode(self.index, game, (0,0,0), "Root", self.c)
-        self.root.makeChildren()
+        if self.maxNodes is not None and self.maxNodes < MonteCarloArrayTree.min_nodes(game.width, game.height):
+            raise ValueError("maxNodes must be at least {} on a {}x{} board.".format(MonteCarloArrayTree.min_nodes(game.width, game.height), game.width, game.height))
+        self.root = self.makeRoot(game, "Root")
+        self.nodeCount = 1
+
+    def makeRoot(self, game, name):
+        """
+        Makes a root node for a game, with a fresh table if using transpositions.
+        Args:
+            game(Game): game state of the root
+            name(str): debug name for the node
+        Returns:
+            MonteCarloNode
+        """
+        if self.table is None:
+            return MonteCarloNode(self.index, game, (0,0,0), name, self.c)
+        self.table.clear()
+        root = MonteCarloDAGNode(self.index, game, (0,0,0), name, self.c, None, self.table)
+        self.table.store(hash(game), root)
+        return root
 
     def nextMove(self):
         """
@@ -88,30 +163,114 @@ class MonteCarloTree:
             3-tuple(int): Move to make
         """
         #print("Choosing move. root.n = {}".format(self.root.n))
-        current = self.root.chooseChild()
+        self.search()
+        # pick the best child and make this the new root node.
+        #print("Chosen move. root.n = {}".format(self.root.n))
+        bestChild = self.root.bestChild()
+        move = [m for m, child in self.root.edges() if child is bestChild][0]
+        self.setRoot(bestChild)
+        # then return that move
+        #print("New root.n = {}".format(self.root.n))
+        return move
+
+    def setRoot(self, node):
+        """
+        Makes a node the root of the tree. With transpositions, the table is
+        cut down to the nodes that can still be reached.
+        Args:
+            node(MonteCarloNode): new root
+        """
+        self.root = node
+        self.root.parent = None
+        if self.table is not None:
+            self.table.rebuild(self.root)
+        self.nodeCount = len(self.nodes())
+
+    def nodes(self):
+        """
+        Every node that can be reached from the root, each one once.
+        Returns:
+            List[MonteCarloNode]: nodes in breadth first order
+        """
+        queue = [self.root]
+        seen = {id(self.root)}
+        k = 0
+        while k < len(queue):
+            for child in queue[k].children:
+                if id(child) not in seen:
+                    seen.add(id(child))
+                    queue.append(child)
+            k += 1
+        return queue
+
+    def prune(self):
+        """
+        Frees about half of the tree by cutting the links to every child with
+        no more visits than the median. Nodes that can't be reached from the
+        root any more are freed. In a tree that means everything below a cut
+        child goes too. With transpositions, a node can have more visits than
+        one of its parents, so it is kept if another parent still links to it.
+        The moves of removed children can be tried again.
+        """
+        nodes = self.nodes()
+        visits = sorted(node.n for node in nodes)
+        minVisits = visits[len(visits)//2]
+        for node in nodes:
+            node.prune(minVisits)
+        if self.table is not None:
+            self.table.rebuild(self.root)
+        self.nodeCount = len(self.nodes())
+
+    def search(self):
+        """
+        Grow the tree from the root until the time limit runs out.
+        """
         no_iterations = 0
+        prunes = 0
         startTime = time.time()
         timeTaken = time.time() - startTime
         while timeTaken <= self.timeLimit:
-            if current.game.is_finished() or current.n == 0:
-                # the rollout method also handles the backpropagation step.
-                current.rollout()
-                # after rollout reset to root.
-                current = self.root
-                no_iterations += 1
-                # recalculating here saves a little bit of time.
-                timeTaken = time.time() - startTime
-            # the next node is the best child of the current node.
-            current = current.chooseChild()
+            if self.maxNodes is not None and self.nodeCount >= self.maxNodes:
+                self.prune()
+                prunes += 1
+            # Walk down the tree from the root, keeping the path taken, until
+            # reaching a new node or the end of the game.
+            current = self.root.chooseChild()
+            path = [self.root, current]
+            while not (current.game.is_finished() or current.n == 0):
+                # the next node is the best child of the current node.
+                current = current.chooseChild()
+                path.append(current)
+            # Play random games from there and add the results to every node
+            # on the path.
+            if current.n == 0:
+                self.nodeCount += 1
+            if self.batchSize > 1:
+                eval = current.simulateBatch(self.batchSize)
+            else:
+                eval = current.simulate()
+            for node in path:
+                node.n += self.batchSize
+                node.t += eval
+            no_iterations += 1
+            # recalculating here saves a little bit of time.
+            timeTaken = time.time() - startTime
             # that's it that's the algorithm
-        # pick the best child and make this the new root node.
-        #print("Chosen move. root.n = {}".format(self.root.n))
-        bestChild = self.root.chooseChild()
-        self.root = bestChild
-        self.root.parent = None
-        # then return that move
-        #print("New root.n = {}".format(self.root.n))
-        return self.root.move
+        self.searchStats = {
+            "iterations": no_iterations,
+            "time": timeTaken,
+            "iterationsPerSecond": no_iterations/timeTaken if timeTaken > 0 else 0,
+            "nodes": self.nodeCount,
+            "prunes": prunes
+        }
+
+    def rootStats(self):
+        """
+        Visits and wins for each child of the root.
+        Returns:
+            List[Tuple(3-tuple(int), float, float)]: (move, visits, wins)
+        """
+        return [(move, child.n, child.t) for move, child in self.root.edges()]
 
     def newRoot(self, game):
         """
@@ -124,22 +283,19 @@ class MonteCarloTree:
         movesMade = game.movesMade[len(self.root.game.movesMade):len(game.movesMade)]
         # go through each move in order
         for move in movesMade:
-            if newRoot.children:
-                # if this node has children, find the one that corresponds to the move made
-                for child in newRoot.children:
-                    if child.move == move:
-                        # then make this the new root node
-                        newRoot = child
-                        break
+            # find the child that corresponds to the move made
+            for childMove, child in newRoot.edges():
+                if childMove == move:
+                    # then make this the new root node
+                    newRoot = child
+                    break
             else:
                 #print("Building new root")
-                # if the node doesn't have children then make a fresh new root node
-                newRoot = MonteCarloNode(self.index, game, (0,0,0), "NewRoot", self.c)
-                newRoot.makeChildren()
+                # if the child hasn't been made yet then make a fresh new root node
+                newRoot = self.makeRoot(game, "NewRoot")
                 break
 
-        self.root = newRoot
-        self.root.parent = None
+        self.setRoot(newRoot)
 
 class MonteCarloNode:
     def __init__(self, playerIndex, game, move, name, c=1.4142, parent=None):
@@ -165,25 +321,61 @@ class MonteCarloNode:
         # sqrt(2) ~~ 1.4142
         self.c = c
         self.children = []
+        # Moves that don't have a child yet, last move first. Filled in the
+        # first time a child is chosen.
+        self.untriedMoves = None
 
     def chooseChild(self):
         """
         Choose the best child node based on UCB values.
+        Children that haven't been visited always have the highest UCB, so
+        they are chosen first, in board order. That means children only need
+        to be made when they are first chosen.
         """
-        if not self.children:
-            self.makeChildren()
+        if self.untriedMoves is None:
+            self.untriedMoves = self.game.get_all_legal_moves()[::-1]
+        if self.children and self.children[-1].n == 0:
+            return self.children[-1]
+        if self.untriedMoves:
+            return self.makeChild(self.untriedMoves.pop())
         bestValue = 0
         # This picks the first node by default
         bestNode = self.children[0]
+        # The log term is the same for every child, so only work it out once.
+        logN = math.log(self.n) if self.n > 0 else 0.0
         for node in self.children:
-            ucb = node.ucb()
+            ucb = node.ucb(logN)
             if ucb > bestValue:
                 bestValue = ucb
                 bestNode = node
 
         return bestNode
 
-    def ucb(self):
+    def edges(self):
+        """
+        The move to each child, with the child.
+        Returns:
+            List[Tuple(3-Tuple[int], MonteCarloNode)]
+        """
+        return [(child.move, child) for child in self.children]
+
+    def bestChild(self):
+        """
+        Choose the child to play once the search is over, which is the one
+        with the most visits. Ties go to the most wins. Unlike chooseChild,
+        no statistics are changed, and an unvisited child is never chosen
+        over a visited one.
+        Returns:
+            MonteCarloNode
+        """
+        if not self.children:
+            # Nothing was searched, so make a child for the first move.
+            if self.untriedMoves is None:
+                self.untriedMoves = self.game.get_all_legal_moves()[::-1]
+            return self.makeChild(self.untriedMoves.pop())
+        return max(self.children, key=lambda child: (child.n, child.t))
+
+    def ucb(self, logN=None):
         """
         Calculate Upper Confidence Bound for node.
         To calculate UCB, an exploitation and exploration parameter are calculated
@@ -191,6 +383,8 @@ class MonteCarloNode:
         exploration is a factor of how many times this node has already been chosen
         c is the exploration coefficient. Altering this value will change the rate of
         exploration.
+        Args:
+            logN(float): log of the parent's visit count, if already known.
         Returns:
             float: Upper Confidence Bound for node.
         """
@@ -198,49 +392,86 @@ class MonteCarloNode:
             return 1000000
         if self.parent is None:
             return -1
+        if logN is None:
+            logN = math.log(self.parent.n)
         exploitation = self.t/self.n
-        exploration =  self.c*math.sqrt(math.log(self.parent.n)/self.n)
+        exploration =  self.c*math.sqrt(logN/self.n)
         return exploitation + exploration
 
-    def makeChildren(self):
+    def makeChild(self, move):
+        """
+        Create a child node for a move, with its own copy of the game.
+        Args:
+            move(3-Tuple[int]): Move made to get to the child
+        Returns:
+            MonteCarloNode: the new child
+        """
+        newName = self.name+"-"+str(len(self.children))
+        # Make new node with player index, new game state, move made, new name and parent.
+        child = MonteCarloNode(self.playerIndex, self.makeMove(move), move, newName, self.c, self)
+        self.children.append(child)
+        return child
+
+    def prune(self, minVisits):
         """
-        Create child nodes for this node. Each move that can be made will spawn
-        a new child node.
+        Removes the children with minVisits visits or fewer, and everything
+        below them. Their moves go back to being untried.
+        Args:
+            minVisits(float): most visits a child can have and be removed
         """
-        moves = self.game.get_all_legal_moves()
-        for i, m in enumerate(moves):
-            newName = self.name+"-"+str(i)
-            # Make new node with player index, new game state, move made, new name and parent.
-            self.children.append(MonteCarloNode(self.playerIndex, self.makeMove(m), m, newName, self.c, self))
-        #self.children = [MonteCarloNode(self.playerIndex, self.makeMove(m), m, self) for m in moves]
+        kept = [child for child in self.children if child.n > minVisits]
+        if len(kept) < len(self.children):
+            self.children = kept
+            keptMoves = {child.move for child in kept}
+            self.untriedMoves = [m for m in self.game.get_all_legal_moves()[::-1] if m not in keptMoves]
 
     def rollout(self):
         """
         Rollout will take the state and play random moves until the game is finished.
         The end state will then be evaluated and backpropagated.
         """
-        copyGame = self.game.get_copy()
-        moves = copyGame.get_all_legal_moves()
-        random.shuffle(moves)
-        for move in moves:
-            copyGame.take_turn(move)
-        # 1 + True = 2. 1 + False = 1
-        eval = (copyGame.winner() == self.playerIndex)
         # we then call our own backpropagate method to send the values up the tree
-        self.backpropagate(eval)
+        self.backpropagate(self.simulate())
+
+    def simulate(self):
+        """
+        Play random moves from this node's state until the game is finished.
+        The random game is played by the rollout engine, so self.game isn't changed.
+        Returns:
+            Bool: True if the Monte Carlo player won the random game.
+        """
+        game = self.game
+        engine = Rollout.get_engine(game.width, game.height, game.maxPlayers)
+        return engine.winner(game) == self.playerIndex
+
+    def simulateBatch(self, count):
+        """
+        Play count random games from this node's state, all at once if NumPy
+        is installed. self.game isn't changed.
+        Args:
+            count(int): number of games to play
+        Returns:
+            int: number of games the Monte Carlo player won.
+        """
+        game = self.game
+        engine = Rollout.get_batch_engine(game.width, game.height, game.maxPlayers)
+        return engine.wins(game, self.playerIndex, count)
 
-    def backpropagate(self, eval):
+    def backpropagate(self, eval, visits=1):
         """
         Backpropagate method to send values all the way back to the root of the tree.
         Also recalculate ucb for each node on the way.
         Args:
-            eval(Bool): True for win, False for not win.
+            eval(Bool/int): True for win, False for not win. Or the number of
+                wins, for a batch of games.
+            visits(int): number of games played
         """
-        self.n += 1
-        # t + True = t+1, t + False = t
-        self.t += eval
-        if self.parent is not None:
-            self.parent.backpropagate(eval)
+        node = self
+        while node is not None:
+            node.n += visits
+            # t + True = t+1, t + False = t
+            node.t += eval
+            node = node.parent
 
     def makeMove(self, move):
         """
@@ -272,3 +503,174 @@ class MonteCarloNode:
         else:
             childStr = "  Node has no children.\n"
         return returnStr + childStr
+
+class MonteCarloDAGNode(MonteCarloNode):
+    """
+    Monte Carlo node for a tree with transpositions. A child can be shared
+    with other nodes that reach the same position by a different order of
+    moves, so its visits and wins come from all of those paths.
+    Each node keeps its own count of how many times it has chosen each child,
+    as the child's visits also count other parents. UCB uses the child's
+    shared win rate, which has more samples, and this node's own counts for
+    the exploration part.
+    """
+    def __init__(self, playerIndex, game, move, name, c=1.4142, parent=None, table=None):
+        """
+        Args:
+            playerIndex: Index that the Monte Carlo player has
+            game(Game): Gamestate this node represents
+            move(3-Tuple[int]): Move made to first reach this node
+            name(str): debug parameter
+            c(float): exploration parameter.
+            parent(MonteCarloNode): First parent of this node. None for root node.
+            table(NodeTable): table of nodes shared by the whole tree
+        """
+        super().__init__(playerIndex, game, move, name, c, parent)
+        self.table = table
+        # The move to each child, and how many times each has been chosen here.
+        self.childMoves = []
+        self.choices = []
+        self.totalChoices = 0
+
+    def edges(self):
+        """
+        The move to each child, with the child.
+        Returns:
+            List[Tuple(3-Tuple[int], MonteCarloNode)]
+        """
+        return list(zip(self.childMoves, self.children))
+
+    def prune(self, minVisits):
+        """
+        Removes the links to children with minVisits visits or fewer. Their
+        moves go back to being untried.
+        Args:
+            minVisits(float): most visits a child can have and be removed
+        """
+        kept = [i for i, child in enumerate(self.children) if child.n > minVisits]
+        if len(kept) < len(self.children):
+            self.children = [self.children[i] for i in kept]
+            self.childMoves = [self.childMoves[i] for i in kept]
+            self.choices = [self.choices[i] for i in kept]
+            keptMoves = set(self.childMoves)
+            self.untriedMoves = [m for m in self.game.get_all_legal_moves()[::-1] if m not in keptMoves]
+
+    def chooseChild(self):
+        """
+        Choose a child node. Every move is tried once, in board order, then
+        the child with the best UCB is chosen.
+        """
+        if self.untriedMoves is None:
+            self.untriedMoves = self.game.get_all_legal_moves()[::-1]
+        if self.untriedMoves:
+            self.makeChild(self.untriedMoves.pop())
+            best = len(self.children) - 1
+        else:
+            logN = math.log(self.totalChoices) if self.totalChoices > 0 else 0.0
+            bestValue = 0
+            best = 0
+            for i, node in enumerate(self.children):
+                if node.n == 0:
+                    ucb = 1000000
+                else:
+                    ucb = node.t/node.n + self.c*math.sqrt(logN/self.choices[i])
+                if ucb > bestValue:
+                    bestValue = ucb
+                    best = i
+        # Every choice is followed by a rollout, so choices count visits
+        # through this node to the child.
+        self.choices[best] += 1
+        self.totalChoices += 1
+        return self.children[best]
+
+    def makeChild(self, move):
+        """
+        Link to the node for the position after a move, making it if it isn't
+        in the table yet.
+        Args:
+            move(3-Tuple[int]): Move made to get to the child
+        Returns:
+            MonteCarloNode: the child
+        """
+        # The hash of the position after the move, without copying the game.
+        self.game.take_turn(move)
+        key = hash(self.game)
+        self.game.undo_move()
+        child = self.table.lookup(key)
+        if child is None:
+            newName = self.name+"-"+str(len(self.children))
+            child = MonteCarloDAGNode(self.playerIndex, self.makeMove(move), move, newName, self.c, self, self.table)
+            self.table.store(key, child)
+        self.children.append(child)
+        self.childMoves.append(move)
+        self.choices.append(0)
+        return child
+
+class NodeTable:
+    """
+    Table of Monte Carlo nodes, keyed by the hash of their position. It holds
+    at most maxEntries nodes. When it is full the oldest entry is dropped,
+    which only means that position won't be shared any more.
+    """
+    def __init__(self, maxEntries=100000):
+        """
+        Args:
+            maxEntries(int): Most nodes the table can hold.
+        """
+        self.maxEntries = maxEntries
+        self.nodes = {}
+
+    def clear(self):
+        """
+        Empties the table.
+        """
+        self.nodes = {}
+
+    def lookup(self, key):
+        """
+        Finds the node for a position.
+        Args:
+            key(int): hash of the position
+        Returns:
+            MonteCarloNode or None
+        """
+        return self.nodes.get(key)
+
+    def store(self, key, node):
+        """
+        Adds the node for a position.
+        Args:
+            key(int): hash of the position
+            node(MonteCarloNode): node for the position
+        """
+        if len(self.nodes) >= self.maxEntries:
+            # Dicts keep insertion order, so this is the oldest entry.
+            del self.nodes[next(iter(self.nodes))]
+        self.nodes[key] = node
+
+    def rebuild(self, root):
+        """
+        Keeps only the nodes that can be reached from a new root, so the
+        rest of the old tree can be freed.
+        Args:
+            root(MonteCarloNode): new root of the tree
+        """
+        nodes = {hash(root.game): root}
+        # Breadth first, so if there are too many the ones nearest the root
+        # are kept.
+        queue = [root]
+        k = 0
+        while k < len(queue) and len(nodes) < self.maxEntries:
+            for child in queue[k].children:
+                key = hash(child.game)
+                if key not in nodes and len(nodes) < self.maxEntries:
+                    nodes[key] = child
+                    queue.append(child)
+            k += 1
+        self.nodes = nodes
+
+    def __len__(self):
+        """
+        Number of nodes in the table.
+        """
+        return len(self.nodes)
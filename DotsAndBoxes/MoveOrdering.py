@@ -0,0 +1,84 @@
+class MoveOrderer:
+    """
+    Orders moves for alpha-beta search so the best moves are likely to be
+    searched first, which lets the search prune far more of the tree.
+    Moves are searched in this order:
+        the best move already known for the position (from the transposition
+        table, which holds the principal variation of the last pass)
+        moves that complete a box
+        killer moves that caused a cutoff at the same depth
+        safe moves, that don't draw the third side of a box
+        moves that draw the third side of a box, giving the opponent a box
+    Within each group, moves with a better history score come first, then
+    moves are kept in board order.
+    """
+    def __init__(self, killersPerDepth=2):
+        """
+        Initialise the orderer with empty killer and history tables.
+        Args:
+            killersPerDepth(int): Number of killer moves remembered per depth.
+        """
+        self.killersPerDepth = killersPerDepth
+        self.killers = {}
+        self.history = {}
+
+    def newSearch(self):
+        """
+        Called at the start of each move. Killer moves are forgotten, as they
+        belong to a different position. History scores are halved so that
+        old results count for less.
+        """
+        self.killers = {}
+        for move in self.history:
+            self.history[move] //= 2
+
+    def order(self, game, moves, depth, bestMove=None):
+        """
+        Sorts moves into the order they should be searched.
+        Args:
+            game(Game): Game that the moves will be made in
+            moves(List[3-tuple(int)]): Legal moves in the game
+            depth(int): Remaining search depth
+            bestMove(3-tuple(int)): Move to search first, if any
+        Returns:
+            List[3-tuple(int)]
+        """
+        killers = self.killers.get(depth, ())
+        lineBoxSides = game.line_box_sides
+        first = []
+        captures = []
+        killerMoves = []
+        safe = []
+        thirdSide = []
+        for move in moves:
+            sides = lineBoxSides(move)
+            if move == bestMove:
+                first.append(move)
+            elif 3 in sides:
+                captures.append(move)
+            elif move in killers:
+                killerMoves.append(move)
+            elif 2 in sides:
+                thirdSide.append(move)
+            else:
+                safe.append(move)
+        # Sorting is stable, so moves with the same history stay in board order.
+        if self.history:
+            score = lambda m: -self.history.get(m, 0)
+            safe.sort(key=score)
+            thirdSide.sort(key=score)
+        return first + captures + killerMoves + safe + thirdSide
+
+    def recordCutoff(self, move, depth):
+        """
+        Remembers a move that caused an alpha-beta cutoff.
+        Args:
+            move(3-tuple(int)): Move that caused the cutoff
+            depth(int): Remaining search depth where the cutoff happened
+        """
+        killers = self.killers.setdefault(depth, [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[self.killersPerDepth:]
+        # Cutoffs found by deeper searches are worth more.
+        self.history[move] = self.history.get(move, 0) + depth*depth
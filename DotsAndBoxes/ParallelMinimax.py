@@ -0,0 +1,185 @@
+try:
+    import MinimaxPlayer
+except ModuleNotFoundError:
+    import DotsAndBoxes.MinimaxPlayer as MinimaxPlayer
+from multiprocessing.connection import wait
+import multiprocessing
+
+def search_worker(connection, alpha, lock, index, ttSize, moveOrdering, endgame):
+    """
+    Runs in each worker process. The worker keeps its own MinimaxPlayer, so
+    its transposition table lasts between moves.
+    Messages it is sent:
+        ("game", game, deadline): the game to search moves in, and the time
+            searches have to stop by.
+        ("search", move, depth): search a root move to a depth. Sends back
+            (move, score, alpha used, nodes), or (move, None, None, nodes) if
+            the deadline passed first.
+        None: stop.
+    Args:
+        connection(Connection): worker's end of the pipe
+        alpha(Value): best root score found so far, shared by every worker
+        lock(Lock): lock for alpha
+        index(int): Index that the Minimax player has
+        ttSize(int): Max entries in the worker's transposition table
+        moveOrdering(bool): Sort moves before searching them
+        endgame(bool): Solve positions with no safe moves left exactly
+    """
+    player = MinimaxPlayer.MinimaxPlayer(index, ttSize=ttSize, moveOrdering=moveOrdering, endgame=endgame)
+    game = None
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+        if message[0] == "game":
+            game, player.deadline = message[1], message[2]
+            if player.tt is not None:
+                player.tt.newSearch()
+            continue
+        move, depth = message[1], message[2]
+        player.nodeCount = 0
+        stackSize = len(game.moveStack)
+        # Use the best score any worker has found so far as the bound.
+        alphaUsed = alpha.value
+        try:
+            game.take_turn(move)
+            score = player.getScore(game, depth, alphaUsed, 10000)
+            game.undo_move()
+        except MinimaxPlayer.SearchTimeout:
+            while len(game.moveStack) > stackSize:
+                game.undo_move()
+            connection.send((move, None, None, player.nodeCount))
+            continue
+        with lock:
+            if score > alpha.value:
+                alpha.value = score
+        connection.send((move, score, alphaUsed, player.nodeCount))
+    connection.close()
+
+class RootSplitSearch:
+    """
+    Searches the root moves of a minimax search in parallel, using the Young
+    Brothers Wait idea. The first move (the best move from the last pass) is
+    searched on its own first, to get a good alpha bound. Then the other moves
+    are handed out to the worker processes one at a time, as each worker
+    becomes free. The best score found so far is shared by every worker and
+    used as the alpha bound for each new move.
+    A move searched with a higher alpha than its score only gets an upper
+    bound, not its real score, so it can't be chosen over the move that set
+    the bound.
+    """
+    def __init__(self, player, workers=2, ttSize=100000, moveOrdering=False):
+        """
+        Args:
+            player(MinimaxPlayer): player the search is for. The first move is
+                searched by this player.
+            workers(int): Number of worker processes
+            ttSize(int): Max entries in each worker's transposition table
+            moveOrdering(bool): Workers sort moves before searching them
+        """
+        self.player = player
+        self.workers = workers
+        self.processes = []
+        self.connections = []
+        self.alpha = multiprocessing.Value("d", -10000)
+        self.settings = (player.index, ttSize, moveOrdering, player.endgame)
+
+    def start(self):
+        """
+        Starts the worker processes.
+        """
+        for k in range(self.workers):
+            parentEnd, workerEnd = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=search_worker, daemon=True,
+                args=(workerEnd, self.alpha, self.alpha.get_lock()) + self.settings)
+            process.start()
+            workerEnd.close()
+            self.processes.append(process)
+            self.connections.append(parentEnd)
+
+    def newSearch(self, game, deadline):
+        """
+        Sends the game and the deadline to the workers, at the start of a move.
+        Args:
+            game(Game): Game that the player is making a move in
+            deadline(float): time.time() that the search has to stop by
+        """
+        if not self.processes:
+            self.start()
+        for connection in self.connections:
+            connection.send(("game", game, deadline))
+
+    def searchRoot(self, game, moves, depth, previousBest=None):
+        """
+        Searches every move at the root of the tree to a fixed depth, in
+        parallel. Works the same way as MinimaxPlayer.searchRoot.
+        Args:
+            game(Game): Game that the player is making a move in
+            moves(List[3-tuple(int)]): Legal moves in the game
+            depth(int): depth to search each move to
+            previousBest(3-tuple(int)): best move from the last pass, or None
+        Returns:
+            3-tuple(int): best move found.
+        Raises:
+            SearchTimeout: if the deadline passed before every move was searched
+        """
+        if previousBest is not None:
+            moves = [previousBest] + [m for m in moves if m != previousBest]
+        # The eldest brother is searched first, on its own.
+        game.take_turn(moves[0])
+        firstScore = self.player.getScore(game, depth, -10000, 10000)
+        game.undo_move()
+        self.alpha.value = firstScore
+        scores = {moves[0]: firstScore}
+        # Then the younger brothers, in parallel.
+        waiting = moves[1:][::-1]
+        busy = []
+        timedOut = False
+        for connection in self.connections:
+            if waiting:
+                connection.send(("search", waiting.pop(), depth))
+                busy.append(connection)
+        while busy:
+            for connection in wait(busy):
+                move, score, alphaUsed, nodes = connection.recv()
+                self.player.nodeCount += nodes
+                if score is None:
+                    timedOut = True
+                elif score > alphaUsed:
+                    scores[move] = score
+                # Once one search runs out of time, the others will too, so
+                # there's no point starting any more.
+                if waiting and not timedOut:
+                    connection.send(("search", waiting.pop(), depth))
+                else:
+                    busy.remove(connection)
+        if timedOut:
+            raise MinimaxPlayer.SearchTimeout()
+        # When moves score the same, the first one in search order is kept.
+        bestMove = moves[0]
+        bestScore = firstScore
+        for move in moves:
+            if move in scores and scores[move] > bestScore:
+                bestScore = scores[move]
+                bestMove = move
+        return bestMove
+
+    def close(self):
+        """
+        Stops the worker processes.
+        """
+        for connection in self.connections:
+            try:
+                connection.send(None)
+                connection.close()
+            except (OSError, ValueError):
+                pass
+        for process in self.processes:
+            process.join(1)
+            if process.is_alive():
+                process.terminate()
+        self.processes = []
+        self.connections = []
+
+    def __del__(self):
+        self.close()
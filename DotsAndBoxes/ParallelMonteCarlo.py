@@ -0,0 +1,451 @@
+try:
+    import MonteCarloPlayer
+    import MonteCarloArrayTree
+    import Rollout
+    import Game
+except ModuleNotFoundError:
+    import DotsAndBoxes.MonteCarloPlayer as MonteCarloPlayer
+    import DotsAndBoxes.MonteCarloArrayTree as MonteCarloArrayTree
+    import DotsAndBoxes.Rollout as Rollout
+    import DotsAndBoxes.Game as Game
+from multiprocessing.sharedctypes import RawArray, RawValue
+import multiprocessing
+import random
+import time
+
+def tree_worker(connection, index, timeLimit, c, batchSize, arrayTree, seed, maxNodes=None):
+    """
+    Runs in each worker process. The worker keeps its own tree between moves.
+    For every game it is sent, it moves its tree on to that game, searches for
+    the time limit and sends back the stats of the root's children. It stops
+    when it is sent None.
+    Args:
+        connection(Connection): worker's end of the pipe
+        index(int): Index that the Monte Carlo player has
+        timeLimit(int/float): Time limit in seconds for moves
+        c(float): Exploration parameter for MCTS
+        batchSize(int): Number of random games played from each new node
+        arrayTree(bool): Use MonteCarloArrayTree instead of MonteCarloTree
+        seed(int): Seed for this worker's random games
+        maxNodes(int): Most nodes the worker's tree can hold. None for no limit.
+    """
+    # Every worker needs different random games, or the trees would all be the same.
+    random.seed(seed)
+    if arrayTree:
+        tree = MonteCarloArrayTree.MonteCarloArrayTree(index, timeLimit, c, batchSize, maxNodes)
+    else:
+        tree = MonteCarloPlayer.MonteCarloTree(index, timeLimit, c, batchSize, maxNodes=maxNodes)
+    while True:
+        game = connection.recv()
+        if game is None:
+            break
+        tree.update(game)
+        tree.search()
+        connection.send((tree.rootStats(), tree.searchStats))
+    connection.close()
+
+class RootParallelTree:
+    """
+    Root parallel Monte Carlo Tree Search. Each worker process grows its own
+    tree from the same root for the whole time limit, then the visits and wins
+    of the root's children are added up over all of the trees to choose the
+    move. Workers keep their trees between moves, so the search carries on
+    from where it was, just as with a single tree.
+    Has the same update and nextMove methods as MonteCarloTree.
+    """
+    def __init__(self, index, timeLimit=2, c=1.4142, batchSize=1, arrayTree=False, workers=2, maxNodes=None):
+        """
+        Args:
+            index(int): Index that the Monte Carlo player has
+            timeLimit(int/float): Time limit in seconds for moves
+            c(float): Exploration parameter for MCTS
+            batchSize(int): Number of random games played from each new node
+            arrayTree(bool): Workers use MonteCarloArrayTree instead of MonteCarloTree
+            workers(int): Number of worker processes
+            maxNodes(int): Most nodes each worker's tree can hold. None for no limit.
+        """
+        self.index = index
+        self.timeLimit = timeLimit
+        self.c = c
+        self.batchSize = batchSize
+        self.arrayTree = arrayTree
+        self.workers = workers
+        self.maxNodes = maxNodes
+        self.processes = []
+        self.connections = []
+        self.game = None
+        # Iterations, time taken and iterations per second for the last move,
+        # added up over all of the workers.
+        self.searchStats = {}
+        self.stats = []
+
+    def start(self):
+        """
+        Starts the worker processes.
+        """
+        # Worker seeds come from random, so random.seed still makes the
+        # search repeatable.
+        seed = random.getrandbits(32)
+        for k in range(self.workers):
+            parentEnd, workerEnd = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=tree_worker, daemon=True,
+                args=(workerEnd, self.index, self.timeLimit, self.c, self.batchSize, self.arrayTree, seed + k, self.maxNodes))
+            process.start()
+            workerEnd.close()
+            self.processes.append(process)
+            self.connections.append(parentEnd)
+
+    def update(self, game):
+        """
+        Updates the tree with a new game. The workers move their own trees on
+        when they are sent the game.
+        Args:
+            game(Game): game state to start search from.
+        """
+        if not self.processes:
+            self.start()
+        self.game = game
+
+    def nextMove(self):
+        """
+        Has every worker search from the current game, then chooses the move
+        with the most visits over all of the trees.
+        Returns:
+            3-tuple(int): Move to make
+        """
+        self.search()
+        # Most visits is the most searched move. Ties go to the most wins.
+        best = max(self.stats, key=lambda s: (s[1], s[2]))
+        return best[0]
+
+    def search(self):
+        """
+        Sends the game to every worker and waits for them all to search it.
+        The merged stats of the root's children are kept in self.stats.
+        """
+        startTime = time.time()
+        for connection in self.connections:
+            connection.send(self.game)
+        results = [connection.recv() for connection in self.connections]
+        timeTaken = time.time() - startTime
+        # Add up the visits and wins for each move, keeping the moves in order.
+        totals = {}
+        for rootStats, searchStats in results:
+            for move, visits, wins in rootStats:
+                oldVisits, oldWins = totals.get(move, (0, 0))
+                totals[move] = (oldVisits + visits, oldWins + wins)
+        self.stats = [(move, visits, wins) for move, (visits, wins) in totals.items()]
+        iterations = sum(searchStats["iterations"] for rootStats, searchStats in results)
+        self.searchStats = {
+            "iterations": iterations,
+            "time": timeTaken,
+            "iterationsPerSecond": iterations/timeTaken if timeTaken > 0 else 0,
+            "workers": self.workers,
+            "nodes": sum(searchStats["nodes"] for rootStats, searchStats in results),
+            "prunes": sum(searchStats["prunes"] for rootStats, searchStats in results)
+        }
+
+    def rootStats(self):
+        """
+        Visits and wins for each child of the root, added up over all of the
+        workers' trees.
+        Returns:
+            List[Tuple(3-tuple(int), float, float)]: (move, visits, wins)
+        """
+        return self.stats
+
+    def close(self):
+        """
+        Stops the worker processes.
+        """
+        for connection in self.connections:
+            try:
+                connection.send(None)
+                connection.close()
+            except (OSError, ValueError):
+                pass
+        for process in self.processes:
+            process.join(1)
+            if process.is_alive():
+                process.terminate()
+        self.processes = []
+        self.connections = []
+
+    def __del__(self):
+        self.close()
+
+def shared_tree_worker(connection, tree, seed):
+    """
+    Runs in each worker process of a TreeParallelTree. For every game it is
+    sent, the worker searches the shared tree from that game for the time
+    limit and sends back the number of iterations. It stops when it is sent None.
+    Args:
+        connection(Connection): worker's end of the pipe
+        tree(TreeParallelTree): the shared tree
+        seed(int): Seed for this worker's random games
+    """
+    random.seed(seed)
+    # The pipes and processes belong to the main process.
+    tree.processes = []
+    tree.connections = []
+    while True:
+        game = connection.recv()
+        if game is None:
+            break
+        connection.send(tree.searchShared(game))
+    connection.close()
+
+class TreeParallelTree(MonteCarloArrayTree.MonteCarloArrayTree):
+    """
+    Tree parallel Monte Carlo Tree Search. There is one tree, stored in shared
+    memory arrays with the same layout as MonteCarloArrayTree, and every
+    worker process walks down and updates it at the same time.
+    While a worker walks down the tree it adds a virtual loss to each node on
+    its path: a visit with no win, which makes the path look worse to the
+    other workers until the real result is added, so the workers spread out
+    over the tree instead of all following the same path.
+    A lock is held while a node's children are added, so a node is only
+    expanded once, and while the visits and wins on a path are changed, as
+    an update can otherwise be lost when two workers write the same node. A
+    lost update at the root can be the whole of another worker's time slice.
+    The tree has a fixed number of nodes. When it is full, rollouts are
+    played from the leaves without expanding them.
+    """
+    def __init__(self, index, timeLimit=2, c=1.4142, batchSize=1, workers=2, maxNodes=500000, virtualLoss=1):
+        """
+        Args:
+            index(int): Index that the Monte Carlo player has
+            timeLimit(int/float): Time limit in seconds for moves
+            c(float): Exploration parameter for MCTS
+            batchSize(int): Number of random games played from each new node
+            workers(int): Number of worker processes
+            maxNodes(int): Most nodes the tree can hold. Memory is allocated
+                up front for this many nodes.
+            virtualLoss(int): Visits added to each node on a worker's path
+        """
+        self.maxNodes = maxNodes
+        self.workers = workers
+        self.virtualLoss = virtualLoss
+        self.size = RawValue("l", 0)
+        self.lock = multiprocessing.Lock()
+        self.sharedVisits = RawArray("d", maxNodes)
+        self.sharedWins = RawArray("d", maxNodes)
+        self.sharedParent = RawArray("i", maxNodes)
+        self.sharedMove = RawArray("i", maxNodes)
+        self.sharedFirstChild = RawArray("i", maxNodes)
+        self.sharedChildCount = RawArray("i", maxNodes)
+        self.processes = []
+        self.connections = []
+        super().__init__(index, timeLimit, c, batchSize, maxNodes)
+
+    def clear(self):
+        """
+        Removes every node from the tree. The shared arrays are kept.
+        """
+        self.visits = self.sharedVisits
+        self.wins = self.sharedWins
+        self.parent = self.sharedParent
+        self.move = self.sharedMove
+        self.firstChild = self.sharedFirstChild
+        self.childCount = self.sharedChildCount
+        self.size.value = 0
+
+    def addNode(self, parent, move, visits=0.0, wins=0.0):
+        """
+        Adds a node after the last node in the shared arrays.
+        Args:
+            parent(int): index of the parent node, -1 for the root
+            move(int): index in self.moves of the move made to reach this node
+            visits(float): visit count to start with
+            wins(float): win count to start with
+        Returns:
+            int: index of the new node
+        """
+        node = self.size.value
+        self.visits[node] = visits
+        self.wins[node] = wins
+        self.parent[node] = parent
+        self.move[node] = move
+        self.firstChild[node] = -1
+        self.childCount[node] = 0
+        self.size.value = node + 1
+        return node
+
+    def expand(self, node):
+        """
+        Create child nodes for a node, one for each legal move, unless another
+        worker already has. self.game must be at the node's position.
+        Args:
+            node(int): node to expand
+        Returns:
+            bool: False if the tree is too full to add the children.
+        """
+        with self.lock:
+            if self.firstChild[node] != -1:
+                return True
+            moves = self.game.get_all_legal_moves()
+            if self.size.value + len(moves) > self.maxNodes:
+                return False
+            first = self.size.value
+            for m in moves:
+                self.addNode(node, self.moveIndex[m])
+            self.childCount[node] = len(moves)
+            # Set last, so other workers only see the node once its children are ready.
+            self.firstChild[node] = first
+        return True
+
+    def start(self):
+        """
+        Starts the worker processes.
+        """
+        seed = random.getrandbits(32)
+        for k in range(self.workers):
+            parentEnd, workerEnd = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=shared_tree_worker, daemon=True,
+                args=(workerEnd, self, seed + k))
+            process.start()
+            workerEnd.close()
+            self.processes.append(process)
+            self.connections.append(parentEnd)
+
+    def search(self):
+        """
+        Has every worker search the shared tree from the root until the time
+        limit runs out.
+        """
+        if not self.processes:
+            self.start()
+        startTime = time.time()
+        for connection in self.connections:
+            connection.send(self.game)
+        iterations = sum(connection.recv() for connection in self.connections)
+        timeTaken = time.time() - startTime
+        self.searchStats = {
+            "iterations": iterations,
+            "time": timeTaken,
+            "iterationsPerSecond": iterations/timeTaken if timeTaken > 0 else 0,
+            "workers": self.workers
+        }
+
+    def searchShared(self, game):
+        """
+        The search run by each worker. Walks down the shared tree from the
+        root, adding virtual loss to each node as it is chosen, plays random
+        games from the node it reaches and then swaps the virtual loss for
+        the results.
+        Args:
+            game(Game): game at the root of the tree
+        Returns:
+            int: number of iterations
+        """
+        if not self.moves:
+            self.setupMoves(game)
+        self.game = game
+        visits = self.visits
+        wins = self.wins
+        virtualLoss = self.virtualLoss
+        batchSize = self.batchSize
+        if batchSize > 1:
+            engine = Rollout.get_batch_engine(game.width, game.height, game.maxPlayers)
+        else:
+            engine = Rollout.get_engine(game.width, game.height, game.maxPlayers)
+        iterations = 0
+        startTime = time.time()
+        timeTaken = 0
+        lock = self.lock
+        while timeTaken <= self.timeLimit:
+            path = [0]
+            node = 0
+            with lock:
+                visits[0] += virtualLoss
+            while self.firstChild[node] != -1 or self.expand(node):
+                # Each node gets its virtual loss as soon as it is chosen, so
+                # workers walking down the tree at the same time spread out,
+                # and keep it while the random games are played.
+                with lock:
+                    node = self.chooseChild(node)
+                    unvisited = visits[node] == 0
+                    visits[node] += virtualLoss
+                game.take_turn(self.moves[self.move[node]])
+                path.append(node)
+                if unvisited or game.is_finished():
+                    break
+            if batchSize > 1:
+                eval = engine.wins(game, self.index, batchSize)
+            else:
+                eval = (engine.winner(game) == self.index)
+            # Swap the virtual loss for the real result.
+            with lock:
+                for node in path:
+                    visits[node] += batchSize - virtualLoss
+                    wins[node] += eval
+            depth = len(path) - 1
+            for i in range(depth):
+                game.undo_move()
+            iterations += 1
+            timeTaken = time.time() - startTime
+        return iterations
+
+    def close(self):
+        """
+        Stops the worker processes.
+        """
+        RootParallelTree.close(self)
+
+    def __getstate__(self):
+        """
+        Workers get the shared arrays and lock, but not the pipes and processes.
+        """
+        state = self.__dict__.copy()
+        state["processes"] = []
+        state["connections"] = []
+        return state
+
+    def nodeBytes(self):
+        """
+        Returns the memory used by the shared node arrays, in bytes.
+        """
+        return self.maxNodes*(8 + 8 + 4 + 4 + 4 + 4)
+
+    def __len__(self):
+        """
+        Number of nodes in the tree.
+        """
+        return self.size.value
+
+    def __del__(self):
+        self.close()
+
+def benchmark(sizes=((5, 5), (6, 6)), workers=2, timeLimit=2, moves=3):
+    """
+    Compares tree parallel and root parallel search. Each plays the first few
+    moves of a game on each board size, against itself, and the average
+    rollouts per second and visits to the chosen move are printed.
+    Args:
+        sizes(List[Tuple(int)]): board sizes to try
+        workers(int): number of worker processes for both searches
+        timeLimit(int/float): time for each move, in seconds
+        moves(int): number of moves to search on each board
+    """
+    print("{:>6} {:>15} {:>12} {:>12}".format("board", "search", "rollouts/s", "best visits"))
+    for width, height in sizes:
+        for name, makeTree in [
+                ("root parallel", lambda: RootParallelTree(1, timeLimit, workers=workers, arrayTree=True)),
+                ("tree parallel", lambda: TreeParallelTree(1, timeLimit, workers=workers))]:
+            tree = makeTree()
+            game = Game.Game(width, height)
+            rates = []
+            bestVisits = []
+            try:
+                for i in range(moves):
+                    tree.update(game.get_copy())
+                    tree.search()
+                    stats = tree.rootStats()
+                    best = max(stats, key=lambda s: s[1])
+                    rates.append(tree.searchStats["iterationsPerSecond"])
+                    bestVisits.append(best[1])
+                    game.take_turn(best[0])
+            finally:
+                tree.close()
+            print("{:>6} {:>15} {:>12.0f} {:>12.0f}".format("{}x{}".format(width, height), name,
+                sum(rates)/len(rates), sum(bestVisits)/len(bestVisits)))
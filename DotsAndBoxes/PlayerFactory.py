@@ -17,7 +17,7 @@ class PlayerFactory:
     def __init__(self):
         self.playerTypes = ["Human Player", "Random Player", "Ordered Player", "Minimax Player", "Monte Carlo Player"]
 
-    def makePlayer(self, playerType, index, colour="red", timeLimit=None, maxDepth=20, c=1.4):
+    def makePlayer(self, playerType, index, colour="red", timeLimit=None, maxDepth=20, c=1.4, moveOrdering=False, arrayTree=False, batchSize=1, workers=1, parallel="root", transpositions=False, maxNodes=None):
         """
         Factory method for returning correct player type.
         If for some reason playerType isn't in the internal list, just return a
@@ -29,6 +29,13 @@ class PlayerFactory:
             timeLimit(int) - 1: Time limit for the complex AI players.
             maxDepth(int) - 20: Max depth that Minimax player can reach.
             c(float) - 1.4: Exploration parameter for Monte Carlo player.
+            moveOrdering(bool) - False: Whether Minimax player sorts moves before searching.
+            arrayTree(bool) - False: Whether Monte Carlo player stores its tree in arrays.
+            batchSize(int) - 1: Random games Monte Carlo player plays from each new node.
+            workers(int) - 1: Processes Minimax and Monte Carlo players search with.
+            parallel(str) - 'root': Whether Monte Carlo workers grow their own trees ('root') or share one ('tree').
+            transpositions(bool) - False: Whether Monte Carlo player shares nodes between move orders that reach the same position.
+            maxNodes(int) - None: Nodes Monte Carlo player's tree can grow to before it is pruned.
         Returns:
             Player - One of the player types.
         """
@@ -42,11 +49,11 @@ class PlayerFactory:
             if timeLimit is None:
                 # switch so that different players have different default time limits.
                 timeLimit = 5
-            return MinimaxPlayer(index, colour, timeLimit, maxDepth)
+            return MinimaxPlayer(index, colour, timeLimit, maxDepth, moveOrdering=moveOrdering, workers=workers)
         elif playerType == "Monte Carlo Player":
             if timeLimit is None:
                 # switch so that different players have different default time limits.
                 timeLimit = 5
-            return MonteCarloPlayer(index, colour, timeLimit, c)
+            return MonteCarloPlayer(index, colour, timeLimit, c, arrayTree=arrayTree, batchSize=batchSize, workers=workers, parallel=parallel, transpositions=transpositions, maxNodes=maxNodes)
         else:
             return HumanPlayer(index, colour)
@@ -1,30 +1,45 @@
 import re
 import os
 
-def get_games(filename):
+def is_score_line(line):
+    """
+    Checks if a line of a results file is the final score of a game, like "5, 4".
+    Args:
+        line(str): line from a results file
+    Returns:
+        bool
+    """
+    return re.match(r"\d+, *\d+\s*$", line) is not None
+
+def get_games(filename, names=None):
     """
     Looks at a results file and turns it into a list of games.
     Games are a list of all associated moves and the final score.
     args:
         filename(str): filename for results file
+        names(List[str]): names of the two players. By default they are
+            read from a filename like 1_Random_2_Ordered_3x3.txt
     returns:
         list[][str]
     """
     with open(filename, "r") as infile:
         lines = infile.readlines()
-    fnList = filename.split("_")
-    p1name = fnList[1]
-    p2name = fnList[3]
-    width = int(fnList[4][0])
-    height = int(fnList[4][2])
-    no_moves = ((width-1)*height + (height-1)*width)+2
+    if names is None:
+        # Only the file's own name, as folder names can have "_" in them too.
+        fnList = os.path.basename(filename).split("_")
+        names = [fnList[1], fnList[3]]
+    p1name, p2name = names
+    # Each game starts with a "WxH" line. Games on variant boards have fewer
+    # moves, so games can't be split by length.
     games = []
-    start = 0
-    end = no_moves
-    while end <= len(lines):
-        game = lines[start:end]
-        games.append(game)
-        start, end = end, end+no_moves
+    for line in lines:
+        if re.match(r"\d+x\d+\s*$", line):
+            games.append([])
+        if games:
+            games[-1].append(line)
+    # A game that was still being written, or cut off when a run stopped,
+    # has no score line.
+    games = [game for game in games if is_score_line(game[-1])]
     games.append([p1name, p2name])
     return games
 
@@ -71,8 +86,8 @@ def count_winners(games):
         print("{} player winrate: {}%".format(names[1], 100*p2wins/(p1wins+p2wins+draws)))
     return [p1wins, p2wins, draws]
 
-def get_scores(filename):
-    games = get_games(filename)
+def get_scores(filename, names=None):
+    games = get_games(filename, names)
     count_winners(games)
 
 
@@ -0,0 +1,240 @@
+try:
+    import BitboardGame
+except ModuleNotFoundError:
+    import DotsAndBoxes.BitboardGame as BitboardGame
+import random
+# NumPy is optional. Without it batches are played one game at a time.
+try:
+    import numpy as np
+except ModuleNotFoundError:
+    np = None
+
+# Engines are shared by every game of the same size and player count.
+_engines = {}
+_batchEngines = {}
+
+class RolloutEngine:
+    """
+    Plays random games to the end as fast as possible, for Monte Carlo rollouts.
+    Instead of making moves in a Game, which checks legality and updates lines,
+    boxes, move lists and hashes, the engine only keeps a flat list of the
+    number of sides drawn for each box, and uses a precomputed table of the
+    boxes next to each edge. Nothing is kept apart from the final score.
+    Edges and boxes are numbered as in BitboardGame.
+    """
+    def __init__(self, width, height, maxPlayers=2):
+        """
+        Build the lookup tables for a board size.
+        Args:
+            width: int
+            height: int
+            maxPlayers: int (2)
+        """
+        moves, edgeIndex, edgeBoxes, boxMasks = BitboardGame.get_tables(width, height)
+        self.width = width
+        self.height = height
+        self.maxPlayers = maxPlayers
+        self.edgeIndex = edgeIndex
+        self.edgeBoxes = edgeBoxes
+        self.boxCount = len(boxMasks)
+
+    def get_state(self, game):
+        """
+        Reads the position of a game into the engine's flat form.
+        Args:
+            game(Game): Game to read. BitboardGame works too.
+        Returns:
+            Tuple(List[int], List[int]): the edges not drawn yet, and the
+                number of sides drawn for each box.
+        """
+        edgeIndex = self.edgeIndex
+        edgeBoxes = self.edgeBoxes
+        edges = [edgeIndex[m] for m in game.get_all_legal_moves()]
+        # Every side of a box is drawn, apart from the edges that are left.
+        sides = [4]*self.boxCount
+        for e in edges:
+            for b in edgeBoxes[e]:
+                sides[b] -= 1
+        return edges, sides
+
+    def play(self, game):
+        """
+        Plays a random game from the game's position to the end. The game
+        itself isn't changed.
+        Args:
+            game(Game): Game to start from
+        Returns:
+            List[int]: boxes owned by each player at the end of the game,
+                indexed by player. Index 0 is unused.
+        """
+        edges, sides = self.get_state(game)
+        # Sorting on random keys is about twice as fast as random.shuffle.
+        rand = random.random
+        edges.sort(key=lambda e: rand())
+        scores = game.get_scores()
+        scores = [scores.get(p, 0) for p in range(self.maxPlayers+1)]
+        scores[0] = 0
+        edgeBoxes = self.edgeBoxes
+        maxPlayers = self.maxPlayers
+        player = game.currentPlayer
+        for e in edges:
+            claimed = False
+            for b in edgeBoxes[e]:
+                s = sides[b] + 1
+                sides[b] = s
+                if s == 4:
+                    scores[player] += 1
+                    claimed = True
+            # Same as Game.increment_player, the turn only passes on when no
+            # box was claimed.
+            if not claimed:
+                player = player % maxPlayers + 1
+        return scores
+
+    def winner(self, game):
+        """
+        Plays a random game from the game's position and returns who won,
+        the same way as Game.winner.
+        Args:
+            game(Game): Game to start from
+        Returns:
+            int: index of the winning player, or 0 for a draw.
+        """
+        scores = self.play(game)
+        if scores[1] == scores[2]:
+            return 0
+        elif scores[1] > scores[2]:
+            return 1
+        else:
+            return 2
+
+    def wins(self, game, player, count):
+        """
+        Plays count random games from the game's position, one at a time.
+        Args:
+            game(Game): Game to start from
+            player(int): player to count wins for
+            count(int): number of games to play
+        Returns:
+            int: number of games player won
+        """
+        return sum(self.winner(game) == player for i in range(count))
+
+class BatchRolloutEngine:
+    """
+    Plays a batch of random games from the same position all at once, using
+    NumPy. Each row of a 2-D array is one game, so every step of the loop
+    draws one line in every game, and looks up and updates the boxes next to
+    those lines for all of the games together.
+    """
+    def __init__(self, width, height, maxPlayers=2):
+        """
+        Build the incidence table for a board size.
+        Args:
+            width: int
+            height: int
+            maxPlayers: int (2)
+        """
+        moves, edgeIndex, edgeBoxes, boxMasks = BitboardGame.get_tables(width, height)
+        self.engine = get_engine(width, height, maxPlayers)
+        self.maxPlayers = maxPlayers
+        self.boxCount = len(boxMasks)
+        # incidence[e] is the two boxes next to edge e. Edges on the side of
+        # the board only have one, so the other is boxCount, an extra box
+        # that is never counted.
+        self.incidence = np.full((len(moves), 2), self.boxCount)
+        for e, boxes in enumerate(edgeBoxes):
+            self.incidence[e, :len(boxes)] = boxes
+
+    def play(self, game, count):
+        """
+        Plays count random games from the game's position to the end. The game
+        itself isn't changed.
+        Args:
+            game(Game): Game to start from
+            count(int): number of games to play
+        Returns:
+            numpy.ndarray: count x (maxPlayers+1) array of the boxes owned by
+                each player at the end of each game. Column 0 is unused.
+        """
+        edges, sides = self.engine.get_state(game)
+        # Seeded from random, so random.seed still makes searches repeatable.
+        rng = np.random.default_rng(random.getrandbits(64))
+        # Each row is a random order of the edges that are left.
+        order = np.array(edges, dtype=np.intp)[np.argsort(rng.random((count, len(edges))), axis=1)]
+        # The box sides of every game are kept in one flat array, with a row
+        # of boxCount+1 for each game, so the boxes next to each line drawn
+        # can be looked up for every game up front.
+        width = self.boxCount + 1
+        boxSides = np.tile(np.array(sides + [0]), count)
+        offsets = (np.arange(count)*width)[:, None]
+        first = self.incidence[order, 0] + offsets
+        second = self.incidence[order, 1] + offsets
+        hasSecond = self.incidence[order, 1] != self.boxCount
+        gameScores = game.get_scores()
+        scores = np.zeros((count, self.maxPlayers+1), dtype=np.intp)
+        for p in range(1, self.maxPlayers+1):
+            scores[:, p] = gameScores.get(p, 0)
+        scores = scores.ravel()
+        scoreRows = np.arange(count)*(self.maxPlayers+1)
+        players = np.full(count, game.currentPlayer, dtype=np.intp)
+        for t in range(len(edges)):
+            a = first[:, t]
+            b = second[:, t]
+            boxSides[a] += 1
+            boxSides[b] += 1
+            claimed = (boxSides[a] == 4).astype(np.intp)
+            claimed += (boxSides[b] == 4) & hasSecond[:, t]
+            scores[scoreRows + players] += claimed
+            # The turn only passes on in games where no box was claimed.
+            players = np.where(claimed == 0, players % self.maxPlayers + 1, players)
+        scores = scores.reshape(count, self.maxPlayers+1)
+        return scores
+
+    def wins(self, game, player, count):
+        """
+        Plays count random games from the game's position, all at once.
+        Args:
+            game(Game): Game to start from
+            player(int): player to count wins for
+            count(int): number of games to play
+        Returns:
+            int: number of games player won, decided the same way as Game.winner
+        """
+        scores = self.play(game, count)
+        other = 2 if player == 1 else 1
+        return int(np.count_nonzero(scores[:, player] > scores[:, other]))
+
+def get_engine(width, height, maxPlayers=2):
+    """
+    Returns the shared RolloutEngine for a board size, making it if needed.
+    Args:
+        width: int
+        height: int
+        maxPlayers: int (2)
+    Returns:
+        RolloutEngine
+    """
+    key = (width, height, maxPlayers)
+    if key not in _engines:
+        _engines[key] = RolloutEngine(width, height, maxPlayers)
+    return _engines[key]
+
+def get_batch_engine(width, height, maxPlayers=2):
+    """
+    Returns the shared engine for playing batches of rollouts on a board size.
+    This is a BatchRolloutEngine if NumPy is installed, and the RolloutEngine
+    otherwise, which plays the games one at a time.
+    Args:
+        width: int
+        height: int
+        maxPlayers: int (2)
+    Returns:
+        BatchRolloutEngine or RolloutEngine
+    """
+    if np is None:
+        return get_engine(width, height, maxPlayers)
+    key = (width, height, maxPlayers)
+    if key not in _batchEngines:
+        _batchEngines[key] = BatchRolloutEngine(width, height, maxPlayers)
+    return _batchEngines[key]
@@ -0,0 +1,266 @@
+try:
+    import League
+    import MatchRunner
+except ModuleNotFoundError:
+    import DotsAndBoxes.League as League
+    import DotsAndBoxes.MatchRunner as MatchRunner
+import argparse
+import ast
+import itertools
+import math
+import os
+import random
+
+def grid(space):
+    """
+    Every combination of the values in a parameter space.
+    Args:
+        space(dict): {parameter: [values]}
+    Returns:
+        List[dict]: one config for each combination
+    """
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+
+def random_configs(space, count, rng=random):
+    """
+    Random configs from a parameter space. A list of values is chosen from,
+    and a (low, high) tuple is sampled from evenly, as an int if both ends
+    are ints.
+    Args:
+        space(dict): {parameter: [values] or (low, high)}
+        count(int): number of configs
+        rng(Random): random number generator to use
+    Returns:
+        List[dict]
+    """
+    configs = []
+    for i in range(count):
+        config = {}
+        for key, values in space.items():
+            if isinstance(values, tuple):
+                low, high = values
+                if isinstance(low, int) and isinstance(high, int):
+                    config[key] = rng.randint(low, high)
+                else:
+                    config[key] = round(rng.uniform(low, high), 4)
+            else:
+                config[key] = rng.choice(values)
+        configs.append(config)
+    return configs
+
+class Sweep:
+    """
+    Tries configs of one player type against a fixed opponent, to find the
+    best settings for parameters like c, timeLimit and maxDepth. Every
+    config plays half of its games going first and half going second, and
+    is scored by its share of the points (a draw is half a point).
+    The games of every config are played at once, shared over a pool of
+    worker processes by MatchRunner.run_matches.
+    """
+    def __init__(self, playerType, configs, opponent="Random Player", width=3, height=3, variant="american", resultsDir="Results"):
+        """
+        Args:
+            playerType(str): PlayerFactory player type to sweep, eg "Monte Carlo Player",
+                or a player spec with options every config shares, eg "monte:timeLimit=1"
+            configs(List[dict]): makePlayer options for each config. These
+                replace any of the same options in playerType.
+            opponent(str): player spec every config plays against
+            width(int): board width
+            height(int): board height
+            variant(str): "american", "swedish" or "random"
+            resultsDir(str): folder to make the sweep's results folder in
+        """
+        self.playerType, self.options = MatchRunner.parse_player_spec(playerType)
+        # Random configs can repeat, and each one needs its own results files.
+        self.configs = []
+        self.specs = []
+        for config in configs:
+            options = dict(self.options)
+            options.update(config)
+            spec = "{}:{}".format(self.playerType, ",".join("{}={}".format(k, v) for k, v in options.items()))
+            if spec not in self.specs:
+                self.configs.append(config)
+                self.specs.append(spec)
+        self.folder = os.path.join(resultsDir, "sweep-{}-{}-{}x{}".format(self.playerType.split()[0], variant, width, height))
+        if not os.path.exists(self.folder):
+            os.makedirs(self.folder)
+        # runners[i] has config i first, then config i second. A and B keep
+        # the files apart when a config is the same player as the opponent.
+        self.runners = []
+        opponentName = "B-" + League.entrant_name(opponent)
+        for spec in self.specs:
+            name = "A-" + League.entrant_name(spec)
+            pair = [MatchRunner.MatchRunner(spec, opponent, width, height, variant, self.folder, [name, opponentName]),
+                MatchRunner.MatchRunner(opponent, spec, width, height, variant, self.folder, [opponentName, name])]
+            for runner in pair:
+                open(runner.filename(), "w+").close()
+            self.runners.append(pair)
+        # Points and games for each config, and games started in each order.
+        self.points = [0.0]*len(self.configs)
+        self.games = [0]*len(self.configs)
+        self.started = [[0, 0] for config in self.configs]
+
+    def play(self, indices, games, workers=1, seed=None, verbose=True):
+        """
+        Plays more games for some of the configs, all at once.
+        Args:
+            indices(List[int]): configs to play
+            games(int): games to add for each of them
+            workers(int): number of processes to play games in
+            seed(int): seed for the games. By default, the seed saved in the
+                results files by the first call, or a random one.
+            verbose(bool): print progress
+        """
+        jobs = []
+        owners = []
+        for i in indices:
+            for order in range(2):
+                # The first order gets the odd game out.
+                count = (games + 1 - order)//2
+                runner = self.runners[i][order]
+                jobs.append((runner, runner.filename(), self.started[i][order], count))
+                owners.append((i, order))
+                self.started[i][order] += count
+
+        def finished(j, results):
+            i, order = owners[j]
+            for text, winner in results:
+                if winner == order + 1:
+                    self.points[i] += 1
+                elif winner == 0:
+                    self.points[i] += 0.5
+                self.games[i] += 1
+
+        MatchRunner.run_matches(jobs, workers, seed, verbose=verbose, callback=finished)
+
+    def score(self, i):
+        """
+        Share of the points a config has won.
+        Args:
+            i(int): config
+        Returns:
+            float: between 0 and 1, 0 with no games
+        """
+        return self.points[i]/self.games[i] if self.games[i] else 0.0
+
+    def run(self, games, workers=1, seed=None, verbose=True):
+        """
+        Plays every config for the same number of games.
+        Args:
+            games(int): games for each config
+            workers(int): number of processes to play games in
+            seed(int): seed for the games. Random by default.
+            verbose(bool): print progress, and the table at the end
+        """
+        self.play(range(len(self.configs)), games, workers, seed, verbose)
+        if verbose:
+            print(self)
+
+    def successiveHalving(self, games, eta=2, workers=1, seed=None, verbose=True):
+        """
+        Successive halving. Every config plays a few games, then only the
+        best 1/eta of them go on to the next round, which has eta times as
+        many games, until one config is left. Most of the games go to the
+        configs that are still in the running.
+        Args:
+            games(int): games for each config in the first round
+            eta(int): how much the field is cut down by each round
+            workers(int): number of processes to play games in
+            seed(int): seed for the games. Random by default.
+            verbose(bool): print progress, and the table after each round
+        Returns:
+            int: the best config
+        """
+        if seed is None:
+            seed = random.getrandbits(32)
+        alive = list(range(len(self.configs)))
+        while True:
+            self.play(alive, games, workers, seed, verbose)
+            alive.sort(key=lambda i: -self.score(i))
+            if verbose:
+                print(self)
+            if len(alive) == 1:
+                return alive[0]
+            alive = alive[:max(1, len(alive)//eta)]
+            games *= eta
+
+    def table(self):
+        """
+        The configs from best to worst.
+        Returns:
+            List[Tuple(str, float, float, int)]: spec, score, half width of
+                its 95% interval and games played
+        """
+        rows = []
+        for i, spec in enumerate(self.specs):
+            score = self.score(i)
+            interval = 1.96*math.sqrt(score*(1 - score)/self.games[i]) if self.games[i] else 1.0
+            rows.append((spec, score, interval, self.games[i]))
+        # Configs that got further in successive halving have played more
+        # games, and go first.
+        return sorted(rows, key=lambda row: (-row[3], -row[1]))
+
+    def __str__(self):
+        lines = ["{:<4}{:<56}{:>8}{:>8}{:>7}".format("", "Config", "Score", "+/-", "Games")]
+        for rank, (spec, score, interval, games) in enumerate(self.table()):
+            lines.append("{:<4}{:<56}{:>8.3f}{:>8.3f}{:>7}".format(rank+1, spec, score, interval, games))
+        return "\n".join(lines)
+
+def parse_space(params):
+    """
+    Turns parameter strings from the command line into a parameter space.
+    "c=0.7,1.4,2" is a list of values and "c=0.5:3.0" is a range.
+    Args:
+        params(List[str]): parameter strings
+    Returns:
+        dict: {parameter: [values] or (low, high)}
+    """
+    space = {}
+    for param in params:
+        key, _, values = param.partition("=")
+        if ":" in values:
+            low, high = values.split(":")
+            space[key] = (ast.literal_eval(low), ast.literal_eval(high))
+        else:
+            space[key] = [ast.literal_eval(v) for v in values.split(",")]
+    return space
+
+def main(args=None):
+    """
+    Command line entry point for sweeps.
+    >python DotsAndBoxes sweep monte --param c=0.7,1.0,1.4,2.0 --param timeLimit=0.5 --games 50
+    >python DotsAndBoxes sweep minimax --param maxDepth=1:6 --search halving --samples 8
+    Args:
+        args(List[str]): command line arguments, sys.argv[2:] by default
+    """
+    parser = argparse.ArgumentParser(prog="DotsAndBoxes sweep", description="Find the best parameters for a player type.")
+    parser.add_argument("playerType", help='player type, eg "Monte Carlo Player" or "monte", with any options every config shares, eg "monte:timeLimit=0.5"')
+    parser.add_argument("--param", action="append", default=[], help="NAME=V1,V2,... for values or NAME=LOW:HIGH for a range")
+    parser.add_argument("--search", default="grid", choices=["grid", "random", "halving"])
+    parser.add_argument("--samples", type=int, default=8, help="configs to sample for random search, or halving over ranges")
+    parser.add_argument("--games", type=int, default=20, help="games for each config (in the first round for halving)")
+    parser.add_argument("--eta", type=int, default=2, help="how much halving cuts the field by each round")
+    parser.add_argument("--opponent", default="Random Player", help="player spec every config plays against")
+    parser.add_argument("--size", default="3x3", help="board size as WIDTHxHEIGHT")
+    parser.add_argument("--variant", default="american", choices=list(MatchRunner.VARIANTS))
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="number of processes to play games in")
+    parser.add_argument("--seed", type=int, default=None)
+    options = parser.parse_args(args)
+    space = parse_space(options.param)
+    rng = random.Random(options.seed)
+    ranges = any(isinstance(values, tuple) for values in space.values())
+    if options.search == "random" or (options.search == "halving" and ranges):
+        configs = random_configs(space, options.samples, rng)
+    elif ranges:
+        parser.error("grid search needs lists of values, not ranges")
+    else:
+        configs = grid(space)
+    width, height = (int(x) for x in options.size.lower().split("x"))
+    sweep = Sweep(options.playerType, configs, options.opponent, width, height, options.variant)
+    if options.search == "halving":
+        best = sweep.successiveHalving(options.games, options.eta, options.workers, options.seed)
+    else:
+        sweep.run(options.games, options.workers, options.seed)
+        best = sweep.specs.index(sweep.table()[0][0])
+    print("\nBest config: {}".format(sweep.specs[best]))
@@ -0,0 +1,90 @@
+# Bound types for stored scores.
+EXACT = 0
+LOWERBOUND = 1
+UPPERBOUND = 2
+
+class TranspositionTable:
+    """
+    Fixed size table of search results, keyed by the Zobrist hash of a game.
+    Each slot has two entries. The depth-preferred entry is only replaced by a
+    search at least as deep, or by any result once it is left over from an
+    older search, so expensive results survive without filling the table
+    with stale ones. The always-replace entry takes everything else, so
+    recent results are still kept.
+    Entries are tuples of (hash, depth, score, bound, bestMove).
+    """
+    def __init__(self, maxEntries=100000):
+        """
+        Initialise an empty table.
+        Args:
+            maxEntries(int): Most entries the table can hold. Memory is
+                allocated up front for this many entries.
+        """
+        self.slots = max(1, maxEntries // 2)
+        self.clear()
+
+    def clear(self):
+        """
+        Empties the table and resets the statistics.
+        """
+        self.depthPreferred = [None]*self.slots
+        self.alwaysReplace = [None]*self.slots
+        # Search each depth-preferred entry was stored in.
+        self.ages = [0]*self.slots
+        self.age = 0
+        self.hits = 0
+        self.misses = 0
+
+    def newSearch(self):
+        """
+        Starts a new search. Depth-preferred entries from earlier searches
+        can then be replaced by shallower results.
+        """
+        self.age += 1
+
+    def lookup(self, key):
+        """
+        Finds the entry stored for a position.
+        Args:
+            key(int): hash of the position
+        Returns:
+            Tuple or None: (hash, depth, score, bound, bestMove) if found.
+        """
+        slot = key % self.slots
+        entry = self.depthPreferred[slot]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        entry = self.alwaysReplace[slot]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, score, bound, bestMove):
+        """
+        Stores a search result for a position.
+        Args:
+            key(int): hash of the position
+            depth(int): depth the position was searched to
+            score(int): score found by the search
+            bound(int): EXACT, LOWERBOUND or UPPERBOUND
+            bestMove(3-tuple(int)): best move found, or None
+        """
+        slot = key % self.slots
+        entry = (key, depth, score, bound, bestMove)
+        old = self.depthPreferred[slot]
+        if old is None or depth >= old[1] or self.ages[slot] != self.age:
+            self.depthPreferred[slot] = entry
+            self.ages[slot] = self.age
+        elif old[0] != key:
+            self.alwaysReplace[slot] = entry
+        # A shallower result for the position in the depth-preferred entry is
+        # dropped, as lookup always finds the deeper one first.
+
+    def __len__(self):
+        """
+        Number of entries currently stored.
+        """
+        return (self.slots - self.depthPreferred.count(None)) + (self.slots - self.alwaysReplace.count(None))
@@ -0,0 +1,50 @@
+import random
+
+# Tables are shared by every game of the same size and player count.
+_tables = {}
+
+class ZobristTable:
+    """
+    Random keys for Zobrist hashing of game positions. A position's hash is the
+    XOR of the keys for every drawn line, every claimed box (one key per owner)
+    and the player whose turn it is. Each change to the game only needs to XOR
+    the keys that changed, so games can keep their hash up to date cheaply.
+    """
+    def __init__(self, width, height, maxPlayers=2):
+        """
+        Generate the keys for a board size. The generator is seeded from the
+        board size, so every process makes the same keys for the same board.
+        Args:
+            width: int
+            height: int
+            maxPlayers: int (2)
+        """
+        rng = random.Random(width*1000 + height*10 + maxPlayers)
+        # One key for each line, in the same order as the legal moves.
+        self.lines = {}
+        for i in range(height):
+            for j in range(width-1):
+                self.lines[(0, i, j)] = rng.getrandbits(64)
+        for i in range(width):
+            for j in range(height-1):
+                self.lines[(1, i, j)] = rng.getrandbits(64)
+        # boxes[i][j][owner] is the key for box (i, j) owned by owner. An
+        # unclaimed box contributes nothing.
+        self.boxes = [[[0] + [rng.getrandbits(64) for p in range(maxPlayers)]
+            for j in range(width-1)] for i in range(height-1)]
+        self.players = [0] + [rng.getrandbits(64) for p in range(maxPlayers)]
+
+def get_table(width, height, maxPlayers=2):
+    """
+    Returns the shared ZobristTable for a board size, making it if needed.
+    Args:
+        width: int
+        height: int
+        maxPlayers: int (2)
+    Returns:
+        ZobristTable
+    """
+    key = (width, height, maxPlayers)
+    if key not in _tables:
+        _tables[key] = ZobristTable(width, height, maxPlayers)
+    return _tables[key]
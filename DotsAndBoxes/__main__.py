@@ -1,27 +1,67 @@
 import sys
 import os
-from PyQt5.QtWidgets import QApplication
-import GameGUI
-import Experiment
 import ReadStatistics
 
 def main():
+    # PyQt is only imported for the paths that open a window, so matches can
+    # be played on machines without a display or PyQt installed.
     if len(sys.argv) > 1:
         # This means the program can be used to read results files from command line
         # >python DotsAndBoxes Results\\1_minimax_2_monty_3x3.txt
         if os.path.isfile(sys.argv[1]):
-            ReadStatistics.get_scores(sys.argv[1])
-        # this is to run specific experiment in Experiment.
-        elif int(sys.argv[1]) == 2:
-            Experiment.tournament()
+            if sys.argv[1].endswith(".dbr"):
+                import BinaryResults
+                BinaryResults.get_scores(sys.argv[1])
+            else:
+                ReadStatistics.get_scores(sys.argv[1])
+        # Convert text results files to binary ones, with an index. Existing
+        # binary files are only replaced with --overwrite.
+        # >python DotsAndBoxes convert Results\\1_minimax_2_monty_3x3.txt
+        elif sys.argv[1] == "convert":
+            import BinaryResults
+            overwrite = "--overwrite" in sys.argv[2:]
+            for filename in sys.argv[2:]:
+                if filename == "--overwrite":
+                    continue
+                count = BinaryResults.convert_text(filename, overwrite=overwrite)
+                print("Converted {} games from {}.".format(count, filename))
+        # Play games between two players without the GUI
+        # >python DotsAndBoxes match "Random Player" "Monte Carlo Player:timeLimit=1" --size 3x3 --games 100
+        elif sys.argv[1] == "match":
+            import MatchRunner
+            MatchRunner.main(sys.argv[2:])
+        # Rate every AI player against each other in a round robin league
+        # >python DotsAndBoxes league --sizes 3x3 4x4 --games 20 --workers 4
+        elif sys.argv[1] == "league":
+            import League
+            League.main(sys.argv[2:])
+        # Test players against a baseline, stopping as soon as each is decided
+        # >python DotsAndBoxes ab "monte:timeLimit=1,c=1.0" --baseline "monte:timeLimit=1,c=1.4142"
+        elif sys.argv[1] == "ab":
+            import ABTest
+            ABTest.main(sys.argv[2:])
+        # Find the best parameters for a player type
+        # >python DotsAndBoxes sweep monte --param c=0.7,1.4,2.0 --param timeLimit=0.5 --games 50
+        elif sys.argv[1] == "sweep":
+            import Sweep
+            Sweep.main(sys.argv[2:])
+        # this is to run the tournament, in parallel
+        # >python DotsAndBoxes 2 --workers 8 --resume
+        elif sys.argv[1] == "2":
+            import MatchRunner
+            MatchRunner.tournament_main(sys.argv[2:])
         # Launching with an extra argument will launch into expriment mode, where multiple games are played
         # >python DotsAndBoxes 1
         else:
+            from PyQt5.QtWidgets import QApplication
+            import Experiment
             app = QApplication(sys.argv)
             ex = Experiment.ExperimentFrame()
             sys.exit(app.exec_())
     # This will simply launch the game
     else:
+        from PyQt5.QtWidgets import QApplication
+        import GameGUI
         app = QApplication(sys.argv)
         ex = GameGUI.StartFrame()
         sys.exit(app.exec_())
@@ -1,8 +1,24 @@
 import unittest
 import random
-from DotsAndBoxes import Game, PlayerFactory
+from DotsAndBoxes import Game, GameVariants, PlayerFactory, BitboardGame, LegalMoveSet
 import DotsAndBoxes.MonteCarloPlayer
+import DotsAndBoxes.MonteCarloArrayTree
+import DotsAndBoxes.Rollout
+import DotsAndBoxes.ParallelMonteCarlo
 import DotsAndBoxes.MinimaxPlayer
+import DotsAndBoxes.TranspositionTable
+import DotsAndBoxes.MoveOrdering
+import DotsAndBoxes.ChainAnalysis
+import DotsAndBoxes.MatchRunner
+import DotsAndBoxes.League
+import DotsAndBoxes.ABTest
+import DotsAndBoxes.Sweep
+import DotsAndBoxes.BinaryResults
+import DotsAndBoxes.ReadStatistics
+import contextlib
+import io
+import os
+import tempfile
 
 class TestGameMethods(unittest.TestCase):
     def test_create_game(self):
@@ -327,36 +343,39 @@ class TestGameMethods(unittest.TestCase):
         """
         Test that scores sent to save files are correctly saved.
         """
-        filename = "test.txt"
-        g = Game.Game(4, 4)
-        l = g.get_all_legal_moves()
-        for m in l:
-            g.take_turn(m)
-        g.save_statistics(filename, "w+")
-        with open(filename, "r") as infile:
-            lines = infile.readlines()
-
-        self.assertEqual(lines[0], "4x4\n")
-        self.assertEqual(lines[16], "(1, 1, 0)\n")
-        self.assertEqual(lines[19], "(1, 2, 0)\n")
-        self.assertEqual(lines[25], "0, 9\n")
-        # Swapping these specific moves makes player 1 win
-        l[15], l[18] = l[18], l[15]
-        g = Game.Game(4, 4)
-        for m in l:
-            g.take_turn(m)
-        g.save_statistics(filename, "a+")
-        with open(filename, "r") as infile:
-            lines = infile.readlines()
-
-        self.assertEqual(lines[0], "4x4\n")
-        self.assertEqual(lines[16], "(1, 1, 0)\n")
-        self.assertEqual(lines[19], "(1, 2, 0)\n")
-        self.assertEqual(lines[25], "0, 9\n")
-        self.assertEqual(lines[26], "4x4\n")
-        self.assertEqual(lines[42], "(1, 2, 0)\n")
-        self.assertEqual(lines[45], "(1, 1, 0)\n")
-        self.assertEqual(lines[51], "9, 0\n")
+        with tempfile.TemporaryDirectory() as folder:
+            filename = os.path.join(folder, "test.txt")
+            g = Game.Game(4, 4)
+            l = g.get_all_legal_moves()
+            for m in l:
+                g.take_turn(m)
+            g.save_statistics(filename, "w+")
+            with open(filename, "r") as infile:
+                lines = infile.readlines()
+
+            self.assertEqual(lines[0], "4x4\n")
+            self.assertEqual(lines[16], "(1, 1, 0)\n")
+            self.assertEqual(lines[19], "(1, 2, 0)\n")
+            self.assertEqual(lines[25], "0, 9\n")
+            # Swapping these specific moves makes player 1 win
+            l[15], l[18] = l[18], l[15]
+            g = Game.Game(4, 4)
+            for m in l:
+                g.take_turn(m)
+            g.save_statistics(filename, "a+")
+            with open(filename, "r") as infile:
+                lines = infile.readlines()
+
+            self.assertEqual(lines[0], "4x4\n")
+            self.assertEqual(lines[16], "(1, 1, 0)\n")
+            self.assertEqual(lines[19], "(1, 2, 0)\n")
+            self.assertEqual(lines[25], "0, 9\n")
+            self.assertEqual(lines[26], "4x4\n")
+            self.assertEqual(lines[42], "(1, 2, 0)\n")
+            self.assertEqual(lines[45], "(1, 1, 0)\n")
+            self.assertEqual(lines[51], "9, 0\n")
+            # the statistics string is what is saved
+            self.assertEqual("".join(lines[26:]), g.get_statistics_string())
 
     def test_game_equality(self):
         """
@@ -395,6 +414,196 @@ class TestGameMethods(unittest.TestCase):
         self.assertTrue(g1 == g2)
         self.assertTrue(g1 == g3)
 
+    def test_undo_move(self):
+        """
+        Test that undo_move exactly restores the game to before the move,
+        including boxes claimed and whose turn it is.
+        """
+        for engine in [Game.Game, BitboardGame.BitboardGame]:
+            g = engine(4, 4)
+            moves = g.get_all_legal_moves()
+            random.shuffle(moves)
+            snapshots = []
+            for m in moves:
+                snapshots.append((g.get_copy(), g.get_all_legal_moves(), g.get_scores()))
+                g.take_turn(m)
+            self.assertTrue(g.is_finished())
+            while snapshots:
+                before, legalMoves, scores = snapshots.pop()
+                self.assertEqual(g.undo_move(), moves[len(snapshots)])
+                self.assertTrue(g == before)
+                self.assertEqual(g.get_all_legal_moves(), legalMoves)
+                self.assertEqual(g.get_scores(), scores)
+                self.assertEqual(g.movesMade, before.movesMade)
+
+    def test_box_counters(self):
+        """
+        Test that the running scores and side counts kept by take_turn and
+        undo_move always match a full recount of the board.
+        """
+        for engine in [Game.Game, BitboardGame.BitboardGame, GameVariants.SwedishGame, GameVariants.RandomGame]:
+            g = engine(5, 4)
+            moves = g.get_all_legal_moves()
+            random.shuffle(moves)
+            for m in moves + [None]*len(moves):
+                if m is None:
+                    g.undo_move()
+                else:
+                    g.take_turn(m)
+                sideCounts = [0, 0, 0, 0, 0]
+                scores = {0: 0, 1: 0, 2: 0}
+                for i in range(3):
+                    for j in range(4):
+                        sides = [g.is_legal_move(x) for x in [(0, i, j), (0, i+1, j), (1, j, i), (1, j+1, i)]].count(False)
+                        self.assertEqual(g.box_sides_completed(i, j), sides)
+                        sideCounts[sides] += 1
+                        scores[g.get_box_owner(i, j)] += 1
+                self.assertEqual(g.get_side_counts(), sideCounts)
+                self.assertEqual(g.get_scores(), scores)
+
+    def test_game_hash(self):
+        """
+        Test that the incremental hash matches a fresh hash of the same position,
+        agrees between engines and is restored by undo_move.
+        """
+        g = Game.Game(4, 4)
+        b = BitboardGame.BitboardGame(4, 4)
+        start = hash(g)
+        self.assertEqual(hash(g), hash(b))
+        moves = g.get_all_legal_moves()
+        random.shuffle(moves)
+        for m in moves:
+            g.take_turn(m)
+            b.take_turn(m)
+            self.assertEqual(hash(g), hash(b))
+            # get_copy works the hash out from scratch.
+            self.assertEqual(hash(g), hash(g.get_copy()))
+            self.assertEqual(hash(b), hash(b.get_copy()))
+        for m in moves:
+            g.undo_move()
+        self.assertEqual(hash(g), start)
+        # Same moves in a different order give the same position and hash.
+        g1 = Game.Game(3, 5)
+        g2 = Game.Game(3, 5)
+        for m in [(1, 1, 1), (0, 0, 0), (1, 0, 0), (0, 1, 1)]:
+            g1.take_turn(m)
+        for m in [(1, 0, 0), (0, 1, 1), (1, 1, 1), (0, 0, 0)]:
+            g2.take_turn(m)
+        self.assertEqual(hash(g1), hash(g2))
+        self.assertEqual(len({g1, g2, Game.Game(3, 5)}), 2)
+
+    def test_legal_move_set(self):
+        """
+        Test that the legal move set removes and restores moves exactly, and
+        always gives the moves back in board order.
+        """
+        moves = Game.Game(4, 4).get_all_legal_moves()
+        moveSet = LegalMoveSet.LegalMoveSet(moves)
+        removed = []
+        for m in [(1, 3, 2), (0, 0, 0), (1, 1, 1), (0, 2, 1)]:
+            before = list(moveSet)
+            removed.append((m, moveSet.remove(m), before))
+            self.assertNotIn(m, moveSet)
+            self.assertEqual(moveSet.ordered(), [x for x in moves if x not in [r[0] for r in removed]])
+        self.assertIn(moveSet.choice(), moveSet)
+        self.assertNotIn([0, 0, 1], moveSet)
+        while removed:
+            m, position, before = removed.pop()
+            moveSet.restore(m, position)
+            self.assertEqual(list(moveSet), before)
+        self.assertEqual(moveSet, LegalMoveSet.LegalMoveSet(reversed(moves)))
+
+class TestBitboardMethods(unittest.TestCase):
+    def test_bitboard_matches_game(self):
+        """
+        Play the same random games in a Game and a BitboardGame and check that
+        both engines agree on every turn, score and winner.
+        """
+        for width, height in [(3, 3), (4, 5), (6, 6)]:
+            g = Game.Game(width, height)
+            b = BitboardGame.BitboardGame(width, height)
+            self.assertEqual(g.get_all_legal_moves(), b.get_all_legal_moves())
+            moves = g.get_all_legal_moves()
+            random.shuffle(moves)
+            for m in moves:
+                g.take_turn(m)
+                b.take_turn(m)
+                self.assertEqual(g.currentPlayer, b.currentPlayer)
+                self.assertEqual(g.get_scores(), b.get_scores())
+                self.assertEqual(g.get_all_legal_moves(), b.get_all_legal_moves())
+            self.assertTrue(b.is_finished())
+            self.assertEqual(g.winner(), b.winner())
+            self.assertEqual(g.movesMade, b.movesMade)
+
+    def test_bitboard_copy(self):
+        """
+        Test that copies of a BitboardGame are independent of the original.
+        """
+        b1 = BitboardGame.BitboardGame(4, 4)
+        for m in b1.get_all_legal_moves()[0:12]:
+            b1.take_turn(m)
+        b2 = b1.get_copy()
+        self.assertTrue(b1 == b2)
+        b1.take_turn((1, 2, 2))
+        self.assertFalse(b1 == b2)
+        self.assertTrue(b2.is_legal_move((1, 2, 2)))
+        self.assertFalse(b2.is_legal_move((5, 5, 5)))
+        self.assertFalse(b2.is_legal_move("string"))
+        self.assertFalse(b2 == None)
+        self.assertNotEqual(b2, "string")
+
+    def test_bitboard_random_move(self):
+        """
+        Test that random moves are always legal, and that every legal move can
+        be picked, when most of the lines are drawn too.
+        """
+        b = BitboardGame.BitboardGame(4, 4)
+        moves = b.get_all_legal_moves()
+        random.shuffle(moves)
+        for m in moves[:-3]:
+            b.take_turn(m)
+        picked = set(b.random_legal_move() for i in range(200))
+        self.assertEqual(picked, set(moves[-3:]))
+        while not b.is_finished():
+            move = b.random_legal_move()
+            self.assertTrue(b.is_legal_move(move))
+            b.take_turn(move)
+
+    def test_bitboard_variants(self):
+        """
+        Test that the variants block the same lines on both engines, and that
+        both engines save a game the same way and compare equal.
+        """
+        random.seed(5)
+        g = GameVariants.RandomGame(5, 5)
+        random.seed(5)
+        b = GameVariants.BitboardRandomGame(5, 5)
+        self.assertEqual(g.get_all_legal_moves(), b.get_all_legal_moves())
+        self.assertEqual(g.get_side_counts(), b.get_side_counts())
+        self.assertTrue(b == g)
+        self.assertTrue(g == b)
+        g = GameVariants.SwedishGame(4, 4)
+        b = GameVariants.BitboardSwedishGame(4, 4)
+        self.assertEqual(g.get_all_legal_moves(), b.get_all_legal_moves())
+        self.assertEqual(hash(g), hash(b))
+        for m in b.get_all_legal_moves():
+            g.take_turn(m)
+            b.take_turn(m)
+        self.assertEqual(g.get_statistics_string(), b.get_statistics_string())
+        self.assertTrue(b == g)
+        self.assertFalse(b == GameVariants.BitboardSwedishGame(4, 4))
+
+    def test_bitboard_with_players(self):
+        """
+        Test that the AI players can search a BitboardGame unchanged.
+        """
+        g = Game.Game(3, 3)
+        b = BitboardGame.BitboardGame(3, 3)
+        minimax = DotsAndBoxes.MinimaxPlayer.MinimaxPlayer(1, colour="red", timeLimit=1, maxDepth=2)
+        self.assertEqual(minimax.chooseMove(b.get_copy()), minimax.chooseMove(g.get_copy()))
+        monty = DotsAndBoxes.MonteCarloPlayer.MonteCarloPlayer(1, timeLimit=0.1)
+        self.assertTrue(b.is_legal_move(monty.chooseMove(b.get_copy())))
+
 class TestPlayerMethods(unittest.TestCase):
     def test_playerfactory(self):
         """
@@ -479,6 +688,11 @@ class TestMonteCarloMethods(unittest.TestCase):
         g2.take_turn(move1)
         g2.take_turn(move2)
 
+        self.assertGreater(mct.searchStats["iterations"], 0)
+        self.assertGreater(mct.searchStats["iterationsPerSecond"], 0)
+        # every iteration goes through one child of the new root, apart from
+        # the one that first visited it
+        self.assertEqual(sum(c.n for c in mct.root.children), max(0, mct.root.n - 1))
         # test the update and newRoot methods
         mct.update(g1.get_copy())
         self.assertEqual(g1, g2)
@@ -503,6 +717,8 @@ class TestMonteCarloMethods(unittest.TestCase):
         self.assertEqual(n2.t, 0.0)
         self.assertEqual(n2.n, 0.0)
         self.assertEqual(n2.children, [])
+        # an unvisited child is chosen again
+        self.assertIs(n1.chooseChild(), n2)
 
         n3 = n2.chooseChild()
 
@@ -520,18 +736,304 @@ class TestMonteCarloMethods(unittest.TestCase):
         self.assertEqual(n2.n, 1.0)
         self.assertEqual(n3.n, 1.0)
 
+        # children are only made when they are first chosen, in board order
+        moves = g1.get_all_legal_moves()
+        self.assertEqual(len(n1.children), 1)
+        self.assertEqual(len(n1.untriedMoves), len(moves) - 1)
+        n4 = n1.chooseChild()
+        self.assertEqual([n2.move, n4.move], moves[:2])
+        self.assertEqual(len(n1.children), 2)
+
+    def test_monte_carlo_array_tree(self):
+        """
+        Test the functionality of the Monte Carlo Array Tree class.
+        """
+        mct = DotsAndBoxes.MonteCarloArrayTree.MonteCarloArrayTree(1, 0.2)
+        g1 = Game.Game(4,4)
+        mct.update(g1.get_copy())
+        # the root and one child for each legal move
+        self.assertEqual(len(mct), 1 + len(g1.get_all_legal_moves()))
+        self.assertEqual(mct.game, g1)
+        move1 = mct.nextMove()
+        self.assertTrue(g1.is_legal_move(move1))
+        self.assertGreater(mct.searchStats["iterations"], 0)
+        # the tree has moved on to the chosen move, and every rollout below the
+        # new root, apart from its own first one, went through one of its children
+        g1.take_turn(move1)
+        self.assertEqual(mct.game, g1)
+        self.assertEqual(mct.parent[0], -1)
+        first, count = mct.firstChild[0], mct.childCount[0]
+        if first != -1:
+            self.assertEqual(sum(mct.visits[first:first+count]), mct.visits[0] - 1)
+            self.assertEqual([mct.parent[k] for k in range(first, first+count)], [0]*count)
+        # test the update and newRoot methods
+        size = len(mct)
+        g1.take_turn(g1.get_all_legal_moves()[0])
+        mct.update(g1.get_copy())
+        self.assertEqual(mct.game, g1)
+        self.assertLessEqual(len(mct), size)
+        self.assertEqual(mct.nodeBytes(), len(mct)*sum(a.itemsize for a in
+            [mct.visits, mct.wins, mct.parent, mct.move, mct.firstChild, mct.childCount]))
+        player = PlayerFactory.PlayerFactory().makePlayer("Monte Carlo Player", 2, timeLimit=0.1, arrayTree=True)
+        self.assertTrue(g1.is_legal_move(player.chooseMove(g1.get_copy())))
+
+    def test_rollout_engine(self):
+        """
+        Test that the rollout engine plays whole games without changing the game.
+        """
+        for g in [Game.Game(5, 4), BitboardGame.BitboardGame(5, 4)]:
+            for m in [(0, 0, 0), (1, 0, 0), (0, 1, 0), (1, 1, 0), (0, 2, 2)]:
+                g.take_turn(m)
+            engine = DotsAndBoxes.Rollout.get_engine(5, 4)
+            self.assertIs(engine, DotsAndBoxes.Rollout.get_engine(5, 4))
+            edges, sides = engine.get_state(g)
+            self.assertEqual(len(edges), len(g.get_all_legal_moves()))
+            self.assertEqual(sides[0:2], [4, 1])
+            before = g.get_scores()
+            for i in range(20):
+                scores = engine.play(g)
+                self.assertEqual(scores[1] + scores[2], 12)
+                self.assertGreaterEqual(scores[1], before[1])
+                self.assertIn(engine.winner(g), [0, 1, 2])
+            self.assertEqual(g.get_scores(), before)
+            self.assertEqual(len(g.get_all_legal_moves()), len(edges))
+        # player 2 claims a box and has the last line left, claiming the other
+        g = Game.Game(3, 2)
+        for m in [(0, 0, 0), (0, 0, 1), (0, 1, 0), (0, 1, 1), (1, 0, 0), (1, 1, 0)]:
+            g.take_turn(m)
+        engine = DotsAndBoxes.Rollout.get_engine(3, 2)
+        self.assertEqual(engine.play(g), [0, 0, 2])
+        self.assertEqual(engine.winner(g), 2)
+
+    @unittest.skipIf(DotsAndBoxes.Rollout.np is None, "NumPy is not installed")
+    def test_batch_rollout_engine(self):
+        """
+        Test playing a batch of random games at once.
+        """
+        g = Game.Game(5, 4)
+        for m in [(0, 0, 0), (1, 0, 0), (0, 1, 0), (1, 1, 0), (0, 2, 2)]:
+            g.take_turn(m)
+        engine = DotsAndBoxes.Rollout.get_batch_engine(5, 4)
+        self.assertIsInstance(engine, DotsAndBoxes.Rollout.BatchRolloutEngine)
+        scores = engine.play(g, 50)
+        self.assertEqual(scores.shape, (50, 3))
+        self.assertTrue((scores[:, 1] + scores[:, 2] == 12).all())
+        self.assertTrue((scores[:, 2] >= 1).all())
+        self.assertTrue(0 <= engine.wins(g, 1, 50) <= 50)
+        # the same forced ending as the scalar engine
+        g = Game.Game(3, 2)
+        for m in [(0, 0, 0), (0, 0, 1), (0, 1, 0), (0, 1, 1), (1, 0, 0), (1, 1, 0)]:
+            g.take_turn(m)
+        engine = DotsAndBoxes.Rollout.get_batch_engine(3, 2)
+        self.assertEqual(engine.play(g, 4).tolist(), [[0, 0, 2]]*4)
+        self.assertEqual(engine.wins(g, 2, 4), 4)
+        self.assertEqual(engine.wins(g, 1, 4), 0)
+
+    def test_monte_carlo_batches(self):
+        """
+        Test that both trees count every game in a batch.
+        """
+        for tree in [DotsAndBoxes.MonteCarloPlayer.MonteCarloTree(1, 0.1, batchSize=8),
+                DotsAndBoxes.MonteCarloArrayTree.MonteCarloArrayTree(1, 0.1, batchSize=8)]:
+            g = Game.Game(4, 4)
+            tree.update(g.get_copy())
+            self.assertTrue(g.is_legal_move(tree.nextMove()))
+            self.assertGreater(tree.searchStats["iterations"], 0)
+        n = tree.visits[0]
+        self.assertEqual(n % 8, 0)
+
+    def test_monte_carlo_transpositions(self):
+        """
+        Test that the tree shares nodes between move orders that reach the same
+        position, and that the table stays within its size.
+        """
+        tree = DotsAndBoxes.MonteCarloPlayer.MonteCarloTree(1, 0.2, transpositions=True, tableSize=200)
+        g = Game.Game(3, 3)
+        tree.update(g.get_copy())
+        tree.search()
+        nodes = {id(tree.root): tree.root}
+        queue = [tree.root]
+        edges = 0
+        while queue:
+            node = queue.pop()
+            edges += len(node.children)
+            for child in node.children:
+                if id(child) not in nodes:
+                    nodes[id(child)] = child
+                    queue.append(child)
+        # A tree would have one fewer edge than nodes.
+        self.assertGreater(edges, len(nodes) - 1)
+        self.assertLessEqual(len(tree.table), 200)
+        # Root choices count one visit each, apart from the root's own.
+        self.assertEqual(tree.root.totalChoices, tree.searchStats["iterations"])
+        # the move played is the most visited, and picking it changes nothing
+        tree.search = lambda: None
+        oldRoot = tree.root
+        choices = list(oldRoot.choices)
+        mostVisited = max(tree.rootStats(), key=lambda s: (s[1], s[2]))[0]
+        move = tree.nextMove()
+        self.assertEqual(move, mostVisited)
+        self.assertEqual(oldRoot.choices, choices)
+        g.take_turn(move)
+        self.assertEqual(tree.root.game, g)
+        self.assertLessEqual(len(tree.table), 200)
+        # only the object tree in one process can share nodes
+        factory = PlayerFactory.PlayerFactory()
+        for options in [{"workers": 2}, {"workers": 2, "parallel": "tree"}, {"arrayTree": True}]:
+            with self.assertRaises(ValueError):
+                factory.makePlayer("Monte Carlo Player", 1, timeLimit=0.1, transpositions=True, **options)
+
+    def test_monte_carlo_max_nodes(self):
+        """
+        Test that trees are pruned to stay within their node limit, and still
+        choose legal moves.
+        """
+        for tree in [DotsAndBoxes.MonteCarloPlayer.MonteCarloTree(1, 0.2, maxNodes=300),
+                DotsAndBoxes.MonteCarloPlayer.MonteCarloTree(1, 0.2, transpositions=True, maxNodes=300),
+                DotsAndBoxes.MonteCarloArrayTree.MonteCarloArrayTree(1, 0.2, maxNodes=300)]:
+            g = Game.Game(4, 4)
+            for i in range(2):
+                tree.update(g.get_copy())
+                move = tree.nextMove()
+                self.assertTrue(g.is_legal_move(move))
+                g.take_turn(move)
+                self.assertGreater(tree.searchStats["prunes"], 0)
+                self.assertLessEqual(tree.searchStats["nodes"], 300)
+        # the array tree is still joined up after compacting
+        for k in range(1, len(tree)):
+            parent = tree.parent[k]
+            self.assertTrue(tree.firstChild[parent] <= k < tree.firstChild[parent] + tree.childCount[parent])
+        # a limit too small to expand a node is refused
+        for tree in [DotsAndBoxes.MonteCarloPlayer.MonteCarloTree(1, 0.2, maxNodes=48),
+                DotsAndBoxes.MonteCarloArrayTree.MonteCarloArrayTree(1, 0.2, maxNodes=48)]:
+            with self.assertRaises(ValueError):
+                tree.update(Game.Game(4, 4))
+            tree.maxNodes = 49
+            tree.update(Game.Game(4, 4))
+
+    def test_array_tree_new_root(self):
+        """
+        Test that the array tree starts again when the game it is given
+        doesn't follow on from its root.
+        """
+        tree = DotsAndBoxes.MonteCarloArrayTree.MonteCarloArrayTree(1, 0.1)
+        g = Game.Game(3, 3)
+        g.take_turn((0, 0, 0))
+        tree.update(g.get_copy())
+        tree.search()
+        other = Game.Game(3, 3)
+        other.take_turn((0, 0, 1))
+        other.take_turn((0, 0, 0))
+        tree.update(other.get_copy())
+        self.assertEqual(tree.visits[0], 0)
+        for move, visits, wins in tree.rootStats():
+            self.assertTrue(other.is_legal_move(move))
+
+    def test_root_parallel_tree(self):
+        """
+        Test that root parallel search adds up the workers' trees, and that
+        the workers keep their trees between moves.
+        """
+        player = PlayerFactory.PlayerFactory().makePlayer("Monte Carlo Player", 1, timeLimit=0.1, workers=2)
+        tree = player.tree
+        self.assertIsInstance(tree, DotsAndBoxes.ParallelMonteCarlo.RootParallelTree)
+        try:
+            g = Game.Game(4, 4)
+            move = player.chooseMove(g.get_copy())
+            self.assertTrue(g.is_legal_move(move))
+            self.assertEqual(len(tree.processes), 2)
+            self.assertEqual(tree.searchStats["workers"], 2)
+            # every iteration from a new root goes through one of its children
+            self.assertEqual(sum(s[1] for s in tree.rootStats()), tree.searchStats["iterations"])
+            # children are only made when they are first chosen
+            self.assertLessEqual(len(tree.rootStats()), len(g.get_all_legal_moves()))
+            self.assertEqual(max(tree.rootStats(), key=lambda s: (s[1], s[2]))[0], move)
+            g.take_turn(move)
+            g.take_turn(g.get_all_legal_moves()[0])
+            self.assertTrue(g.is_legal_move(player.chooseMove(g.get_copy())))
+            self.assertLessEqual(len(tree.rootStats()), len(g.get_all_legal_moves()))
+        finally:
+            tree.close()
+        self.assertEqual(tree.processes, [])
+
+    def test_tree_parallel_tree(self):
+        """
+        Test that workers searching one shared tree keep its counts consistent.
+        """
+        player = PlayerFactory.PlayerFactory().makePlayer("Monte Carlo Player", 1, timeLimit=0.1, workers=2, parallel="tree")
+        tree = player.tree
+        self.assertIsInstance(tree, DotsAndBoxes.ParallelMonteCarlo.TreeParallelTree)
+        try:
+            g = Game.Game(4, 4)
+            tree.update(g.get_copy())
+            tree.search()
+            # all virtual losses have been taken back off again
+            self.assertEqual(tree.visits[0], tree.searchStats["iterations"])
+            self.assertEqual(sum(s[1] for s in tree.rootStats()), tree.visits[0])
+            move = tree.nextMove()
+            self.assertTrue(g.is_legal_move(move))
+            g.take_turn(move)
+            self.assertEqual(tree.game, g)
+            g.take_turn(g.get_all_legal_moves()[0])
+            self.assertTrue(g.is_legal_move(player.chooseMove(g.get_copy())))
+        finally:
+            tree.close()
+        # virtual loss is on a node from when it is chosen, so the workers
+        # walking down the tree at the same time see it
+        tree = DotsAndBoxes.ParallelMonteCarlo.TreeParallelTree(1, 0.05, workers=1, virtualLoss=10**6)
+        g = Game.Game(3, 3)
+        tree.update(g.get_copy())
+        chooseChild = tree.chooseChild
+        seen = []
+        def checkedChooseChild(node):
+            seen.append(tree.visits[node])
+            return chooseChild(node)
+        tree.chooseChild = checkedChooseChild
+        iterations = tree.searchShared(g.get_copy())
+        self.assertTrue(seen)
+        self.assertGreaterEqual(min(seen), 10**6)
+        self.assertEqual(tree.visits[0], iterations)
+        # a full tree carries on with rollouts from its leaves
+        tree = DotsAndBoxes.ParallelMonteCarlo.TreeParallelTree(1, 0.05, workers=2, maxNodes=60)
+        try:
+            g = Game.Game(4, 4)
+            tree.update(g.get_copy())
+            self.assertTrue(g.is_legal_move(tree.nextMove()))
+            self.assertLessEqual(len(tree), 60)
+            self.assertGreater(tree.searchStats["iterations"], 0)
+        finally:
+            tree.close()
+
 class TestMinimaxMethods(unittest.TestCase):
     def test_minimax_selection(self):
         """
         Test the correct operation of the Minimax algorithm.
         Minimax is deterministic. That means in a 3x3 game when Minimax goes first,
-        it should always pick the same move (1,1,1). If it doesn't then something is up.
+        it should always pick the same move (0,1,0). If it doesn't then something is up.
+        The four middle lines score the same, and ties go to the first move searched.
         This is with a time limit of one second and a max depth of 2.
         """
         g = Game.Game(3,3)
         minimax = DotsAndBoxes.MinimaxPlayer.MinimaxPlayer(1, colour="red", timeLimit=1, maxDepth=2)
         move = minimax.chooseMove(g.get_copy())
-        self.assertEqual(move, (1,1,1))
+        self.assertEqual(move, (0,1,0))
+        self.assertEqual(minimax.searchStats["depth"], 2)
+
+    def test_minimax_time_limit(self):
+        """
+        Test that Minimax stops part way through a pass when the time runs out,
+        leaves the game as it found it and still picks a legal move.
+        """
+        g = Game.Game(6, 6)
+        minimax = DotsAndBoxes.MinimaxPlayer.MinimaxPlayer(1, timeLimit=0.2, maxDepth=20)
+        before = g.get_copy()
+        move = minimax.chooseMove(g)
+        self.assertTrue(g.is_legal_move(move))
+        self.assertTrue(g == before)
+        self.assertEqual(g.movesMade, [])
+        self.assertLess(minimax.searchStats["time"], 0.5)
+        self.assertLess(minimax.searchStats["depth"], 20)
+        self.assertGreater(minimax.searchStats["nodes"], 0)
 
     def test_minimax_evaluation(self):
         """
@@ -558,6 +1060,477 @@ class TestMinimaxMethods(unittest.TestCase):
         self.assertEqual(eval1, 15)
         self.assertEqual(eval2, -15)
 
+    def test_transposition_table(self):
+        """
+        Test the transposition table replacement scheme.
+        With one slot, a deeper result stays in the depth-preferred entry and
+        shallower results go to the always-replace entry, until a new search.
+        """
+        TT = DotsAndBoxes.TranspositionTable
+        tt = TT.TranspositionTable(2)
+        tt.store(1, 5, 10, TT.EXACT, (0, 0, 0))
+        tt.store(2, 2, 20, TT.LOWERBOUND, (0, 0, 1))
+        self.assertEqual(tt.lookup(1), (1, 5, 10, TT.EXACT, (0, 0, 0)))
+        self.assertEqual(tt.lookup(2), (2, 2, 20, TT.LOWERBOUND, (0, 0, 1)))
+        tt.store(3, 1, 30, TT.UPPERBOUND, None)
+        self.assertIsNone(tt.lookup(2))
+        self.assertEqual(tt.lookup(1)[2], 10)
+        # a shallower result for the same position keeps the deeper one
+        tt.store(1, 2, 15, TT.LOWERBOUND, None)
+        self.assertEqual(tt.lookup(1), (1, 5, 10, TT.EXACT, (0, 0, 0)))
+        tt.store(4, 6, 40, TT.EXACT, None)
+        self.assertIsNone(tt.lookup(1))
+        self.assertEqual(len(tt), 2)
+        # in a new search, the old deep entry can be replaced
+        tt.newSearch()
+        tt.store(5, 1, 50, TT.EXACT, None)
+        self.assertEqual(tt.lookup(5)[2], 50)
+        self.assertIsNone(tt.lookup(4))
+
+    def test_minimax_transpositions(self):
+        """
+        Test that Minimax picks the same move with and without a transposition table.
+        """
+        g = Game.Game(4, 4)
+        for m in [(0, 0, 0), (1, 1, 1), (0, 2, 2), (1, 3, 0)]:
+            g.take_turn(m)
+        withTable = DotsAndBoxes.MinimaxPlayer.MinimaxPlayer(1, timeLimit=100, maxDepth=3)
+        withoutTable = DotsAndBoxes.MinimaxPlayer.MinimaxPlayer(1, timeLimit=100, maxDepth=3, ttSize=0)
+        self.assertEqual(withTable.chooseMove(g.get_copy()), withoutTable.chooseMove(g.get_copy()))
+        self.assertGreater(len(withTable.tt), 0)
+
+    def test_move_ordering(self):
+        """
+        Test that moves are ordered best move, captures, killers, safe moves
+        and then moves that draw the third side of a box.
+        """
+        g = Game.Game(3, 3)
+        for m in [(1, 0, 0), (0, 0, 0), (0, 1, 0), (1, 2, 1), (0, 0, 1), (1, 2, 0)]:
+            g.take_turn(m)
+        orderer = DotsAndBoxes.MoveOrdering.MoveOrderer()
+        orderer.recordCutoff((0, 2, 1), 3)
+        moves = orderer.order(g, g.get_all_legal_moves(), 3, bestMove=(1, 1, 1))
+        self.assertEqual(sorted(moves), g.get_all_legal_moves())
+        # best move first, then the capture, then the killer move
+        self.assertEqual(moves[0:3], [(1, 1, 1), (1, 1, 0), (0, 2, 1)])
+        # then safe moves, then the move that draws a third side
+        self.assertEqual(moves[3:], [(0, 2, 0), (1, 0, 1), (0, 1, 1)])
+        # a move ordering player still chooses the same move
+        ordered = DotsAndBoxes.MinimaxPlayer.MinimaxPlayer(1, timeLimit=100, maxDepth=3, moveOrdering=True)
+        unordered = DotsAndBoxes.MinimaxPlayer.MinimaxPlayer(1, timeLimit=100, maxDepth=3)
+        self.assertEqual(ordered.chooseMove(g.get_copy()), unordered.chooseMove(g.get_copy()))
+        self.assertGreater(ordered.nodeCount, 0)
+
+    def test_chain_analysis(self):
+        """
+        Test solving endgames made of chains and loops.
+        """
+        CA = DotsAndBoxes.ChainAnalysis
+        # No safe moves are left until every box has two sides.
+        g = Game.Game(4, 3)
+        self.assertIsNone(CA.get_components(g))
+        self.assertIsNone(CA.endgame_move(g))
+        # Two chains of 3. Opening one loses 2 boxes overall, as the other
+        # player takes 1 and leaves 2, to take the whole of the second chain.
+        for i in range(3):
+            for j in range(3):
+                g.take_turn((0, i, j))
+        self.assertEqual(sorted(len(c) for c in CA.get_components(g)), [3, 3])
+        self.assertEqual(CA.endgame_value(g), -2)
+        self.assertEqual(CA.endgame_move(g), (1, 0, 0))
+        g.take_turn((1, 0, 0))
+        self.assertEqual(CA.endgame_value(g), 2)
+        self.assertEqual(CA.endgame_move(g), (1, 1, 0))
+        g.take_turn((1, 1, 0))
+        self.assertEqual(CA.endgame_move(g), (1, 3, 0))
+        # A loop of 4 is all given away.
+        g = Game.Game(3, 3)
+        for m in [(0, 0, 0), (0, 0, 1), (0, 2, 0), (0, 2, 1), (1, 0, 0), (1, 0, 1), (1, 2, 0), (1, 2, 1)]:
+            g.take_turn(m)
+        components = CA.get_components(g)
+        self.assertEqual(len(components), 1)
+        self.assertTrue(components[0].isLoop)
+        self.assertEqual(CA.endgame_value(g), -4)
+
+    def test_minimax_endgame(self):
+        """
+        Test that Minimax plays solved endgames without searching, and picks
+        the same move as a full search.
+        """
+        g = Game.Game(4, 3)
+        for m in [(0, 0, 0), (0, 0, 1), (0, 0, 2), (0, 1, 0), (0, 1, 1), (0, 1, 2),
+                (0, 2, 0), (0, 2, 1), (0, 2, 2), (1, 0, 0), (1, 1, 0)]:
+            g.take_turn(m)
+        solver = DotsAndBoxes.MinimaxPlayer.MinimaxPlayer(g.currentPlayer, timeLimit=100, maxDepth=3)
+        searcher = DotsAndBoxes.MinimaxPlayer.MinimaxPlayer(g.currentPlayer, timeLimit=100, maxDepth=8, endgame=False)
+        self.assertEqual(solver.chooseMove(g.get_copy()), (1, 3, 0))
+        self.assertTrue(solver.searchStats["endgame"])
+        self.assertEqual(solver.nodeCount, 0)
+        self.assertEqual(searcher.chooseMove(g.get_copy()), (1, 3, 0))
+
+    def test_minimax_root_split(self):
+        """
+        Test that searching root moves in parallel finds a move as good as
+        the serial search, and keeps to the time limit.
+        """
+        g = Game.Game(4, 4)
+        for m in [(0, 0, 0), (1, 1, 1), (0, 2, 2), (1, 3, 0)]:
+            g.take_turn(m)
+        serial = DotsAndBoxes.MinimaxPlayer.MinimaxPlayer(1, timeLimit=100, maxDepth=3)
+        parallel = PlayerFactory.PlayerFactory().makePlayer("Minimax Player", 1, timeLimit=100, maxDepth=3, workers=2)
+        try:
+            serialMove = serial.chooseMove(g.get_copy())
+            parallelMove = parallel.chooseMove(g.get_copy())
+            self.assertEqual(parallel.searchStats["depth"], 3)
+            self.assertGreater(parallel.nodeCount, 0)
+            # moves can score the same, so compare scores rather than moves
+            judge = DotsAndBoxes.MinimaxPlayer.MinimaxPlayer(1, ttSize=0)
+            scores = []
+            for move in [serialMove, parallelMove]:
+                h = g.get_copy()
+                h.take_turn(move)
+                scores.append(judge.getScore(h, 3, -10000, 10000))
+            self.assertEqual(scores[0], scores[1])
+            # the deadline holds across the workers
+            parallel.timeLimit = 0.3
+            g = Game.Game(6, 6)
+            self.assertTrue(g.is_legal_move(parallel.chooseMove(g.get_copy())))
+            self.assertLess(parallel.searchStats["time"], 1)
+            self.assertEqual(len(g.moveStack), 0)
+        finally:
+            parallel.parallel.close()
+
+class TestMatchRunnerMethods(unittest.TestCase):
+
+    def test_parse_player_spec(self):
+        """
+        Test that player specs give the player type and options.
+        """
+        parse = DotsAndBoxes.MatchRunner.parse_player_spec
+        self.assertEqual(parse("Random Player"), ("Random Player", {}))
+        self.assertEqual(parse("monte:timeLimit=0.5, c=2,parallel=tree"),
+            ("Monte Carlo Player", {"timeLimit": 0.5, "c": 2, "parallel": "tree"}))
+        with self.assertRaises(ValueError):
+            parse("Chess Player")
+
+    def test_match_runner(self):
+        """
+        Test that matches are played and saved in the results format.
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            for variant in ["american", "swedish"]:
+                runner = DotsAndBoxes.MatchRunner.MatchRunner("Random Player", "minimax:timeLimit=0.1,maxDepth=2", 3, 3, variant, folder)
+                filename = runner.filename()
+                self.assertEqual(os.path.basename(filename), "1_Random_2_Minimax_3x3.txt")
+                results = runner.run(3, verbose=False)
+                self.assertEqual(sum(results), 3)
+                games = DotsAndBoxes.ReadStatistics.get_games(filename)
+                self.assertEqual(games[-1], ["Random", "Minimax"])
+                self.assertEqual(len(games), 4)
+                self.assertEqual(DotsAndBoxes.ReadStatistics.count_winners(games), results)
+
+    def test_read_partial_games(self):
+        """
+        Test that games without a score line aren't read as games.
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            filename = os.path.join(folder, "1_A_2_B_3x3.txt")
+            with open(filename, "w") as outfile:
+                outfile.write("3x3\n(0, 0, 0)\n3, 1\n3x3\n(0, 0, 1)\n3x3\n(1, 0, 0)\n2, 2\n3x3\n")
+            games = DotsAndBoxes.ReadStatistics.get_games(filename)
+            self.assertEqual(len(games), 3)
+            self.assertEqual(DotsAndBoxes.ReadStatistics.count_winners(games), [1, 0, 1])
+
+    def test_match_cli_output(self):
+        """
+        Test that the match command summarises a results file with any name.
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            filename = os.path.join(folder, "a.txt")
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                DotsAndBoxes.MatchRunner.main(["Random Player", "Ordered Player", "--games", "3", "--output", filename, "--quiet"])
+            self.assertEqual(DotsAndBoxes.MatchRunner.completed_games(filename), 3)
+            self.assertIn("out of 3.", output.getvalue())
+            self.assertIn("Random player won", output.getvalue())
+
+    def test_match_runner_engines(self):
+        """
+        Test that a match can be played on either engine.
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            for engine in ["game", "bitboard"]:
+                runner = DotsAndBoxes.MatchRunner.MatchRunner("Random Player", "minimax:timeLimit=0.1,maxDepth=2", 3, 3, "random", folder, engine=engine)
+                game = DotsAndBoxes.MatchRunner.make_game(3, 3, "random", engine)
+                self.assertEqual(type(game).__name__, {"game": "RandomGame", "bitboard": "BitboardRandomGame"}[engine])
+                self.assertEqual(sum(runner.run(2, verbose=False)), 2)
+                self.assertEqual(DotsAndBoxes.MatchRunner.completed_games(runner.filename()), 2)
+            with self.assertRaises(ValueError):
+                DotsAndBoxes.MatchRunner.MatchRunner("Random Player", "Random Player", engine="abacus")
+
+    def test_parallel_match_resume(self):
+        """
+        Test that games played by worker processes are saved in order, and
+        that a stopped run carries on with the same games.
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            runner = DotsAndBoxes.MatchRunner.MatchRunner("Random Player", "Ordered Player", 3, 3, resultsDir=folder)
+            filename = runner.filename()
+            results = runner.run(12, verbose=False, workers=2, seed=7)
+            self.assertEqual(sum(results), 12)
+            self.assertEqual(DotsAndBoxes.MatchRunner.completed_games(filename), 12)
+            with open(filename, "r") as infile:
+                full = infile.read()
+            # the same games are played with one worker
+            runner.run(12, verbose=False, seed=7)
+            with open(filename, "r") as infile:
+                self.assertEqual(infile.read(), full)
+            # stop part way through a game, then resume
+            with open(filename, "w") as outfile:
+                # every game on a 3x3 board is the same length
+                outfile.write(full[:len(full)//2 + 10])
+            self.assertEqual(DotsAndBoxes.MatchRunner.completed_games(filename), 6)
+            results = runner.run(12, verbose=False, seed=7, resume=True)
+            self.assertEqual(sum(results), 6)
+            with open(filename, "r") as infile:
+                self.assertEqual(infile.read(), full)
+            self.assertEqual(DotsAndBoxes.MatchRunner.read_seed(filename), 7)
+            # without a seed, a resumed run uses the seed saved in the file
+            runner.run(12, verbose=False)
+            with open(filename, "r") as infile:
+                full = infile.read()
+            with open(filename, "w") as outfile:
+                outfile.write(full[:len(full)//3])
+            runner.run(12, verbose=False, resume=True)
+            with open(filename, "r") as infile:
+                self.assertEqual(infile.read(), full)
+
+    def test_league_ratings(self):
+        """
+        Test that ratings follow the results, and get surer with more games.
+        """
+        ratings = DotsAndBoxes.League.Ratings(["a", "b", "c"])
+        ratings.fit()
+        self.assertAlmostEqual(ratings.rating(0), 1500)
+        for i in range(10):
+            ratings.addGame(0, 1, 1)
+            ratings.addGame(1, 2, 1)
+            ratings.addGame(0, 2, 0.5)
+        ratings.fit()
+        interval = ratings.interval(1)
+        self.assertGreater(ratings.rating(0), ratings.rating(1))
+        self.assertGreater(ratings.rating(1), ratings.rating(2))
+        self.assertAlmostEqual(sum(ratings.rating(i) for i in range(3))/3, 1500)
+        for i in range(30):
+            ratings.addGame(1, 2, 0.5)
+        ratings.fit()
+        self.assertLess(ratings.interval(1), interval)
+        self.assertEqual(ratings.played(1), 50)
+        self.assertEqual([row[0] for row in ratings.table()], ["a", "b", "c"])
+
+    def test_league(self):
+        """
+        Test that a league plays every pairing both ways and can be resumed.
+        """
+        entrants = DotsAndBoxes.League.make_entrants((0.1,), {"Minimax Player": {"maxDepth": [1, 2]}})
+        self.assertEqual(len(entrants), 5)
+        self.assertIn("Minimax Player:timeLimit=0.1,maxDepth=2", entrants)
+        self.assertEqual(DotsAndBoxes.League.entrant_name(entrants[2]), "Minimax-maxDepth1-timeLimit0.1")
+        with tempfile.TemporaryDirectory() as folder:
+            league = DotsAndBoxes.League.League(["Random Player", "Ordered Player", "minimax:timeLimit=0.1,maxDepth=1"], 3, 3, resultsDir=folder)
+            ratings = league.run(2, seed=3, verbose=False)
+            self.assertEqual(len(os.listdir(league.resultsDir)), 6)
+            self.assertEqual([ratings.played(i) for i in range(3)], [8, 8, 8])
+            # resuming a finished league reads the games back in
+            league = DotsAndBoxes.League.League(league.entrants, 3, 3, resultsDir=folder)
+            resumed = league.run(2, seed=3, resume=True, verbose=False)
+            for row, resumedRow in zip(ratings.table(), resumed.table()):
+                self.assertEqual(resumedRow[0], row[0])
+                self.assertAlmostEqual(resumedRow[1], row[1], 3)
+                self.assertEqual(resumedRow[3], row[3])
+
+    def test_sprt(self):
+        """
+        Test that the SPRT accepts H1 for a much better player and H0 for an
+        equal one, and waits while it can't tell.
+        """
+        sprt = DotsAndBoxes.ABTest.SPRT(0, 20)
+        self.assertIsNone(sprt.status())
+        sprt.add(wins=3, losses=2)
+        self.assertIsNone(sprt.status())
+        sprt.add(wins=100, draws=10, losses=20)
+        self.assertEqual(sprt.status(), "H1")
+        sprt = DotsAndBoxes.ABTest.SPRT(0, 20)
+        for i in range(5000):
+            sprt.add(wins=1, losses=1)
+            if sprt.status() is not None:
+                break
+        self.assertEqual(sprt.status(), "H0")
+        self.assertLess(sprt.llr(), sprt.lower)
+        # results all the same way are decided too
+        for results, status in [({"wins": 500}, "H1"), ({"losses": 500}, "H0"), ({"draws": 5000}, "H0")]:
+            sprt = DotsAndBoxes.ABTest.SPRT(0, 20)
+            sprt.add(**results)
+            self.assertEqual(sprt.status(), status)
+
+    def test_ab_test(self):
+        """
+        Test that A/B tests stop once decided, and at the game limit otherwise.
+        """
+        with tempfile.TemporaryDirectory() as folder:
+            results = DotsAndBoxes.ABTest.ab_test(["minimax:timeLimit=0.1,maxDepth=2", "Random Player"], "Random Player",
+                elo1=50, maxGames=40, seed=2, resultsDir=folder, verbose=False)
+            candidate, result, sprt = results[0]
+            self.assertEqual(result, "H1")
+            self.assertLess(sprt.games(), 40)
+            # the same player can't be shown to be better
+            candidate, result, sprt = results[1]
+            self.assertNotEqual(result, "H1")
+            if result is None:
+                self.assertEqual(sprt.games(), 40)
+            # every game is saved, in both orders
+            files = os.listdir(os.path.join(folder, "ab-american-3x3"))
+            self.assertEqual(len(files), 4)
+            saved = sum(DotsAndBoxes.MatchRunner.completed_games(os.path.join(folder, "ab-american-3x3", f)) for f in files)
+            self.assertEqual(saved, results[0][2].games() + results[1][2].games())
+
+    def test_sweep(self):
+        """
+        Test that configs are made from a parameter space, and that
+        successive halving gives more games to the configs that stay in.
+        """
+        space = DotsAndBoxes.Sweep.parse_space(["maxDepth=1,2", "c=0.5:2.0", "timeLimit=0.1"])
+        self.assertEqual(space, {"maxDepth": [1, 2], "c": (0.5, 2.0), "timeLimit": [0.1]})
+        configs = DotsAndBoxes.Sweep.grid({"maxDepth": [1, 2, 3], "timeLimit": [0.1]})
+        self.assertEqual(configs[2], {"maxDepth": 3, "timeLimit": 0.1})
+        for config in DotsAndBoxes.Sweep.random_configs({"maxDepth": (1, 3), "c": (0.5, 2.0)}, 10, random.Random(1)):
+            self.assertIn(config["maxDepth"], [1, 2, 3])
+            self.assertTrue(0.5 <= config["c"] <= 2.0)
+        with tempfile.TemporaryDirectory() as folder:
+            sweep = DotsAndBoxes.Sweep.Sweep("minimax", configs + configs[:1], width=3, height=3, resultsDir=folder)
+            self.assertEqual(len(sweep.specs), 3)
+            best = sweep.successiveHalving(2, seed=4, verbose=False)
+            self.assertEqual(sorted(sweep.games), [2, 2, 6])
+            self.assertEqual(sweep.games[best], 6)
+            self.assertEqual(sweep.table()[0][0], sweep.specs[best])
+            self.assertEqual(len(os.listdir(sweep.folder)), 6)
+            # options in the player spec are shared by every config
+            sweep = DotsAndBoxes.Sweep.Sweep("minimax:timeLimit=0.1,maxDepth=5", [{"maxDepth": 1}, {}], resultsDir=folder)
+            self.assertEqual(sweep.specs, ["Minimax Player:timeLimit=0.1,maxDepth=1", "Minimax Player:timeLimit=0.1,maxDepth=5"])
+            self.assertEqual(sweep.runners[0][0].specs[0], ("Minimax Player", {"timeLimit": 0.1, "maxDepth": 1}))
+
+    def test_binary_results(self):
+        """
+        Test that games saved to a binary results file read back the same,
+        in any order, and that a broken index is rebuilt.
+        """
+        BinaryResults = DotsAndBoxes.BinaryResults
+        with tempfile.TemporaryDirectory() as folder:
+            textName = os.path.join(folder, "1_Random_2_Ordered_4x4.txt")
+            binaryName = os.path.join(folder, "games.dbr")
+            writer = BinaryResults.BinaryResultsWriter(binaryName, 4, 4, players=("Random", "Ordered"), seed="7")
+            games = []
+            for i in range(5):
+                g = Game.Game(4, 4)
+                moves = g.get_all_legal_moves()
+                random.shuffle(moves)
+                for m in moves:
+                    g.take_turn(m)
+                g.save_statistics(textName, "a+")
+                writer.addGame(g, i)
+                games.append((g.movesMade, g.get_scores()))
+            writer.close()
+            reader = BinaryResults.BinaryResultsReader(binaryName)
+            self.assertEqual(len(reader), 5)
+            self.assertEqual((reader.width, reader.height, reader.variant), (4, 4, "american"))
+            self.assertEqual((reader.players, reader.seed), (("Random", "Ordered"), "7"))
+            for n in [3, 0, 4]:
+                moves, scores, number = reader.game(n)
+                self.assertEqual(moves, games[n][0])
+                self.assertEqual(scores, (games[n][1][1], games[n][1][2]))
+                self.assertEqual(number, n)
+            self.assertEqual(len(reader.scores()), 5)
+            reader.close()
+            # a text file converts to the same games
+            self.assertEqual(BinaryResults.convert_text(textName), 5)
+            converted = BinaryResults.BinaryResultsReader(os.path.join(folder, "1_Random_2_Ordered_4x4.dbr"))
+            reader = BinaryResults.BinaryResultsReader(binaryName)
+            self.assertEqual([game[:2] for game in converted], [game[:2] for game in reader])
+            self.assertEqual(converted.players, ("Random", "Ordered"))
+            converted.close()
+            reader.close()
+            # an existing file is only replaced when asked to
+            with self.assertRaises(FileExistsError):
+                BinaryResults.convert_text(textName)
+            self.assertEqual(BinaryResults.convert_text(textName, overwrite=True), 5)
+            # a score before any game is an error, and leaves no file behind
+            badName = os.path.join(folder, "bad.txt")
+            with open(badName, "w") as outfile:
+                outfile.write("4, 2\n")
+            with self.assertRaises(ValueError):
+                BinaryResults.convert_text(badName)
+            self.assertFalse(os.path.exists(os.path.join(folder, "bad.dbr")))
+            # a torn index is read as far as it goes
+            with open(BinaryResults.index_filename(binaryName), "ab") as outfile:
+                outfile.write(b"abc")
+            reader = BinaryResults.BinaryResultsReader(binaryName)
+            self.assertEqual(len(reader), 5)
+            reader.close()
+            # a game cut off part way, and a lost index
+            with open(binaryName, "r+b") as outfile:
+                outfile.truncate(os.path.getsize(binaryName) - 3)
+            os.remove(BinaryResults.index_filename(binaryName))
+            size = os.path.getsize(binaryName)
+            reader = BinaryResults.BinaryResultsReader(binaryName)
+            self.assertEqual(len(reader), 4)
+            self.assertEqual(reader.game(3)[0], games[3][0])
+            reader.close()
+            # reading doesn't change the files, repairing does
+            self.assertEqual(os.path.getsize(binaryName), size)
+            self.assertFalse(os.path.exists(BinaryResults.index_filename(binaryName)))
+            self.assertEqual(BinaryResults.repair(binaryName), 4)
+            self.assertLess(os.path.getsize(binaryName), size)
+            self.assertTrue(os.path.exists(BinaryResults.index_filename(binaryName)))
+            with self.assertRaises(ValueError):
+                BinaryResults.BinaryResultsWriter(binaryName, 4, 4, "swedish")
+            writer = BinaryResults.BinaryResultsWriter(binaryName, 4, 4)
+            writer.add(games[4][0], (games[4][1][1], games[4][1][2]), 4)
+            writer.close()
+            reader = BinaryResults.BinaryResultsReader(binaryName)
+            self.assertEqual(reader.game(4)[0], games[4][0])
+            reader.close()
+
+    def test_match_binary_results(self):
+        """
+        Test that a match can save its games to a binary results file as
+        well, which follows the text file when a run is resumed.
+        """
+        MatchRunner = DotsAndBoxes.MatchRunner
+        with tempfile.TemporaryDirectory() as folder:
+            runner = MatchRunner.MatchRunner("Random Player", "Ordered Player", 3, 3, resultsDir=folder)
+            filename = runner.filename()
+            binaryName = MatchRunner.binary_filename(filename)
+            def textScores():
+                games = DotsAndBoxes.ReadStatistics.get_games(filename)[:-1]
+                return [tuple(int(x) for x in game[-1].split(",")) for game in games]
+            runner.run(8, verbose=False, seed=3, binary=True)
+            with open(filename, "r") as infile:
+                full = infile.read()
+            reader = DotsAndBoxes.BinaryResults.BinaryResultsReader(binaryName)
+            self.assertEqual(len(reader), 8)
+            self.assertEqual((reader.players, reader.seed), (tuple(runner.names), "3"))
+            self.assertEqual(reader.scores(), textScores())
+            reader.close()
+            # the binary file is made again when it is behind the text file
+            with open(filename, "w") as outfile:
+                outfile.write(full[:len(full)//2 + 10])
+            os.remove(binaryName)
+            runner.run(8, verbose=False, resume=True, binary=True)
+            reader = DotsAndBoxes.BinaryResults.BinaryResultsReader(binaryName)
+            self.assertEqual([game[2] for game in reader], list(range(8)))
+            self.assertEqual(reader.scores(), textScores())
+            reader.close()
+
     # def test_(self):
     #     """
     #     Test template